@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Microbenchmark of the xml backends.
+
+Parses a generated getAllThesesMetadata response with both backends and
+reports the time of the streamed parsing, the fingerprints and the
+queries::
+
+    python benchmarks/parsing.py --theses 20000
+"""
+
+import sys
+from argparse import ArgumentParser
+from collections.abc import Callable, Iterator
+from timeit import repeat
+
+from invenio_campusonline.records.api import (
+    exists_fulltext,
+    iterparse_fingerprints,
+    iterparse_ids,
+    iterparse_theses,
+)
+from invenio_campusonline.records.parsing import get_backend
+from invenio_campusonline.utils import extract_embargo_range
+
+THESIS = (
+    "<thesis><ID>{cms_id}</ID>"
+    '<attr key="STATUS">IFG</attr><attr key="TYPKB">DISS</attr>'
+    '<attr key="SPVON">2024-01-01 00:00:00</attr>'
+    '<attr key="SPBIS">2026-01-01 00:00:00</attr>'
+    "<metaclass><name>AUTHOR</name>"
+    '<attr key="FN">Jane</attr><attr key="LN">Doe</attr></metaclass>'
+    "<metaclass><name>TEXT</name>"
+    '<attr key="TITLE">A thesis about the performance of xml parsers</attr>'
+    '<attr key="ABSTRACT">{abstract}</attr></metaclass>'
+    "<document><docUrl>https://campusonline/{cms_id}.pdf</docUrl></document>"
+    "</thesis>"
+)
+
+
+def build_response(theses: int) -> bytes:
+    """Build a getAllThesesMetadata response with the number of theses."""
+    abstract = "lorem ipsum dolor sit amet " * 40
+    body = "".join(
+        THESIS.format(cms_id=cms_id, abstract=abstract) for cms_id in range(theses)
+    )
+    return (
+        '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+        "<soapenv:Body>"
+        '<getAllThesesMetadataResponse xmlns="http://www.campusonline.at/thesisservice/basetypes">'
+        f"{body}"
+        "</getAllThesesMetadataResponse>"
+        "</soapenv:Body>"
+        "</soapenv:Envelope>"
+    ).encode()
+
+
+def chunks(data: bytes, size: int = 64 * 1024) -> Iterator[bytes]:
+    """Split the response into chunks like the streamed http response."""
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+def cases(data: bytes, backend_name: str) -> dict[str, Callable]:
+    """Build the benchmarked cases for the backend."""
+    backend = get_backend(backend_name)
+
+    def queries() -> None:
+        for _, thesis in iterparse_theses(chunks(data), backend):
+            exists_fulltext(thesis)
+            extract_embargo_range(thesis)
+
+    return {
+        "ids": lambda: sum(1 for _ in iterparse_ids(chunks(data), backend)),
+        "fingerprints": lambda: dict(iterparse_fingerprints(chunks(data), backend)),
+        "queries": queries,
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--theses", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_response(args.theses)
+    size = len(data) / 1024**2
+    sys.stdout.write(f"{args.theses} theses, {size:.1f} MiB\n")
+
+    results = {}
+    for backend_name in ("stdlib", "lxml"):
+        for case, func in cases(data, backend_name).items():
+            best = min(repeat(func, number=1, repeat=args.repeat))
+            results[backend_name, case] = best
+            sys.stdout.write(f"{backend_name:>7} {case:<13} {best:8.3f}s\n")
+
+    for case in ("ids", "fingerprints", "queries"):
+        speedup = results["stdlib", case] / results["lxml", case]
+        sys.stdout.write(f"lxml speedup {case:<13} {speedup:5.2f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Local fake of the campusonline soap endpoint for the benchmarks.
+
+The server answers getAllThesesMetadata, getMetadataByThesisID,
+getDocumentByThesisID and setThesisStatusByID requests with synthetic
+theses and serves the referenced pdf files. Every response is delayed by
+the configured latency and the requests are counted per kind::
+
+    python benchmarks/server.py --theses 1000 --latency 0.02 --port 8080
+"""
+
+import re
+import sys
+from argparse import ArgumentParser
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socket import IPPROTO_TCP, TCP_NODELAY
+from threading import Lock, Thread
+from time import sleep
+from typing import Self
+
+ENVELOPE = (
+    '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+    "<soapenv:Body>"
+    '<{response} xmlns="http://www.campusonline.at/thesisservice/basetypes">'
+    "{body}"
+    "</{response}>"
+    "</soapenv:Body>"
+    "</soapenv:Envelope>"
+)
+
+THESIS = (
+    "<thesis><ID>{cms_id}</ID>"
+    '<attr key="STATUS">IFG</attr><attr key="TYPKB">DISS</attr>'
+    '<attr key="OLANG">EN</attr><attr key="VOLLTEXT">J</attr>'
+    '<attr key="SPVON">2024-01-01 00:00:00</attr>'
+    '<attr key="SPBIS">2026-01-01 00:00:00</attr>'
+    "<metaclass><name>AUTHOR</name><metaobj>"
+    '<attr key="FN">Jane</attr><attr key="LN">Doe</attr>'
+    '<attr key="FNLN">Doe, Jane</attr></metaobj></metaclass>'
+    "<metaclass><name>SUPERVISOR</name><metaobj>"
+    '<attr key="FN">John</attr><attr key="LN">Doe</attr>'
+    '<attr key="FNLN">Doe, John</attr></metaobj></metaclass>'
+    "<metaclass><name>TEXT</name><metaobj>"
+    '<attr key="ORIG">J</attr><attr key="TIT">Thesis {cms_id}</attr>'
+    '<attr key="ABSTRACT">{abstract}</attr></metaobj></metaclass>'
+    "</thesis>"
+)
+
+DOCUMENT = "<document><docUrl>{url}files/{cms_id}.pdf?token=</docUrl></document>"
+
+ID_PATTERN = re.compile(rb"<bas:ID>([^<]*)</bas:ID>")
+
+
+class FakeCampusOnlineHandler(BaseHTTPRequestHandler):
+    """Answer the soap requests and serve the pdf files."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        """Send each write right away.
+
+        Without TCP_NODELAY the body written after the headers waits for
+        the delayed ack of the client, which adds about 40 ms to every
+        response on a kept alive connection.
+        """
+        super().setup()
+        self.connection.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+
+    def do_POST(self) -> None:
+        """Answer the soap request named by the SOAPAction header."""
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        action = self.headers.get("SOAPAction", "").rpartition("#")[2]
+        self.server.count(action)
+
+        match = ID_PATTERN.search(body)
+        cms_id = match.group(1).decode() if match else ""
+
+        if action == "getAllThesesMetadataRequest":
+            content = self.server.all_theses
+        elif action == "getMetadataByThesisID":
+            content = self.server.envelope("getMetadataByThesisIDResponse", cms_id)
+        elif action == "getDocumentByThesisID":
+            document = DOCUMENT.format(url=self.server.url, cms_id=cms_id)
+            content = ENVELOPE.format(
+                response="getDocumentByThesisIDResponse",
+                body=document,
+            ).encode()
+        else:
+            content = ENVELOPE.format(
+                response="setThesisStatusByIDResponse",
+                body="",
+            ).encode()
+
+        self.send(content, "text/xml")
+
+    def do_GET(self) -> None:
+        """Serve the pdf file."""
+        self.server.count("download")
+        self.send(self.server.pdf, "application/pdf")
+
+    def do_HEAD(self) -> None:
+        """Answer with the headers of the pdf file."""
+        self.server.count("head")
+        self.send(self.server.pdf, "application/pdf", body=False)
+
+    def send(self, content: bytes, content_type: str, *, body: bool = True) -> None:
+        """Send the content after the configured latency."""
+        if self.server.latency:
+            sleep(self.server.latency)
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        if content_type == "application/pdf":
+            self.send_header("ETag", '"benchmark"')
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+    def log_message(self, *_: str) -> None:
+        """Keep the benchmark output clean."""
+
+
+class FakeCampusOnlineServer(ThreadingHTTPServer):
+    """Fake campusonline endpoint serving synthetic theses."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        theses: int = 1000,
+        latency: float = 0.0,
+        abstract_size: int = 2048,
+        pdf_size: int = 256 * 1024,
+        port: int = 0,
+    ) -> None:
+        """Construct."""
+        super().__init__(("127.0.0.1", port), FakeCampusOnlineHandler)
+        self.latency = latency
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/"
+        self.abstract = ("lorem ipsum " * (abstract_size // 12 + 1))[:abstract_size]
+        self.pdf = b"%PDF-1.4\n" + b"0" * max(pdf_size - 9, 0)
+        self.ids = [str(cms_id) for cms_id in range(1, theses + 1)]
+        self.all_theses = ENVELOPE.format(
+            response="getAllThesesMetadataResponse",
+            body="".join(self.thesis(cms_id) for cms_id in self.ids),
+        ).encode()
+        self.requests: Counter[str] = Counter()
+        self.lock = Lock()
+        self.thread: Thread | None = None
+
+    def thesis(self, cms_id: str) -> str:
+        """Render the thesis with the id."""
+        return THESIS.format(cms_id=cms_id, abstract=self.abstract)
+
+    def envelope(self, response: str, cms_id: str) -> bytes:
+        """Render the response containing the thesis with the id."""
+        return ENVELOPE.format(response=response, body=self.thesis(cms_id)).encode()
+
+    def count(self, action: str) -> None:
+        """Count the request."""
+        with self.lock:
+            self.requests[action] += 1
+
+    def reset(self) -> None:
+        """Reset the request counters."""
+        with self.lock:
+            self.requests.clear()
+
+    def start(self) -> Self:
+        """Serve the requests in a background thread."""
+        self.thread = Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> Self:
+        """Start the server."""
+        return self.start()
+
+    def __exit__(self, *_: object) -> None:
+        """Stop the server."""
+        self.stop()
+
+
+def main() -> None:
+    """Run the fake server in the foreground."""
+    parser = ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--theses", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--abstract-size", type=int, default=2048)
+    parser.add_argument("--pdf-size", type=int, default=256 * 1024)
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    server = FakeCampusOnlineServer(
+        args.theses,
+        args.latency,
+        args.abstract_size,
+        args.pdf_size,
+        args.port,
+    )
+    sys.stdout.write(f"fake campusonline endpoint at {server.url}\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""End to end import benchmark against the fake campusonline endpoint.
+
+Every scenario fetches the ids of all theses and then gets the metadata
+and downloads the file of each thesis:
+
+api
+    CampusOnlineAPI
+service
+    CampusOnlineRESTService, reusing the bulk metadata
+task
+    import_theses_from_campusonline with the extension in a flask app
+
+Each scenario runs in its own process, so that the peak rss is measured
+per scenario. The results can be written as json and compared with the
+results of an earlier run to catch regressions::
+
+    python benchmarks/throughput.py --theses 500 --latency 0.005 --json new.json
+    python benchmarks/throughput.py --baseline new.json --tolerance 0.2
+"""
+
+import json
+import resource
+import sys
+from argparse import ArgumentParser, Namespace
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from statistics import quantiles
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from types import SimpleNamespace
+
+from flask import Flask
+from invenio_access.permissions import system_identity
+from server import FakeCampusOnlineServer
+
+from invenio_campusonline import InvenioCampusonline
+from invenio_campusonline.records import CampusOnlineAPI
+from invenio_campusonline.services import (
+    CampusOnlineRESTService,
+    CampusOnlineRESTServiceConfig,
+)
+from invenio_campusonline.tasks import import_theses_from_campusonline
+from invenio_campusonline.types import CampusOnlineID
+
+SCENARIOS = ("api", "service", "task")
+
+
+@dataclass(frozen=True)
+class Result:
+    """Measurements of one scenario."""
+
+    scenario: str
+    theses: int
+    seconds: float
+    theses_per_second: float
+    p50: float
+    p99: float
+    peak_rss_mib: float
+    requests_per_thesis: float = 0.0
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    """Calculate the p50 and the p99 of the latencies."""
+    if len(latencies) < 2:  # noqa: PLR2004
+        latency = latencies[0] if latencies else 0.0
+        return latency, latency
+    cuts = quantiles(latencies, n=100, method="inclusive")
+    return cuts[49], cuts[98]
+
+
+def peak_rss_mib() -> float:
+    """Get the peak rss of this process, ru_maxrss is in KiB on linux."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024**2 if sys.platform == "darwin" else 1024
+    return usage / scale
+
+
+def timed(func: Callable, latencies: list[float]) -> Callable:
+    """Wrap func to append the duration of each call to latencies."""
+
+    def wrapper(*args: object) -> object:
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            latencies.append(perf_counter() - start)
+
+    return wrapper
+
+
+def build_config(url: str, download_dir: str) -> CampusOnlineRESTServiceConfig:
+    """Build the config pointing to the fake endpoint."""
+    return CampusOnlineRESTServiceConfig(
+        endpoint=url,
+        token="benchmark",  # noqa: S106
+        download_dir=download_dir,
+        download_quota=None,
+        reuse_bulk_metadata=True,
+    )
+
+
+def run_api(args: Namespace, url: str, download_dir: str) -> list[float]:
+    """Import with CampusOnlineAPI."""
+    api = CampusOnlineAPI(build_config(url, download_dir))
+    latencies: list[float] = []
+
+    def import_one(cms_id: CampusOnlineID) -> None:
+        api.get_thesis(cms_id)
+        api.download_file(cms_id)
+
+    ids = api.fetch_ids(None)
+    with ThreadPoolExecutor(args.workers) as executor:
+        list(executor.map(timed(import_one, latencies), ids))
+    return latencies
+
+
+def run_service(args: Namespace, url: str, download_dir: str) -> list[float]:
+    """Import with CampusOnlineRESTService."""
+    service = CampusOnlineRESTService(build_config(url, download_dir))
+    latencies: list[float] = []
+
+    def import_one(cms_id: CampusOnlineID) -> None:
+        service.get_thesis(system_identity, cms_id)
+        service.download_file(system_identity, cms_id)
+
+    ids = service.fetch_all_ids(system_identity, None)
+    with ThreadPoolExecutor(args.workers) as executor:
+        list(executor.map(timed(import_one, latencies), ids))
+    return latencies
+
+
+def run_task(args: Namespace, url: str, download_dir: str) -> list[float]:
+    """Import with the import_theses_from_campusonline task."""
+    latencies: list[float] = []
+
+    def import_func(
+        identity: object,
+        cms_id: CampusOnlineID,
+        service: CampusOnlineRESTService,
+    ) -> object:
+        service.get_thesis(identity, cms_id)
+        service.download_file(identity, cms_id)
+        return SimpleNamespace(id=cms_id)
+
+    app = Flask("benchmark")
+    app.config.update(
+        CAMPUSONLINE_ENDPOINT=url,
+        CAMPUSONLINE_TOKEN="benchmark",  # noqa: S106
+        CAMPUSONLINE_DOWNLOAD_DIR=download_dir,
+        CAMPUSONLINE_DOWNLOAD_QUOTA=None,
+        CAMPUSONLINE_REUSE_BULK_METADATA=True,
+        CAMPUSONLINE_IMPORT_LEDGER=False,
+        CAMPUSONLINE_IMPORT_FUNC=timed(import_func, latencies),
+        CAMPUSONLINE_IMPORT_CONCURRENCY=args.workers,
+    )
+    app.logger.disabled = True
+    InvenioCampusonline(app)
+
+    with app.app_context():
+        import_theses_from_campusonline()
+    return latencies
+
+
+RUNNERS = {"api": run_api, "service": run_service, "task": run_task}
+
+
+def run_scenario(scenario: str, args: Namespace, url: str) -> Result:
+    """Run the scenario, this is called in a fresh process."""
+    with TemporaryDirectory() as download_dir:
+        start = perf_counter()
+        latencies = RUNNERS[scenario](args, url, download_dir)
+        seconds = perf_counter() - start
+
+    p50, p99 = percentiles(latencies)
+    return Result(
+        scenario=scenario,
+        theses=len(latencies),
+        seconds=seconds,
+        theses_per_second=len(latencies) / seconds if seconds else 0.0,
+        p50=p50,
+        p99=p99,
+        peak_rss_mib=peak_rss_mib(),
+    )
+
+
+def compare(results: list[Result], baseline: Path, tolerance: float) -> bool:
+    """Compare the throughput with the baseline, false on a regression."""
+    previous = {r["scenario"]: r for r in json.loads(baseline.read_text())}
+    ok = True
+
+    for result in results:
+        if result.scenario not in previous:
+            continue
+        before = previous[result.scenario]["theses_per_second"]
+        change = result.theses_per_second / before - 1 if before else 0.0
+        regressed = change < -tolerance
+        ok = ok and not regressed
+        mark = "REGRESSION" if regressed else "ok"
+        line = f"{result.scenario:<8} {change:+7.1%} theses/s  {mark}\n"
+        sys.stdout.write(line)
+
+    return ok
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--theses", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--abstract-size", type=int, default=2048)
+    parser.add_argument("--pdf-size", type=int, default=256 * 1024)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    parser.add_argument("--json", type=Path, help="write the results to the file")
+    parser.add_argument("--baseline", type=Path, help="compare with the results")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = FakeCampusOnlineServer(
+        args.theses,
+        args.latency,
+        args.abstract_size,
+        args.pdf_size,
+    )
+    results = []
+
+    context = get_context("spawn")
+    with server:
+        for scenario in args.scenario or SCENARIOS:
+            server.reset()
+            with ProcessPoolExecutor(1, context) as executor:
+                future = executor.submit(run_scenario, scenario, args, server.url)
+                result = future.result()
+            requests = sum(server.requests.values())
+            per_thesis = requests / result.theses if result.theses else 0.0
+            measured = {**asdict(result), "requests_per_thesis": per_thesis}
+            results.append(Result(**measured))
+
+    header = f"{'scenario':<8} {'theses/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+    sys.stdout.write(f"{header}{'rss MiB':>8} {'req/thesis':>10}\n")
+    for r in results:
+        sys.stdout.write(
+            f"{r.scenario:<8} {r.theses_per_second:9.1f} {r.p50 * 1000:8.1f} "
+            f"{r.p99 * 1000:8.1f} {r.peak_rss_mib:8.1f} "
+            f"{r.requests_per_thesis:10.2f}\n",
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in results], indent=2))
+
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
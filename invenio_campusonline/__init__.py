@@ -8,11 +8,10 @@
 
 """The module is used to import/export from/to the CampusOnline System."""
 
-
 from .ext import InvenioCampusonline
 from .proxies import current_campusonline
 from .services import CampusOnlineRESTService
-from .types import CampusOnlineID, ThesesFilter
+from .types import CampusOnlineID, PartitionedThesesFilter, ThesesFilter, Thesis
 
 __version__ = "0.6.1"
 
@@ -20,7 +19,9 @@ __all__ = (
     "CampusOnlineID",
     "CampusOnlineRESTService",
     "InvenioCampusonline",
+    "PartitionedThesesFilter",
     "ThesesFilter",
+    "Thesis",
     "__version__",
     "current_campusonline",
 )
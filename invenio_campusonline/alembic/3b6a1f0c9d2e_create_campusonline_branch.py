@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Create campusonline branch."""
+
+# revision identifiers, used by Alembic.
+revision = "3b6a1f0c9d2e"
+down_revision = None
+branch_labels = ("invenio_campusonline",)
+depends_on = "dbdbc1b19cf2"
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+
+
+def downgrade() -> None:
+    """Downgrade database."""
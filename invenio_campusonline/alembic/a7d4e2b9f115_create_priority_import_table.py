@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Create priority import table."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a7d4e2b9f115"
+down_revision = "f3a9d1c6e072"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+    op.create_table(
+        "campusonline_priority_import",
+        sa.Column("created", sa.DateTime(), nullable=False),
+        sa.Column("updated", sa.DateTime(), nullable=False),
+        sa.Column("cms_id", sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "cms_id",
+            name=op.f("pk_campusonline_priority_import"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database."""
+    op.drop_table("campusonline_priority_import")
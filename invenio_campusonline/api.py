@@ -7,3 +7,618 @@
 # file for more details.
 
 """API functions of the campusonline connector."""
+
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from time import perf_counter, sleep
+from typing import ClassVar
+
+from flask import current_app
+from flask_principal import Identity
+from invenio_db import db
+
+from .models import (
+    CampusOnlineImportLedger,
+    CampusOnlineStatusUpdate,
+    CampusOnlineSyncState,
+)
+from .priority import is_claimed
+from .records.metrics import MetricsCollector
+from .records.models import CampusOnlineRESTError
+from .records.resilience import RetryPolicy
+from .services import CampusOnlineRESTService, ImportPipeline
+from .types import (
+    CampusOnlineID,
+    CampusOnlineStatus,
+    ImportOutcome,
+    ImportPlan,
+    ImportResult,
+    ImportState,
+    PartitionedThesesFilter,
+    ThesesFilter,
+    WriteBackResult,
+)
+
+
+def filter_changed(
+    fingerprints: dict[CampusOnlineID, str],
+) -> dict[CampusOnlineID, str]:
+    """Filter the theses which are new or changed since their last import."""
+    query = db.session.query(
+        CampusOnlineSyncState.cms_id,
+        CampusOnlineSyncState.fingerprint,
+    )
+    imported = dict(query.all())
+    return {
+        cms_id: fingerprint
+        for cms_id, fingerprint in fingerprints.items()
+        if imported.get(cms_id) != fingerprint
+    }
+
+
+def mark_imported(cms_id: CampusOnlineID, fingerprint: str) -> None:
+    """Record the fingerprint of the successfully imported thesis."""
+    db.session.merge(CampusOnlineSyncState(cms_id=cms_id, fingerprint=fingerprint))
+    db.session.commit()
+
+
+def record_fetched(
+    ids: Iterable[CampusOnlineID],
+    fingerprints: dict[CampusOnlineID, str] | None = None,
+) -> None:
+    """Record the fetched ids of a new import run in the ledger.
+
+    Theses which are already in the ledger are set back to fetched, their
+    attempts are kept.
+    """
+    fingerprints = fingerprints or {}
+    known = {cms_id for (cms_id,) in db.session.query(CampusOnlineImportLedger.cms_id)}
+
+    entries = [
+        {
+            "cms_id": cms_id,
+            "state": ImportState.FETCHED.value,
+            "fingerprint": fingerprints.get(cms_id),
+            "error": None,
+        }
+        for cms_id in ids
+    ]
+    db.session.bulk_update_mappings(
+        CampusOnlineImportLedger,
+        [entry for entry in entries if entry["cms_id"] in known],
+    )
+    db.session.bulk_insert_mappings(
+        CampusOnlineImportLedger,
+        [
+            {**entry, "attempts": 0, "timings": {}}
+            for entry in entries
+            if entry["cms_id"] not in known
+        ],
+    )
+    db.session.commit()
+
+
+def start_attempt(cms_id: CampusOnlineID) -> None:
+    """Count the import attempt and forget the outcome of the last one."""
+    entry = db.session.get(CampusOnlineImportLedger, cms_id)
+    if entry is None:
+        entry = CampusOnlineImportLedger(cms_id=cms_id, attempts=0)
+        db.session.add(entry)
+
+    entry.state = ImportState.FETCHED.value
+    entry.attempts += 1
+    entry.timings = {}
+    entry.error = None
+    db.session.commit()
+
+
+def advance(
+    cms_id: CampusOnlineID,
+    state: ImportState,
+    *,
+    stage: str | None = None,
+    seconds: float | None = None,
+    error: str | None = None,
+) -> None:
+    """Advance the thesis to the state and record the time of the stage.
+
+    A thesis never goes back to an earlier state within an attempt, e.g.
+    it stays at status_set if the import function sets the status before
+    it returns.
+    """
+    entry = db.session.get(CampusOnlineImportLedger, cms_id)
+    if entry is None:
+        return
+
+    order = list(ImportState)
+    current = ImportState(entry.state)
+    if state is ImportState.FAILED or order.index(state) > order.index(current):
+        entry.state = state.value
+    if stage is not None:
+        entry.timings = {**entry.timings, stage: round(seconds, 3)}
+    entry.error = error
+    db.session.commit()
+
+
+def ledger_ids(
+    condition: object,
+) -> tuple[list[CampusOnlineID], dict[CampusOnlineID, str] | None]:
+    """Get the ids of the ledger matching the condition with their fingerprints.
+
+    The fingerprints are returned if the run was incremental.
+    """
+    query = (
+        db.session.query(
+            CampusOnlineImportLedger.cms_id,
+            CampusOnlineImportLedger.fingerprint,
+        )
+        .filter(condition)
+        .order_by(CampusOnlineImportLedger.cms_id)
+    )
+    rows = query.all()
+    fingerprints = {cms_id: fp for cms_id, fp in rows if fp is not None}
+    return [cms_id for cms_id, _ in rows], fingerprints or None
+
+
+def unfinished_ids() -> tuple[list[CampusOnlineID], dict[CampusOnlineID, str] | None]:
+    """Get the ids of the ledger which are not imported yet."""
+    finished = [state.value for state in ImportState if state.finished]
+    return ledger_ids(CampusOnlineImportLedger.state.notin_(finished))
+
+
+def failed_ids() -> tuple[list[CampusOnlineID], dict[CampusOnlineID, str] | None]:
+    """Get the ids of the ledger which failed in their last attempt."""
+    return ledger_ids(CampusOnlineImportLedger.state == ImportState.FAILED.value)
+
+
+def import_progress() -> dict[ImportState, int]:
+    """Count the theses of the ledger per state."""
+    query = db.session.query(
+        CampusOnlineImportLedger.state,
+        db.func.count(CampusOnlineImportLedger.cms_id),
+    ).group_by(CampusOnlineImportLedger.state)
+    counts = dict(query.all())
+    return {state: counts.get(state.value, 0) for state in ImportState}
+
+
+def imported_ids(cms_ids: Iterable[CampusOnlineID]) -> set[CampusOnlineID]:
+    """Get the ids of the sync state and the finished ids of the ledger."""
+    cms_ids = list(cms_ids)
+    finished = [state.value for state in ImportState if state.finished]
+    synced = db.session.query(CampusOnlineSyncState.cms_id).filter(
+        CampusOnlineSyncState.cms_id.in_(cms_ids),
+    )
+    ledger = db.session.query(CampusOnlineImportLedger.cms_id).filter(
+        CampusOnlineImportLedger.cms_id.in_(cms_ids),
+        CampusOnlineImportLedger.state.in_(finished),
+    )
+    return {cms_id for (cms_id,) in synced.union(ledger)}
+
+
+def plan_import(
+    cms_service: CampusOnlineRESTService,
+    identity: Identity,
+    theses_filter: ThesesFilter | PartitionedThesesFilter,
+    *,
+    concurrency: int = 8,
+    write_back: bool = False,
+) -> ImportPlan:
+    """Estimate the import and count the theses which are already imported.
+
+    Nothing is imported and nothing is recorded, see
+    CampusOnlineRESTService.plan_import.
+    """
+    plan = cms_service.plan_import(identity, theses_filter, concurrency=concurrency)
+    plan.imported = imported_ids(plan.ids)
+    plan.write_back = write_back
+    return plan
+
+
+class LedgerService:
+    """Proxy of the service which advances the ledger of the imported thesis.
+
+    The import function gets the proxy instead of the service. Its calls of
+    get_metadata, get_thesis, download_file and set_status advance the
+    thesis in the ledger and record the time of the stage, all other
+    attributes are passed through.
+    """
+
+    tracked: ClassVar[dict[str, ImportState]] = {
+        "get_metadata": ImportState.METADATA,
+        "get_thesis": ImportState.METADATA,
+        "download_file": ImportState.DOWNLOADED,
+        "set_status": ImportState.STATUS_SET,
+    }
+
+    def __init__(self, service: CampusOnlineRESTService) -> None:
+        """Construct."""
+        self.service = service
+
+    def __getattr__(self, name: str) -> object:
+        """Get the attribute of the service, tracking the stage methods."""
+        attr = getattr(self.service, name)
+        if name not in self.tracked:
+            return attr
+
+        state = self.tracked[name]
+
+        def track(identity: Identity, cms_id: CampusOnlineID, *args: object) -> object:
+            start = perf_counter()
+            result = attr(identity, cms_id, *args)
+            advance(cms_id, state, stage=name, seconds=perf_counter() - start)
+            return result
+
+        return track
+
+
+def fetch_ids_to_import(
+    cms_service: CampusOnlineRESTService,
+    identity: Identity,
+    theses_filter: ThesesFilter | PartitionedThesesFilter,
+    *,
+    incremental: bool = False,
+) -> tuple[list[CampusOnlineID], dict[CampusOnlineID, str] | None]:
+    """Fetch the ids to import.
+
+    In the incremental mode only the ids of new or changed theses are
+    returned together with their fingerprints, which are recorded after the
+    successful import.
+    """
+    if not incremental:
+        return cms_service.fetch_all_ids(identity, theses_filter), None
+
+    fingerprints = cms_service.fetch_fingerprints(identity, theses_filter)
+    changed = filter_changed(fingerprints)
+    cms_service.release_bulk_metadata(set(fingerprints) - set(changed))
+
+    msg = "campusonline incremental sync: %s of %s theses are new or changed"
+    current_app.logger.info(msg, len(changed), len(fingerprints))
+
+    return list(changed), changed
+
+
+def prepare_import(
+    cms_service: CampusOnlineRESTService,
+    identity: Identity,
+    theses_filter: ThesesFilter | PartitionedThesesFilter,
+    *,
+    incremental: bool = False,
+    ledger: bool = False,
+    resume: bool = False,
+) -> tuple[list[CampusOnlineID], dict[CampusOnlineID, str] | None]:
+    """Get the ids of the import run.
+
+    With resume the unfinished theses of the ledger are imported without
+    fetching the ids again. Otherwise the ids are fetched and recorded in
+    the ledger, if it is enabled.
+    """
+    if resume:
+        ids, fingerprints = unfinished_ids()
+        msg = "campusonline import resumes with %s unfinished theses"
+        current_app.logger.info(msg, len(ids))
+        return ids, fingerprints
+
+    ids, fingerprints = fetch_ids_to_import(
+        cms_service,
+        identity,
+        theses_filter,
+        incremental=incremental,
+    )
+    if ledger:
+        record_fetched(ids, fingerprints)
+    return ids, fingerprints
+
+
+def chunked(
+    ids: Sequence[CampusOnlineID],
+    chunk_size: int,
+) -> list[list[CampusOnlineID]]:
+    """Split the ids into chunks of chunk_size."""
+    return [list(ids[i : i + chunk_size]) for i in range(0, len(ids), chunk_size)]
+
+
+def distribute(chunks: list[list[CampusOnlineID]], lanes: int | None) -> list[list]:
+    """Distribute the chunks round robin onto at most lanes lanes."""
+    lanes = min(lanes, len(chunks)) if lanes else len(chunks)
+    return [chunks[lane::lanes] for lane in range(lanes)]
+
+
+def release_bulk_metadata(
+    cms_service: CampusOnlineRESTService,
+    cms_ids: Iterable[CampusOnlineID] | None = None,
+) -> None:
+    """Release the kept theses of the bulk response after the import."""
+    if isinstance(cms_service, CampusOnlineRESTService):
+        cms_service.release_bulk_metadata(cms_ids)
+
+
+def claimed_by_priority(cms_id: CampusOnlineID) -> bool:
+    """Check whether the thesis is claimed by the priority import."""
+    ttl = current_app.config.get("CAMPUSONLINE_PRIORITY_IMPORT_TTL", 3600)
+    return is_claimed(cms_id, ttl)
+
+
+def import_thesis(
+    import_func: Callable,
+    identity: Identity,
+    cms_id: CampusOnlineID,
+    cms_service: CampusOnlineRESTService,
+    fingerprint: str | None = None,
+    *,
+    metrics: MetricsCollector | None = None,
+    ledger: bool = False,
+    write_back: CampusOnlineStatus | None = None,
+    priority: bool = False,
+) -> ImportOutcome:
+    """Import one thesis and log the outcome.
+
+    If the fingerprint is given, it is recorded after a successful import.
+    The import function is timed as stage import_func. With the ledger the
+    stages of the thesis are recorded in the import ledger, a thesis which
+    is claimed by the priority import is skipped unless priority is set.
+    With write_back the status update of the imported thesis is queued.
+
+    A failure of the import function or of campusonline is logged and the
+    thesis counts as failed. With the ledger any other error is recorded
+    as failure too, so that the thesis can be imported again.
+    """
+    metrics = metrics or MetricsCollector()
+    if ledger and not priority and claimed_by_priority(cms_id):
+        msg = "campusonline cms_id: %s is skipped, it is imported with priority"
+        current_app.logger.info(msg, cms_id)
+        return ImportOutcome.SKIPPED
+
+    if ledger:
+        start_attempt(cms_id)
+        cms_service = LedgerService(cms_service)
+
+    start = perf_counter()
+    try:
+        with metrics.timer("import_func"):
+            draft = import_func(identity, cms_id, cms_service)
+    except (RuntimeError, CampusOnlineRESTError) as e:
+        msg = "ERROR campusonline cms_id: %s couldn't be imported because of %s"
+        current_app.logger.error(msg, cms_id, str(e))
+        if ledger:
+            advance(cms_id, ImportState.FAILED, error=str(e))
+        return ImportOutcome.FAILED
+    except Exception as e:
+        if not ledger:
+            raise
+        msg = "ERROR campusonline cms_id: %s couldn't be imported"
+        current_app.logger.exception(msg, cms_id)
+        db.session.rollback()
+        advance(cms_id, ImportState.FAILED, error=str(e) or type(e).__name__)
+        return ImportOutcome.FAILED
+
+    msg = "campusonline draft.id: %s as been imported successfully"
+    current_app.logger.info(msg, draft.id)
+
+    if fingerprint is not None:
+        mark_imported(cms_id, fingerprint)
+
+    if ledger:
+        seconds = perf_counter() - start
+        advance(cms_id, ImportState.IMPORTED, stage="import_func", seconds=seconds)
+
+    if write_back:
+        enqueue_status([cms_id], write_back)
+
+    return ImportOutcome.IMPORTED
+
+
+def import_theses(
+    import_func: Callable,
+    identity: Identity,
+    ids: Iterable[CampusOnlineID],
+    cms_service: CampusOnlineRESTService,
+    *,
+    concurrency: int = 1,
+    fingerprints: dict[CampusOnlineID, str] | None = None,
+    metrics: MetricsCollector | None = None,
+    ledger: bool = False,
+    write_back: CampusOnlineStatus | None = None,
+    priority: bool = False,
+) -> ImportResult:
+    """Import the theses, with up to concurrency theses at the same time.
+
+    Each thesis is imported within its own application context, so the
+    import function can be run from the worker threads. A failing thesis
+    does not stop the import of the others. With fingerprints the sync
+    state of the successfully imported theses is recorded, with the ledger
+    the progress of each thesis is recorded in the import ledger. The kept
+    theses of the bulk response are released afterwards.
+    """
+    ids = list(ids)
+    fingerprints = fingerprints or {}
+
+    def run(cms_id: CampusOnlineID) -> ImportOutcome:
+        fingerprint = fingerprints.get(cms_id)
+        return import_thesis(
+            import_func,
+            identity,
+            cms_id,
+            cms_service,
+            fingerprint,
+            metrics=metrics,
+            ledger=ledger,
+            write_back=write_back,
+            priority=priority,
+        )
+
+    app = current_app._get_current_object()  # noqa: SLF001
+
+    def run_in_context(cms_id: CampusOnlineID) -> ImportOutcome:
+        with app.app_context():
+            return run(cms_id)
+
+    try:
+        if concurrency <= 1:
+            outcomes = [run(cms_id) for cms_id in ids]
+        else:
+            with ThreadPoolExecutor(concurrency, "campusonline-import") as executor:
+                outcomes = list(executor.map(run_in_context, ids))
+    finally:
+        release_bulk_metadata(cms_service, ids)
+
+    result = ImportResult()
+    for cms_id, outcome in zip(ids, outcomes, strict=True):
+        getattr(result, outcome.value).append(cms_id)
+    return result
+
+
+def import_theses_pipelined(
+    import_func: Callable,
+    identity: Identity,
+    ids: Iterable[CampusOnlineID],
+    cms_service: CampusOnlineRESTService,
+    *,
+    workers: dict[str, int] | None = None,
+    queue_size: int = 64,
+    fingerprints: dict[CampusOnlineID, str] | None = None,
+    metrics: MetricsCollector | None = None,
+    ledger: bool = False,
+    write_back: CampusOnlineStatus | None = None,
+) -> ImportResult:
+    """Import the theses with the staged pipeline.
+
+    The metadata and the file of the next theses are fetched while the
+    import function runs, see ImportPipeline. ids may be a generator, so
+    the import starts with the first received id. With write_back the
+    status is set right after the import, a failed update is queued for
+    the next write-back. With the ledger a thesis claimed by the priority
+    import is skipped before its metadata and file are fetched.
+    """
+    fingerprints = fingerprints or {}
+
+    def import_step(cms_id: CampusOnlineID, service: object) -> ImportOutcome:
+        return import_thesis(
+            import_func,
+            identity,
+            cms_id,
+            service,
+            fingerprints.get(cms_id),
+            metrics=metrics,
+            ledger=ledger,
+        )
+
+    def set_status(cms_id: CampusOnlineID) -> None:
+        date = datetime.now(tz=UTC).replace(tzinfo=None)
+        try:
+            cms_service.set_status(
+                identity,
+                cms_id,
+                write_back,
+                date.strftime("%Y-%m-%dT%H:%M:%S"),
+            )
+        except (RuntimeError, CampusOnlineRESTError):
+            enqueue_status([cms_id], write_back, date)
+        else:
+            advance(cms_id, ImportState.STATUS_SET)
+
+    pipeline = ImportPipeline(
+        cms_service,
+        identity,
+        import_step,
+        write_back=set_status if write_back else None,
+        skip=claimed_by_priority if ledger else None,
+        workers=workers,
+        queue_size=queue_size,
+        metrics=metrics,
+    )
+    try:
+        return pipeline.run(ids)
+    finally:
+        release_bulk_metadata(cms_service)
+
+
+def enqueue_status(
+    cms_ids: Iterable[CampusOnlineID],
+    status: CampusOnlineStatus,
+    date: datetime | None = None,
+) -> None:
+    """Queue the status update of the theses for the write-back.
+
+    A queued update of the same thesis is replaced.
+    """
+    date = date or datetime.now(tz=UTC).replace(tzinfo=None)
+    for cms_id in cms_ids:
+        update = CampusOnlineStatusUpdate(
+            cms_id=cms_id,
+            status=status,
+            date=date,
+            attempts=0,
+            error=None,
+        )
+        db.session.merge(update)
+    db.session.commit()
+
+
+def failed_status_updates() -> dict[CampusOnlineID, str]:
+    """Get the errors of the queued updates which failed before."""
+    query = db.session.query(
+        CampusOnlineStatusUpdate.cms_id,
+        CampusOnlineStatusUpdate.error,
+    ).filter(CampusOnlineStatusUpdate.error.isnot(None))
+    return dict(query.all())
+
+
+def write_back_status(
+    cms_service: CampusOnlineRESTService,
+    identity: Identity,
+    *,
+    concurrency: int = 1,
+    retries: int = 2,
+    max_attempts: int = 5,
+) -> WriteBackResult:
+    """Send the queued status updates to campusonline.
+
+    Up to concurrency updates are sent at the same time, a failed update is
+    retried with backoff up to retries times. Accepted updates are removed
+    from the queue and advance the thesis to status_set in the ledger.
+    Failed updates stay in the queue with their error and are sent again by
+    the next write-back, until they failed max_attempts times.
+    """
+    updates = (
+        db.session.query(CampusOnlineStatusUpdate)
+        .filter(CampusOnlineStatusUpdate.attempts < max_attempts)
+        .order_by(CampusOnlineStatusUpdate.created)
+        .all()
+    )
+    requests = [
+        (update.cms_id, update.status, update.date.strftime("%Y-%m-%dT%H:%M:%S"))
+        for update in updates
+    ]
+    policy = RetryPolicy(retries)
+
+    def send(request: tuple[CampusOnlineID, CampusOnlineStatus, str]) -> str | None:
+        delays = policy.delays()
+        while True:
+            try:
+                cms_service.set_status(identity, *request)
+            except (RuntimeError, CampusOnlineRESTError) as e:
+                if (delay := next(delays, None)) is None:
+                    return str(e)
+                sleep(delay)
+            else:
+                return None
+
+    with ThreadPoolExecutor(max(concurrency, 1), "campusonline-status") as executor:
+        errors = list(executor.map(send, requests))
+
+    result = WriteBackResult()
+    for update, error in zip(updates, errors, strict=True):
+        if error is None:
+            result.updated.append(update.cms_id)
+            db.session.delete(update)
+        else:
+            result.failed[update.cms_id] = error
+            update.attempts += 1
+            update.error = error
+    db.session.commit()
+
+    for cms_id in result.updated:
+        advance(cms_id, ImportState.STATUS_SET)
+
+    return result
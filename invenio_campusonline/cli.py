@@ -7,10 +7,29 @@
 
 """Command line interface to interact with the CampusOnline-Connector module."""
 
-
+import json
+import signal
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict
 from datetime import date as Date
+from datetime import datetime
+from threading import Event
+from time import perf_counter
+from types import FrameType
+from typing import TextIO
 
-from click import STRING, Choice, DateTime, group, option, secho
+from click import (
+    STRING,
+    Choice,
+    DateTime,
+    File,
+    group,
+    option,
+    progressbar,
+    secho,
+)
 from click_params.domain import UrlParamType
 from flask import current_app
 from flask.cli import with_appcontext
@@ -18,9 +37,50 @@ from invenio_access.permissions import system_identity
 from invenio_access.utils import get_identity
 from invenio_accounts import current_accounts
 
+from .api import (
+    chunked,
+    enqueue_status,
+    failed_ids,
+    failed_status_updates,
+    import_progress,
+    import_theses,
+    plan_import,
+    prepare_import,
+    write_back_status,
+)
+from .duplicates import (
+    build_duplicate_index,
+    export_duplicates,
+    find_duplicates,
+    find_duplicates_parallel,
+)
+from .records.api import parse_thesis
 from .services import CampusOnlineRESTService, build_services
-from .types import Color
-from .utils import as_date
+from .types import Color, ImportResult, ImportState
+from .utils import as_date, format_duration, format_size
+
+
+@contextmanager
+def deferred_interrupt() -> Iterator[Event]:
+    """Defer Ctrl-C until the thesis in progress is imported.
+
+    The yielded event is set by the first Ctrl-C, a second Ctrl-C
+    interrupts right away.
+    """
+    interrupted = Event()
+
+    def handle(_: int, __: FrameType | None) -> None:
+        if interrupted.is_set():
+            raise KeyboardInterrupt
+        interrupted.set()
+        msg = "campusonline import stops after the current thesis"
+        secho(msg, fg=Color.warning, err=True)
+
+    previous = signal.signal(signal.SIGINT, handle)
+    try:
+        yield interrupted
+    finally:
+        signal.signal(signal.SIGINT, previous)
 
 
 @group()
@@ -76,21 +136,205 @@ def fetch_ids(
 @option("--endpoint", type=UrlParamType(may_have_port=True))
 @option("--token", type=STRING)
 @option("--user-email", type=STRING, default="cms@tugraz.at")
-def full_sync(cms_service: CampusOnlineRESTService, user_email: str) -> None:
-    """Full sync."""
+@option("--incremental", is_flag=True, default=False)
+@option("--resume", is_flag=True, default=False)
+@option("--only-failed", is_flag=True, default=False)
+@option("--resume-from", type=STRING, default=None)
+@option("--workers", type=int, default=None)
+@option("--chunk-size", type=int, default=100)
+@option("--summary", type=File("w"), default="-")
+@build_services
+def full_sync(
+    cms_service: CampusOnlineRESTService,
+    user_email: str,
+    *,
+    incremental: bool,
+    resume: bool,
+    only_failed: bool,
+    resume_from: str | None,
+    workers: int | None,
+    chunk_size: int,
+    summary: TextIO,
+) -> None:
+    """Full sync.
+
+    With --incremental only new or changed theses are imported. With
+    --resume only the unfinished theses of the import ledger are imported,
+    with --only-failed only the failed ones. --resume-from skips the ids
+    before the given id, e.g. the resume_from of the summary of an
+    interrupted run.
+
+    The theses are imported in chunks of --chunk-size with --workers
+    threads, CAMPUSONLINE_IMPORT_CONCURRENCY by default. The progress is
+    shown on stderr, the summary is written as json to --summary. With one
+    worker Ctrl-C stops the import after the current thesis, a second
+    Ctrl-C stops it right away.
+    """
     import_func = current_app.config["CAMPUSONLINE_IMPORT_FUNC"]
     theses_filter = current_app.config["CAMPUSONLINE_THESES_FILTER"]
+    ledger = current_app.config["CAMPUSONLINE_IMPORT_LEDGER"]
+    write_back = current_app.config["CAMPUSONLINE_WRITE_BACK_STATUS"]
+    workers = workers or current_app.config["CAMPUSONLINE_IMPORT_CONCURRENCY"]
+
+    if (resume or only_failed) and not ledger:
+        msg = "--resume and --only-failed need CAMPUSONLINE_IMPORT_LEDGER"
+        secho(msg, fg=Color.error)
+        return
 
     user = current_accounts.datastore.get_user_by_email(user_email)
     identity = get_identity(user)
-    ids = cms_service.fetch_all_ids(theses_filter)
+    if only_failed:
+        ids, fingerprints = failed_ids()
+    else:
+        ids, fingerprints = prepare_import(
+            cms_service,
+            identity,
+            theses_filter,
+            incremental=incremental,
+            ledger=ledger,
+            resume=resume,
+        )
 
-    for cms_id in ids:
-        try:
-            import_func(identity, cms_id, cms_service)
-        except RuntimeError as e:
-            msg = f"ERROR cms_id: {cms_id} couldn't be imported because of {e}"
-            secho(msg, fg=Color.error)
+    if resume_from is not None:
+        if resume_from not in ids:
+            secho(f"--resume-from {resume_from} is not in the ids", fg=Color.error)
+            return
+        ids = ids[ids.index(resume_from) :]
+
+    cms_service.metrics.reset()
+    result = ImportResult()
+    remaining = chunked(ids, max(chunk_size, 1))
+    start = perf_counter()
+
+    def show(_: object) -> str:
+        rate = len(result) / max(perf_counter() - start, 1e-9)
+        return f"{rate:.1f} theses/s, {len(result.failed)} failed"
+
+    bar = progressbar(
+        length=len(ids),
+        label="campusonline import",
+        show_eta=True,
+        show_pos=True,
+        item_show_func=show,
+        file=sys.stderr,
+    )
+    serial = workers <= 1
+    interruption = deferred_interrupt() if serial else nullcontext(Event())
+    try:
+        with bar, interruption as stop:
+            while remaining and not stop.is_set():
+                batch = remaining[0][:1] if serial else remaining[0]
+                result += import_theses(
+                    import_func,
+                    identity,
+                    batch,
+                    cms_service,
+                    concurrency=workers,
+                    fingerprints=fingerprints,
+                    metrics=cms_service.metrics,
+                    ledger=ledger,
+                    write_back=write_back,
+                )
+                del remaining[0][: len(batch)]
+                if not remaining[0]:
+                    remaining.pop(0)
+                bar.update(len(batch), result)
+        if remaining:
+            secho("campusonline import interrupted", fg=Color.warning, err=True)
+    except KeyboardInterrupt:
+        secho("campusonline import interrupted", fg=Color.warning, err=True)
+    finally:
+        cms_service.release_bulk_metadata()
+
+    seconds = perf_counter() - start
+    result.metrics = cms_service.metrics.snapshot()
+    report = {
+        "total": len(ids),
+        "imported": len(result.imported),
+        "failed": len(result.failed),
+        "skipped": len(result.skipped),
+        "failed_ids": result.failed,
+        "seconds": round(seconds, 3),
+        "theses_per_second": round(len(result) / seconds, 3) if seconds else 0.0,
+        "interrupted": bool(remaining),
+        "resume_from": remaining[0][0] if remaining else None,
+        "metrics": asdict(result.metrics),
+    }
+    json.dump(report, summary, indent=2)
+    summary.write("\n")
+
+
+@campusonline.command()
+@with_appcontext
+@option("--endpoint", type=UrlParamType(may_have_port=True))
+@option("--token", type=STRING)
+@option("--concurrency", type=int, default=8)
+@option("--bandwidth", type=float, default=None, help="MiB/s of the downloads")
+@build_services
+def plan(
+    cms_service: CampusOnlineRESTService,
+    *,
+    concurrency: int,
+    bandwidth: float | None,
+) -> None:
+    """Estimate the import without importing the theses.
+
+    The file url and the file size of each thesis are requested with up to
+    --concurrency requests at the same time. The expected duration is
+    calculated for CAMPUSONLINE_IMPORT_CONCURRENCY from the measured
+    latencies, the transfer time is added if --bandwidth is given.
+    """
+    theses_filter = current_app.config["CAMPUSONLINE_THESES_FILTER"]
+    write_back = current_app.config["CAMPUSONLINE_WRITE_BACK_STATUS"]
+    workers = current_app.config["CAMPUSONLINE_IMPORT_CONCURRENCY"]
+
+    estimate = plan_import(
+        cms_service,
+        system_identity,
+        theses_filter,
+        concurrency=concurrency,
+        write_back=bool(write_back),
+    )
+    bytes_per_second = bandwidth * 1024 * 1024 if bandwidth else None
+    seconds = estimate.estimate(workers, bytes_per_second)
+    unknown = sum(1 for size in estimate.sizes.values() if size is None)
+    requests = ", ".join(f"{k} {v}" for k, v in estimate.requests.items())
+    transfer = "" if bandwidth else ", without the transfer"
+
+    theses = f"{len(estimate.new)} new, {len(estimate.imported)} imported"
+    secho(f"theses:   {len(estimate.ids)} ({theses})", fg=Color.neutral)
+    files = f"{len(estimate.errors)} without file, {unknown} of unknown size"
+    secho(f"files:    {len(estimate.sizes)} ({files})", fg=Color.neutral)
+    secho(f"transfer: {format_size(estimate.total_bytes)}", fg=Color.neutral)
+    total = sum(estimate.requests.values())
+    secho(f"requests: {total} ({requests})", fg=Color.neutral)
+    soap, head = 1000 * estimate.soap_latency, 1000 * estimate.head_latency
+    secho(f"latency:  soap {soap:.0f} ms, head {head:.0f} ms", fg=Color.neutral)
+    duration = f"{format_duration(seconds)} with {workers} threads{transfer}"
+    secho(f"duration: {duration}", fg=Color.neutral)
+
+
+@campusonline.command()
+@with_appcontext
+@option("--no-color", is_flag=True, default=False)
+def progress(*, no_color: bool) -> None:
+    """Show the progress of the import from the import ledger."""
+    if not current_app.config["CAMPUSONLINE_IMPORT_LEDGER"]:
+        secho("progress needs CAMPUSONLINE_IMPORT_LEDGER", fg=Color.error)
+        return
+
+    counts = import_progress()
+    total = sum(counts.values())
+
+    for state, count in counts.items():
+        color = Color.neutral
+        if not no_color and state is ImportState.FAILED and count:
+            color = Color.error
+        elif not no_color and state.finished:
+            color = Color.success
+        secho(f"{state.value:<12} {count:>8}", fg=color)
+
+    secho(f"{'total':<12} {total:>8}", fg=Color.neutral)
 
 
 @campusonline.command()
@@ -98,21 +342,70 @@ def full_sync(cms_service: CampusOnlineRESTService, user_email: str) -> None:
 @option("--endpoint", type=UrlParamType(may_have_port=True), required=True)
 @option("--token", type=STRING, required=True)
 @option("--campusonline-id", type=STRING, default="")
+@option("--mode", type=Choice(["auto", "bulk", "per-id"]), default="auto")
+@option("--concurrency", type=int, default=4)
+@option("--output", type=File("w"), default="-")
+@option("--format", "fmt", type=Choice(["text", "csv", "json"]), default="text")
+@option("--with-reason", is_flag=True, default=False)
 @build_services
-def duplicate_check(cms_service: CampusOnlineRESTService, campusonline_id: str) -> None:
-    """Duplicate check."""
-    duplicate_func = current_app.config["CAMPUSONLINE_DUPLICATE_FUNC"]
+def duplicate_check(
+    cms_service: CampusOnlineRESTService,
+    campusonline_id: str,
+    mode: str,
+    *,
+    concurrency: int,
+    output: TextIO,
+    fmt: str,
+    with_reason: bool,
+) -> None:
+    """Duplicate check.
+
+    The bulk mode checks the theses against an index of the imported ids
+    and of the title and author keys, which is built once with
+    CAMPUSONLINE_DUPLICATE_INDEX_FUNC. The per-id mode runs
+    CAMPUSONLINE_DUPLICATE_FUNC for each id with up to --concurrency
+    threads. The auto mode uses the per-id mode if only
+    CAMPUSONLINE_DUPLICATE_FUNC is configured and the bulk mode otherwise.
+
+    The text format lists the ids of the duplicates, with --with-reason
+    followed by the reason and the duplicated record.
+    """
     theses_filter = current_app.config["CAMPUSONLINE_THESES_FILTER"]
+    duplicate_func = current_app.config.get("CAMPUSONLINE_DUPLICATE_FUNC")
+    index_func = current_app.config.get("CAMPUSONLINE_DUPLICATE_INDEX_FUNC")
 
-    if campusonline_id == "":
-        ids = cms_service.fetch_all_ids(theses_filter)
+    if mode == "auto":
+        mode = "per-id" if duplicate_func and not index_func else "bulk"
+
+    if mode == "bulk":
+        index = build_duplicate_index(index_func)
+        if campusonline_id:
+            theses = [cms_service.get_thesis(system_identity, campusonline_id)]
+        else:
+            theses = (
+                parse_thesis(thesis)
+                for _, thesis in cms_service.iter_all_theses(
+                    system_identity,
+                    theses_filter,
+                )
+            )
+        duplicates = find_duplicates(theses, index)
     else:
-        ids = [campusonline_id]
+        if campusonline_id:
+            ids = [campusonline_id]
+        else:
+            ids = cms_service.fetch_all_ids(system_identity, theses_filter)
+        duplicates = find_duplicates_parallel(ids, duplicate_func, concurrency)
 
-    duplicates = [cms_id for cms_id in ids if duplicate_func(cms_id)]
+    if fmt != "text":
+        export_duplicates(duplicates, output, fmt)
+        return
 
     for duplicate in duplicates:
-        secho(duplicate, fg=Color.neutral)
+        line = duplicate.cms_id
+        if with_reason:
+            line = f"{line} {duplicate.reason} {duplicate.reference}".rstrip()
+        secho(line, fg=Color.neutral, file=output)
 
 
 @campusonline.command()
@@ -149,3 +442,52 @@ def update_status(
     )
     color = Color.success if not no_color else Color.neutral
     secho(f"response: {response}", fg=color)
+
+
+@campusonline.command()
+@with_appcontext
+@option("--endpoint", type=UrlParamType(may_have_port=True))
+@option("--token", type=STRING)
+@option("--campusonline-id", type=STRING, multiple=True)
+@option("--status", type=Choice(["ARCHIVED", "PUBLISHED"], case_sensitive=True))
+@option("--date", type=DateTime(["%Y-%m-%dT%H:%M:%S"]))
+@option("--user-email", type=STRING, default="cms@tugraz.at")
+@option("--no-color", is_flag=True, default=False)
+@build_services
+def write_back(
+    cms_service: CampusOnlineRESTService,
+    campusonline_id: tuple[str, ...],
+    status: str | None,
+    date: datetime | None,
+    user_email: str,
+    *,
+    no_color: bool,
+) -> None:
+    """Send the queued status updates to campusonline.
+
+    With --campusonline-id and --status the updates of these theses are
+    queued first. All updates which still fail are listed at the end.
+    """
+    if campusonline_id and not status:
+        secho("--campusonline-id needs --status", fg=Color.error)
+        return
+
+    if campusonline_id:
+        enqueue_status(campusonline_id, status, date)
+
+    user = current_accounts.datastore.get_user_by_email(user_email)
+    identity = get_identity(user)
+    result = write_back_status(
+        cms_service,
+        identity,
+        concurrency=current_app.config["CAMPUSONLINE_WRITE_BACK_CONCURRENCY"],
+        retries=current_app.config["CAMPUSONLINE_WRITE_BACK_RETRIES"],
+        max_attempts=current_app.config["CAMPUSONLINE_WRITE_BACK_MAX_ATTEMPTS"],
+    )
+
+    color = Color.success if not no_color else Color.neutral
+    secho(f"updated: {len(result.updated)}", fg=color)
+
+    color = Color.error if not no_color else Color.neutral
+    for cms_id, error in failed_status_updates().items():
+        secho(f"failed: {cms_id} {error}", fg=color)
@@ -17,9 +17,340 @@ CAMPUSONLINE_TOKEN = ""
 CAMPUSONLINE_USER_EMAIL = ""
 """This is the email adress of the campusonline user in the repository."""
 
+CAMPUSONLINE_CLIENT = "sync"
+"""Http client of the requests to campusonline.
+
+sync sends the requests with requests. async sends them with httpx on an
+event loop, which is started in each process on the first request, see
+SyncCampusOnlineAPI. The async client needs invenio-campusonline[async].
+"""
+
+CAMPUSONLINE_POOL_CONNECTIONS = 10
+"""Number of per host connection pools kept by the http session."""
+
+CAMPUSONLINE_POOL_MAXSIZE = 10
+"""Maximum number of keep-alive connections per host.
+
+This should be at least as high as the number of threads using the session
+at the same time, otherwise connections will be discarded after use.
+"""
+
+CAMPUSONLINE_POOL_BLOCK = False
+"""Block until a connection is free if the pool of a host is exhausted."""
+
+CAMPUSONLINE_KEEP_ALIVE = True
+"""Reuse connections between requests to the campusonline endpoint."""
+
+CAMPUSONLINE_CACHE = None
+"""Cache for the metadata and file url responses.
+
+Possible values are None (no cache), "lru" (a cache within each process)
+and "redis" (a cache shared by all processes). The responses are cached
+per SOAP service and campusonline id.
+"""
+
+CAMPUSONLINE_CACHE_TTL = 300
+"""Seconds a cached response is valid."""
+
+CAMPUSONLINE_CACHE_MAX_ENTRIES = 1024
+"""Maximum number of cached responses, the least recently used are evicted."""
+
+CAMPUSONLINE_CACHE_REDIS_URL = None
+"""Url of the redis server of the redis cache, defaults to CACHE_REDIS_URL."""
+
+CAMPUSONLINE_DOWNLOAD_DIR = None
+"""Directory where the downloaded files are stored.
+
+Defaults to invenio-campusonline in the temporary directory of the system.
+The files are stored by their checksum and reused as long as etag and size
+of the file on campusonline do not change.
+"""
+
+CAMPUSONLINE_DOWNLOAD_QUOTA = 10 * 1024**3
+"""Maximum size in bytes of the download directory.
+
+The least recently used files are removed, if the store grows above.
+"""
+
+CAMPUSONLINE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+"""Size in bytes of the chunks in which the files are downloaded."""
+
+CAMPUSONLINE_DOWNLOAD_CONNECT_TIMEOUT = 10
+"""Seconds to wait for the connection to the file server."""
+
+CAMPUSONLINE_DOWNLOAD_READ_TIMEOUT = 60
+"""Seconds to wait for the next chunk of a downloaded file.
+
+The timeout applies to every chunk, not to the whole download, so that
+large files are not aborted as long as data arrives.
+"""
+
+CAMPUSONLINE_DOWNLOAD_RETRIES = 3
+"""How often an interrupted download is resumed before the import fails.
+
+The download is resumed with a range request from the end of the already
+downloaded part. The partial file is kept after the last attempt, so the
+next import continues where the previous stopped.
+"""
+
+CAMPUSONLINE_RETRIES = 3
+"""How often a failed request to campusonline is retried.
+
+Connection errors, timeouts and 502, 503 and 504 responses are retried for
+the idempotent requests: ids, metadata and file url. setThesisStatusByID is
+never retried, to not set a status twice.
+"""
+
+CAMPUSONLINE_RETRY_BACKOFF = 0.5
+"""Base in seconds of the exponential backoff between the retries.
+
+The delay before the n-th retry is a random value between 0 and
+CAMPUSONLINE_RETRY_BACKOFF * 2**n.
+"""
+
+CAMPUSONLINE_RETRY_MAX_BACKOFF = 30
+"""Upper bound in seconds of the backoff between the retries."""
+
+CAMPUSONLINE_CIRCUIT_BREAKER_THRESHOLD = 5
+"""Consecutive failed requests after which the circuit breaker opens.
+
+While the circuit breaker is open all requests fail immediately, so that
+an import stops fast if campusonline is down.
+"""
+
+CAMPUSONLINE_CIRCUIT_BREAKER_RESET_TIMEOUT = 60
+"""Seconds after which an open circuit breaker lets a trial request pass."""
+
+CAMPUSONLINE_RATE_LIMIT = None
+"""Maximum number of soap requests per second sent to campusonline.
+
+The soap requests are the ids, metadata, file url and status requests.
+None does not limit the requests.
+"""
+
+CAMPUSONLINE_RATE_LIMIT_BURST = 1
+"""Number of soap requests which may be sent at once after a quiet period."""
+
+CAMPUSONLINE_DOWNLOAD_RATE_LIMIT = None
+"""Maximum number of file downloads per second started from campusonline.
+
+The downloads have their own budget, so that large files do not use up
+the budget of the metadata requests. None does not limit the downloads.
+"""
+
+CAMPUSONLINE_DOWNLOAD_RATE_LIMIT_BURST = 1
+"""Number of file downloads which may be started at once."""
+
+CAMPUSONLINE_RATE_LIMIT_BACKEND = "local"
+"""Backend of the rate limiters.
+
+local limits the requests of each process with a token bucket. redis
+limits the requests of all celery workers together with a token bucket on
+the redis server of CAMPUSONLINE_RATE_LIMIT_REDIS_URL, which needs redis 5
+or later.
+"""
+
+CAMPUSONLINE_RATE_LIMIT_REDIS_URL = None
+"""Redis url of the shared rate limiters, defaults to CACHE_REDIS_URL."""
+
+CAMPUSONLINE_XML_BACKEND = "stdlib"
+"""Xml backend which parses the responses of campusonline.
+
+stdlib uses xml.etree.ElementTree of the standard library. lxml parses the
+responses faster, but the import and duplicate functions get lxml elements
+instead of ElementTree elements, only switch to it if they can handle
+them. auto uses lxml if it is installed and falls back to the standard
+library.
+"""
+
+CAMPUSONLINE_METRICS = "memory"
+"""Collector of the timings of the import stages.
+
+Possible values are None (nothing is collected), "memory" (the metrics are
+collected within each process) and "statsd" (the metrics are additionally
+sent to a statsd server). The time of fetch_ids, get_metadata,
+get_file_url, download, set_status and CAMPUSONLINE_IMPORT_FUNC is
+collected together with the bytes transferred, the retries, the cache hits
+and the errors per stage. The summary is logged at the end of each import.
+"""
+
+CAMPUSONLINE_METRICS_STATSD_HOST = "localhost"
+"""Host of the statsd server."""
+
+CAMPUSONLINE_METRICS_STATSD_PORT = 8125
+"""Port of the statsd server."""
+
+CAMPUSONLINE_METRICS_PREFIX = "campusonline"
+"""Prefix of the metric names sent to statsd."""
+
+CAMPUSONLINE_REUSE_BULK_METADATA = False
+"""Reuse the metadata of the getAllThesesMetadata response.
+
+If set, the theses of the bulk response are kept after fetching the ids
+and CampusOnlineRESTService.get_metadata returns them instead of sending a
+getMetadataByThesisID request, as long as they contain all
+CAMPUSONLINE_REQUIRED_METACLASSES and CAMPUSONLINE_REQUIRED_ATTRS. The
+theses filter has to request the necessary attributes. The theses are kept
+until they are imported or the import run ends.
+"""
+
+CAMPUSONLINE_REQUIRED_METACLASSES = {
+    "AUTHOR": ("FNLN",),
+    "SUPERVISOR": ("FNLN",),
+    "TEXT": ("ORIG", "TIT"),
+}
+"""Metaclasses a thesis of the bulk response needs to be reused.
+
+Maps the name of each metaclass to the attributes every object of it needs.
+A list of names is accepted too and requires no attributes.
+"""
+
+CAMPUSONLINE_REQUIRED_ATTRS = ("TYPKB", "OLANG", "SPVON", "SPBIS", "VOLLTEXT")
+"""Attributes a thesis of the bulk response needs to be reused."""
+
+CAMPUSONLINE_IMPORT_CONCURRENCY = 1
+"""Number of theses which are imported at the same time.
+
+With a value greater than 1 the import task runs the metadata fetch, the
+file download and the CAMPUSONLINE_IMPORT_FUNC of several theses in
+parallel threads. Keep CAMPUSONLINE_POOL_MAXSIZE at least as high.
+"""
+
+CAMPUSONLINE_INCREMENTAL_SYNC = False
+"""Import only new or changed theses.
+
+The fingerprint of the metadata of each successfully imported thesis is
+stored in the database. Theses which have the same fingerprint in the
+getAllThesesMetadata response are skipped on the next run.
+"""
+
+CAMPUSONLINE_IMPORT_LEDGER = False
+"""Record the progress of each thesis in the import ledger.
+
+Every fetched id is recorded in the campusonline_import_ledger table and
+advances through the states fetched, metadata, downloaded, imported and
+status_set, or ends as failed. The attempts, the error and the time of each
+stage are recorded too. An interrupted import is continued with
+``invenio campusonline full-sync --resume`` or the resume argument of the
+import task, the progress is shown by ``invenio campusonline progress``.
+
+The ledger is disabled by default. To enable it, create the tables of the
+campusonline alembic branch first with ``invenio alembic upgrade`` and set
+this variable to True. Without the ledger the imports work as before, but
+``--resume``, ``--only-failed``, ``invenio campusonline progress`` and the
+skipping of theses claimed by a priority import are not available.
+"""
+
+CAMPUSONLINE_IMPORT_CHUNK_SIZE = None
+"""Number of theses per import subtask.
+
+If set, the import task splits the ids into chunks which are imported by
+`invenio_campusonline.tasks.import_theses_chunk` subtasks, so the import is
+spread over all celery workers. A result backend is necessary, because the
+subtasks are combined by a chord. The rate of the chunks per worker can be
+limited with the standard celery task annotations:
+
+.. code-block:: python
+
+    CELERY_TASK_ANNOTATIONS = {
+        "invenio_campusonline.tasks.import_theses_chunk": {"rate_limit": "10/m"},
+    }
+"""
+
+CAMPUSONLINE_IMPORT_PIPELINE = False
+"""Import the theses with the staged pipeline.
+
+If set, the import task streams the ids and fetches the metadata and the
+files of the next theses while CAMPUSONLINE_IMPORT_FUNC runs. It is used
+by imports without chunks, the ids of incremental and resumed imports
+are still fetched completely first.
+"""
+
+CAMPUSONLINE_PIPELINE_WORKERS = {
+    "check": 1,
+    "metadata": 4,
+    "download": 4,
+    "import": 2,
+    "write_back": 2,
+}
+"""Number of threads of each stage of the import pipeline."""
+
+CAMPUSONLINE_PIPELINE_QUEUE_SIZE = 64
+"""Theses which wait at most between two stages of the import pipeline."""
+
+CAMPUSONLINE_IMPORT_PARALLELISM = None
+"""Maximum number of import subtasks running at the same time.
+
+Leave it empty to run all chunks at once.
+"""
+
+CAMPUSONLINE_PRIORITY_IMPORT_QUEUE = None
+"""Celery queue of the priority import.
+
+Route the priority import to a queue of its own with a dedicated worker,
+so it never waits behind the chunks of a bulk import. Leave it empty to
+use the default queue, where the task is sent with
+CAMPUSONLINE_PRIORITY_IMPORT_PRIORITY.
+"""
+
+CAMPUSONLINE_PRIORITY_IMPORT_PRIORITY = 9
+"""Celery priority of the priority import, 9 is the highest."""
+
+CAMPUSONLINE_PRIORITY_IMPORT_TTL = 3600
+"""Seconds after which the claim of a priority import is outdated.
+
+A priority import claims its theses until it finished, the claim is only
+left over if the worker crashed.
+"""
+
+CAMPUSONLINE_DUPLICATE_INDEX_FUNC = None
+"""Function providing the records of the repository for the duplicate check.
+
+It is called without arguments and returns an iterable of (record id,
+campusonline id, title, authors) tuples, e.g. from one scan over the search
+index. ``invenio campusonline duplicate-check`` indexes them together with
+the ids of the imported theses and checks all theses against this index.
+The campusonline id may be None, the authors are "last name, first name".
+If it is None and CAMPUSONLINE_DUPLICATE_FUNC is set, the duplicate check
+runs CAMPUSONLINE_DUPLICATE_FUNC per id as before.
+"""
+
+CAMPUSONLINE_WRITE_BACK_STATUS = None
+"""Status written back to campusonline after a thesis is imported.
+
+Possible values are None (no write-back), "ARCHIVED" and "PUBLISHED". The
+status updates of the imported theses are queued in the
+campusonline_status_update table and sent by the
+`invenio_campusonline.tasks.write_back_status_to_campusonline` task after
+the import, or by ``invenio campusonline write-back``. Updates which fail
+stay in the queue until the next write-back.
+"""
+
+CAMPUSONLINE_WRITE_BACK_CONCURRENCY = 4
+"""Number of status updates which are sent at the same time."""
+
+CAMPUSONLINE_WRITE_BACK_RETRIES = 2
+"""Retries with backoff of a failed status update within one write-back."""
+
+CAMPUSONLINE_WRITE_BACK_MAX_ATTEMPTS = 5
+"""Write-backs after which a failing status update is not sent anymore."""
 
 CAMPUSONLINE_THESES_FILTER = None
-"""This filter provides the possibiliy to set filters for the fetched theses."""
+"""This filter provides the possibiliy to set filters for the fetched theses.
+
+A PartitionedThesesFilter splits a wide filter into partitions, e.g. date
+windows or organisational units, which are requested separately:
+
+    CAMPUSONLINE_THESES_FILTER = PartitionedThesesFilter.by_date_windows(
+        "<bas:from>{start}</bas:from><bas:to>{end}</bas:to>",
+        date(2015, 1, 1),
+        date(2024, 12, 31),
+        days=365,
+    )
+"""
+
+CAMPUSONLINE_PARTITION_CONCURRENCY = 4
+"""Partitions of a PartitionedThesesFilter which are fetched at the same time."""
 
 
 CAMPUSONLINE_CELERY_BEAT_SCHEDULE = {}
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Duplicate check of the campusonline theses.
+
+The bulk check builds an index of the already imported campusonline ids
+and of the normalized title and author keys in one pass and checks each
+thesis with a lookup. The parallel check runs CAMPUSONLINE_DUPLICATE_FUNC
+per id in a thread pool, for duplicate functions which can't be expressed
+by the index.
+"""
+
+import csv
+import json
+import re
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import TextIO
+from unicodedata import combining, normalize
+
+from flask import current_app
+from invenio_db import db
+
+from .models import CampusOnlineImportLedger, CampusOnlineSyncState
+from .types import CampusOnlineID, Duplicate, ImportState, Thesis
+
+IndexedRecord = tuple[str, CampusOnlineID | None, str | None, list[str]]
+"""Record of the repository as (record id, campusonline id, title, authors)."""
+
+NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize the text to lower case letters and digits without accents."""
+    decomposed = normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not combining(c))
+    return NON_ALNUM.sub(" ", stripped).strip()
+
+
+def duplicate_key(title: str | None, authors: Iterable[str]) -> str | None:
+    """Build the key of the normalized title and the first author."""
+    if not title:
+        return None
+    first_author = next(iter(authors), "")
+    return f"{normalize_text(title)}|{normalize_text(first_author)}"
+
+
+class DuplicateIndex:
+    """Index of the campusonline ids and the title and author keys."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.ids: dict[CampusOnlineID, str] = {}
+        self.keys: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        """Count the indexed ids and keys."""
+        return len(self.ids) + len(self.keys)
+
+    def add(
+        self,
+        reference: str,
+        cms_id: CampusOnlineID | None = None,
+        title: str | None = None,
+        authors: Iterable[str] = (),
+    ) -> None:
+        """Add the record to the index, reference is reported on a match."""
+        if cms_id:
+            self.ids.setdefault(cms_id, reference)
+        if key := duplicate_key(title, authors):
+            self.keys.setdefault(key, reference)
+
+    def match(self, thesis: Thesis) -> Duplicate | None:
+        """Find the indexed record the thesis duplicates."""
+        if (reference := self.ids.get(thesis.cms_id)) is not None:
+            return Duplicate(thesis.cms_id, "cms_id", reference)
+
+        key = duplicate_key(thesis.title, thesis.authors)
+        if key and (reference := self.keys.get(key)) is not None:
+            return Duplicate(thesis.cms_id, "title_author", reference)
+
+        return None
+
+
+def build_duplicate_index(
+    index_func: Callable[[], Iterable[IndexedRecord]] | None = None,
+) -> DuplicateIndex:
+    """Build the index of the imported theses.
+
+    The ids of the sync state and of the finished theses of the import
+    ledger are indexed. index_func adds the records of the repository, e.g.
+    from one scan over the search index.
+    """
+    index = DuplicateIndex()
+
+    for (cms_id,) in db.session.query(CampusOnlineSyncState.cms_id):
+        index.add(f"sync_state:{cms_id}", cms_id)
+
+    finished = [state.value for state in ImportState if state.finished]
+    ledger = db.session.query(CampusOnlineImportLedger.cms_id).filter(
+        CampusOnlineImportLedger.state.in_(finished),
+    )
+    for (cms_id,) in ledger:
+        index.add(f"ledger:{cms_id}", cms_id)
+
+    for record_id, cms_id, title, authors in index_func() if index_func else ():
+        index.add(record_id, cms_id, title, authors)
+
+    return index
+
+
+def find_duplicates(theses: Iterable[Thesis], index: DuplicateIndex) -> list[Duplicate]:
+    """Check the theses against the index.
+
+    Each checked thesis is added to the index, so that theses occurring
+    twice in the response are found too.
+    """
+    duplicates = []
+    for thesis in theses:
+        if duplicate := index.match(thesis):
+            duplicates.append(duplicate)
+        else:
+            reference = f"campusonline:{thesis.cms_id}"
+            index.add(reference, None, thesis.title, thesis.authors)
+    return duplicates
+
+
+def find_duplicates_parallel(
+    ids: Iterable[CampusOnlineID],
+    duplicate_func: Callable[[CampusOnlineID], bool],
+    concurrency: int = 4,
+) -> list[Duplicate]:
+    """Run the duplicate function for each id in a thread pool.
+
+    Each call runs within its own application context, so the duplicate
+    function can use the search and the database.
+    """
+    app = current_app._get_current_object()  # noqa: SLF001
+
+    def check(cms_id: CampusOnlineID) -> bool:
+        with app.app_context():
+            return bool(duplicate_func(cms_id))
+
+    ids = list(ids)
+    with ThreadPoolExecutor(max(concurrency, 1), "campusonline-dup") as executor:
+        found = list(executor.map(check, ids))
+
+    return [
+        Duplicate(cms_id, "duplicate_func", "")
+        for cms_id, is_duplicate in zip(ids, found, strict=True)
+        if is_duplicate
+    ]
+
+
+def export_duplicates(duplicates: list[Duplicate], fp: TextIO, fmt: str) -> None:
+    """Write the duplicates as csv or json."""
+    rows = [asdict(duplicate) for duplicate in duplicates]
+
+    if fmt == "json":
+        json.dump(rows, fp, indent=2)
+        return
+
+    writer = csv.DictWriter(fp, fieldnames=["cms_id", "reason", "reference"])
+    writer.writeheader()
+    writer.writerows(rows)
@@ -10,6 +10,7 @@
 
 from flask import Flask
 
+from . import config
 from .services import CampusOnlineRESTService, CampusOnlineRESTServiceConfig
 
 
@@ -23,12 +24,17 @@ class InvenioCampusonline:
 
     def init_app(self, app: Flask) -> None:
         """Flask application initialization."""
+        self.init_config(app)
         self.init_services(app)
         app.extensions["invenio-campusonline"] = self
 
+    def init_config(self, app: Flask) -> None:
+        """Initialize configuration."""
+        for k in dir(config):
+            if k.startswith("CAMPUSONLINE_"):
+                app.config.setdefault(k, getattr(config, k))
+
     def init_services(self, app: Flask) -> None:
         """Initialize services."""
-        endpoint = app.config.get("CAMPUSONLINE_ENDPOINT", "")
-        token = app.config.get("CAMPUSONLINE_TOKEN", "")
-        config = CampusOnlineRESTServiceConfig(endpoint, token)
+        config = CampusOnlineRESTServiceConfig.build(app.config)
         self.campusonline_rest_service = CampusOnlineRESTService(config)
@@ -8,11 +8,49 @@
 
 """Jobs for invenio-campusonline."""
 
-from invenio_jobs.jobs import JobType
+from datetime import datetime
+
+from invenio_jobs.jobs import JobType, PredefinedArgsSchema
+from invenio_jobs.models import Job
+from marshmallow import fields, validate
 
 from .tasks import import_theses_from_campusonline
 
 
+class ImportThesesArgsSchema(PredefinedArgsSchema):
+    """Arguments of the import theses job."""
+
+    chunk_size = fields.Integer(
+        allow_none=True,
+        validate=validate.Range(min=1),
+        metadata={
+            "description": "Number of theses per subtask. "
+            "Leave empty to import all theses within one task.",
+        },
+    )
+    parallelism = fields.Integer(
+        allow_none=True,
+        validate=validate.Range(min=1),
+        metadata={
+            "description": "Maximum number of subtasks running at the same time.",
+        },
+    )
+    incremental = fields.Boolean(
+        allow_none=True,
+        metadata={
+            "description": "Import only new or changed theses. "
+            "Leave empty to use CAMPUSONLINE_INCREMENTAL_SYNC.",
+        },
+    )
+    resume = fields.Boolean(
+        load_default=False,
+        metadata={
+            "description": "Import only the unfinished theses of the import "
+            "ledger instead of fetching the ids again.",
+        },
+    )
+
+
 class ImportThesesFromCampusonlineJob(JobType):
     """Import theses from campusonline."""
 
@@ -21,3 +59,24 @@ class ImportThesesFromCampusonlineJob(JobType):
     description = "Import theses from campusonline"
 
     task = import_theses_from_campusonline
+    arguments_schema = ImportThesesArgsSchema
+
+    @classmethod
+    def build_task_arguments(
+        cls,
+        job_obj: Job,  # noqa: ARG003
+        since: datetime | None = None,  # noqa: ARG003
+        chunk_size: int | None = None,
+        parallelism: int | None = None,
+        *,
+        incremental: bool | None = None,
+        resume: bool = False,
+        **__: dict,
+    ) -> dict:
+        """Build the arguments of the import task."""
+        return {
+            "chunk_size": chunk_size,
+            "parallelism": parallelism,
+            "incremental": incremental,
+            "resume": resume,
+        }
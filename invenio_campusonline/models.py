@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Database models."""
+
+from invenio_db import db
+from sqlalchemy_utils.models import Timestamp
+
+
+class CampusOnlineSyncState(db.Model, Timestamp):
+    """Sync state of an imported thesis.
+
+    The fingerprint is calculated over the metadata of the thesis in the
+    getAllThesesMetadata response at the time of the successful import.
+    """
+
+    __tablename__ = "campusonline_sync_state"
+
+    cms_id = db.Column(db.String(255), primary_key=True)
+    """The campusonline id of the thesis."""
+
+    fingerprint = db.Column(db.String(64), nullable=False)
+    """The sha256 fingerprint of the imported metadata."""
+
+
+class CampusOnlineImportLedger(db.Model, Timestamp):
+    """Import state of a thesis.
+
+    Every id of an import run is recorded as fetched and advances through
+    the states of ImportState, so that an interrupted run can be resumed
+    with the unfinished theses.
+    """
+
+    __tablename__ = "campusonline_import_ledger"
+
+    cms_id = db.Column(db.String(255), primary_key=True)
+    """The campusonline id of the thesis."""
+
+    state = db.Column(db.String(16), nullable=False, index=True)
+    """The value of the ImportState of the thesis."""
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    """The number of import attempts."""
+
+    fingerprint = db.Column(db.String(64), nullable=True)
+    """The fingerprint of the incremental sync, recorded after the import."""
+
+    timings = db.Column(db.JSON, nullable=False, default=dict)
+    """The seconds spent in each stage of the last attempt."""
+
+    error = db.Column(db.Text, nullable=True)
+    """The error of the last failed attempt."""
+
+
+class CampusOnlineStatusUpdate(db.Model, Timestamp):
+    """Outstanding status update of a thesis on campusonline.
+
+    The table is the durable queue of the status write-back. A row is
+    removed after campusonline accepted the status, failed updates stay
+    with their error until they succeed or exceed the maximum attempts.
+    """
+
+    __tablename__ = "campusonline_status_update"
+
+    cms_id = db.Column(db.String(255), primary_key=True)
+    """The campusonline id of the thesis."""
+
+    status = db.Column(db.String(16), nullable=False)
+    """The status to set, ARCHIVED or PUBLISHED."""
+
+    date = db.Column(db.DateTime, nullable=False)
+    """The date of the status."""
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    """The number of failed write-back attempts."""
+
+    error = db.Column(db.Text, nullable=True)
+    """The error of the last failed attempt."""
+
+
+class CampusOnlinePriorityImport(db.Model, Timestamp):
+    """Thesis which is queued for an import with priority.
+
+    A row is the claim of the priority import on the thesis from the
+    request until the import finished, requests of a claimed thesis are
+    coalesced and the other imports skip it.
+    """
+
+    __tablename__ = "campusonline_priority_import"
+
+    cms_id = db.Column(db.String(255), primary_key=True)
+    """The campusonline id of the thesis."""
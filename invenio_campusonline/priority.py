@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Claims of the priority import.
+
+A request of a priority import claims the theses before the import task is
+sent. A thesis which is claimed or which is imported by a bulk import right
+now is not claimed again, so the same thesis is not imported twice at the
+same time. The claim is released after the import, a claim older than the
+ttl is treated as left over from a crashed worker.
+"""
+
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+
+from invenio_db import db
+from sqlalchemy.exc import IntegrityError
+
+from .models import CampusOnlineImportLedger, CampusOnlinePriorityImport
+from .types import CampusOnlineID, ImportState
+
+PRIORITY_TASK = "invenio_campusonline.tasks.import_theses_priority"
+"""Name of the celery task of the priority import."""
+
+IMPORTING = (ImportState.METADATA.value, ImportState.DOWNLOADED.value)
+"""States of the ledger of a thesis while it is imported."""
+
+
+def expired_before(ttl: int) -> datetime:
+    """Get the time before which a claim or an import is outdated."""
+    return datetime.now(tz=UTC).replace(tzinfo=None) - timedelta(seconds=ttl)
+
+
+def in_flight(cms_ids: list[CampusOnlineID], ttl: int) -> set[CampusOnlineID]:
+    """Get the ids which are claimed or imported by a bulk import right now."""
+    since = expired_before(ttl)
+    claimed = db.session.query(CampusOnlinePriorityImport.cms_id).filter(
+        CampusOnlinePriorityImport.cms_id.in_(cms_ids),
+        CampusOnlinePriorityImport.created >= since,
+    )
+    importing = db.session.query(CampusOnlineImportLedger.cms_id).filter(
+        CampusOnlineImportLedger.cms_id.in_(cms_ids),
+        CampusOnlineImportLedger.state.in_(IMPORTING),
+        CampusOnlineImportLedger.updated >= since,
+    )
+    return {cms_id for (cms_id,) in claimed.union(importing)}
+
+
+def claim_priority(
+    cms_ids: Iterable[CampusOnlineID],
+    ttl: int = 3600,
+) -> list[CampusOnlineID]:
+    """Claim the theses for the priority import.
+
+    Returns the claimed ids, the ids which are already in flight are left
+    out. A claim which another request inserted at the same time is left
+    out too.
+    """
+    cms_ids = list(dict.fromkeys(cms_ids))
+    db.session.query(CampusOnlinePriorityImport).filter(
+        CampusOnlinePriorityImport.cms_id.in_(cms_ids),
+        CampusOnlinePriorityImport.created < expired_before(ttl),
+    ).delete(synchronize_session=False)
+
+    busy = in_flight(cms_ids, ttl)
+    claimed = []
+    for cms_id in cms_ids:
+        if cms_id in busy:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(CampusOnlinePriorityImport(cms_id=cms_id))
+        except IntegrityError:
+            continue
+        claimed.append(cms_id)
+
+    db.session.commit()
+    return claimed
+
+
+def is_claimed(cms_id: CampusOnlineID, ttl: int = 3600) -> bool:
+    """Check whether the thesis is claimed by the priority import."""
+    query = db.session.query(CampusOnlinePriorityImport.cms_id).filter(
+        CampusOnlinePriorityImport.cms_id == cms_id,
+        CampusOnlinePriorityImport.created >= expired_before(ttl),
+    )
+    return db.session.query(query.exists()).scalar()
+
+
+def release_priority(cms_ids: Iterable[CampusOnlineID]) -> None:
+    """Release the claims after the priority import."""
+    db.session.query(CampusOnlinePriorityImport).filter(
+        CampusOnlinePriorityImport.cms_id.in_(list(cms_ids)),
+    ).delete(synchronize_session=False)
+    db.session.commit()
@@ -8,12 +8,16 @@
 
 """Records."""
 
+from .aio import AsyncCampusOnlineAPI, AsyncCampusOnlineConnection, SyncCampusOnlineAPI
 from .api import CampusOnlineAPI
 from .config import CampusOnlineRESTConfig
 from .models import CampusOnlineConnection
 
 __all__ = (
+    "AsyncCampusOnlineAPI",
+    "AsyncCampusOnlineConnection",
     "CampusOnlineAPI",
     "CampusOnlineConnection",
     "CampusOnlineRESTConfig",
+    "SyncCampusOnlineAPI",
 )
@@ -0,0 +1,624 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Asyncio based client.
+
+The async client needs httpx, install it with
+``pip install invenio-campusonline[async]``.
+"""
+
+from asyncio import (
+    AbstractEventLoop,
+    Semaphore,
+    gather,
+    new_event_loop,
+    run_coroutine_threadsafe,
+    sleep,
+    to_thread,
+)
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from datetime import date as Date
+from http import HTTPStatus
+from os import getpid
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any
+from xml.etree.ElementTree import Element
+
+from ..types import (
+    URL,
+    CampusOnlineID,
+    CampusOnlineStatus,
+    ConnectionStats,
+    FilePath,
+    PartitionedThesesFilter,
+    ThesesFilter,
+    Thesis,
+)
+from .api import (
+    ThesesStreamParser,
+    fingerprint,
+    parse_file_url,
+    parse_metadata,
+    parse_status,
+    parse_thesis,
+)
+from .config import CampusOnlineRESTConfig
+from .metrics import stage_of
+from .models import BaseCampusOnlineConnection, CampusOnlineRESTError
+from .resilience import RETRY_STATUS
+from .storage import (
+    PendingFile,
+    content_length,
+    resume_headers,
+)
+
+try:
+    from httpx import (
+        AsyncClient,
+        HTTPError,
+        InvalidURL,
+        Limits,
+        Response,
+        Timeout,
+        TransportError,
+    )
+except ImportError:
+    AsyncClient = None
+
+
+class AsyncCampusOnlineConnection(BaseCampusOnlineConnection):
+    """Asyncio campusonline connection.
+
+    The steps which do not wait for the network are shared with
+    CampusOnlineConnection, see BaseCampusOnlineConnection.
+    """
+
+    def __init__(self, config: CampusOnlineRESTConfig) -> None:
+        """Construct."""
+        if AsyncClient is None:
+            msg = "the async client needs httpx, install invenio-campusonline[async]"
+            raise RuntimeError(msg)
+
+        super().__init__(config)
+        self.client = self.create_client()
+        self.requests = 0
+        self.connections = 0
+
+    def create_client(self) -> "AsyncClient":
+        """Create the http client with the connection limits of the config."""
+        keepalive = self.config.pool_maxsize if self.config.keep_alive else 0
+        limits = Limits(
+            max_connections=self.config.pool_maxsize,
+            max_keepalive_connections=keepalive,
+        )
+        return AsyncClient(limits=limits, timeout=10)
+
+    @property
+    def stats(self) -> ConnectionStats:
+        """Get the connection reuse statistics of the client."""
+        return ConnectionStats(self.requests, self.requests - self.connections)
+
+    async def trace(self, event_name: str, _: dict) -> None:
+        """Count the requests and newly opened connections."""
+        if event_name == "http11.send_request_headers.started":
+            self.requests += 1
+        elif event_name == "connection.connect_tcp.complete":
+            self.connections += 1
+
+    async def aclose(self) -> None:
+        """Close the client and all pooled connections."""
+        await self.client.aclose()
+
+    def reset_client(self) -> None:
+        """Replace the client, e.g. in a forked process.
+
+        The pooled connections of the old client are not closed, they may
+        still be used by the parent process.
+        """
+        self.client = self.create_client()
+
+    async def send(
+        self,
+        data: bytes,
+        headers: dict[str, str],
+        *,
+        idempotent: bool = True,
+        stream: bool = False,
+    ) -> "Response":
+        """Send the request through the circuit breaker.
+
+        See CampusOnlineConnection.send, the errors of httpx are handled
+        like the errors of requests.
+        """
+        delays = self.retry_policy.delays() if idempotent else iter(())
+        stage = stage_of(headers)
+        request = self.client.build_request(
+            "POST",
+            self.config.endpoint,
+            content=data,
+            headers=headers,
+            extensions={"trace": self.trace},
+        )
+
+        while True:
+            self.check_breaker()
+
+            try:
+                if self.soap_limiter:
+                    await self.soap_limiter.aacquire()
+
+                response = await self.client.send(request, stream=stream)
+            except TransportError as exc:
+                code, msg = 550, str(exc)
+            except (HTTPError, InvalidURL) as exc:
+                self.breaker.record_failure()
+                raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+            except BaseException:
+                self.breaker.abort()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    return response
+                await response.aclose()
+                code, msg = response.status_code, response.reason_phrase
+
+            await sleep(self.retry_delay(delays, stage, code, msg))
+
+    async def post(
+        self,
+        data: bytes,
+        headers: dict[str, str],
+        *,
+        idempotent: bool = True,
+    ) -> Element:
+        """Post."""
+        stage = stage_of(headers)
+        with self.metrics.timer(stage):
+            response = await self.send(data, headers, idempotent=idempotent)
+            return self.parse(response, stage)
+
+    async def post_cached(
+        self,
+        service: str,
+        campusonline_id: CampusOnlineID,
+        data: bytes,
+        headers: dict[str, str],
+    ) -> Element:
+        """Post and cache the response per service and campusonline id.
+
+        The cache is used from a thread, a redis cache would block the
+        event loop otherwise.
+        """
+        if self.cache is None:
+            return await self.post(data, headers)
+
+        stage = stage_of(headers)
+        with self.metrics.timer(stage):
+            root = await to_thread(self.cached, service, campusonline_id, stage)
+            if root is not None:
+                return root
+
+            root = self.parse(await self.send(data, headers), stage)
+            await to_thread(self.cache_response, service, campusonline_id, root)
+            return root
+
+    @asynccontextmanager
+    async def post_streamed(
+        self,
+        data: bytes,
+        headers: dict[str, str],
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        """Post and provide the response body as a stream of chunks.
+
+        See CampusOnlineConnection.post_streamed.
+        """
+        stage = stage_of(headers)
+        with self.metrics.timer(stage):
+            response = await self.send(data, headers, stream=True)
+            try:
+                yield self.count_bytes(response.aiter_bytes(), stage)
+            except HTTPError as exc:
+                raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+            finally:
+                await response.aclose()
+
+    async def count_bytes(
+        self,
+        chunks: AsyncIterator[bytes],
+        stage: str,
+    ) -> AsyncIterator[bytes]:
+        """Count the bytes of the chunks while they are received."""
+        async for chunk in chunks:
+            self.metrics.increment(f"{stage}.bytes", len(chunk))
+            yield chunk
+
+    async def post_ids(self, theses_filter: ThesesFilter) -> Element:
+        """Post ids."""
+        return await self.post(*self.ids_request(theses_filter))
+
+    def post_ids_streamed(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> AbstractAsyncContextManager[AsyncIterator[bytes]]:
+        """Post ids and provide the response as a stream of chunks."""
+        return self.post_streamed(*self.ids_request(theses_filter))
+
+    async def post_file_url(self, campusonline_id: CampusOnlineID) -> Element:
+        """Post file url."""
+        request = self.file_url_request(campusonline_id)
+        service = "getDocumentByThesisID"
+        return await self.post_cached(service, campusonline_id, *request)
+
+    async def post_metadata(self, campusonline_id: CampusOnlineID) -> Element:
+        """Post metadata."""
+        request = self.metadata_request(campusonline_id)
+        service = "getMetadataByThesisID"
+        return await self.post_cached(service, campusonline_id, *request)
+
+    async def download(self, cms_id: CampusOnlineID, file_url: URL) -> Path:
+        """Download the file into the download store.
+
+        See CampusOnlineConnection.download, the file operations are run in
+        a thread to not block the event loop.
+        """
+        file_url = f"{file_url}{self.config.token}"
+        pending = await to_thread(self.store.open, cms_id)
+        delays = self.download_retry_policy.delays()
+
+        try:
+            with self.metrics.timer("download"):
+                while True:
+                    try:
+                        return await self.download_range(cms_id, file_url, pending)
+                    except (TransportError, CampusOnlineRESTError) as exc:
+                        await sleep(self.download_delay(delays, exc))
+        finally:
+            await to_thread(pending.close)
+
+    async def head_file(self, file_url: URL) -> int | None:
+        """Get the size of the file by a HEAD request, None if it is unknown."""
+        if self.download_limiter:
+            await self.download_limiter.aacquire()
+
+        file_url = f"{file_url}{self.config.token}"
+        timeout = Timeout(
+            self.config.download_read_timeout,
+            connect=self.config.download_connect_timeout,
+        )
+        with self.metrics.timer("head"):
+            try:
+                response = await self.client.head(
+                    file_url,
+                    timeout=timeout,
+                    follow_redirects=True,
+                    extensions={"trace": self.trace},
+                )
+            except (HTTPError, InvalidURL) as exc:
+                raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+
+        if response.status_code >= HTTPStatus.BAD_REQUEST:
+            raise CampusOnlineRESTError(response.status_code, response.reason_phrase)
+        return content_length(response.headers)
+
+    async def download_range(
+        self,
+        cms_id: CampusOnlineID,
+        file_url: URL,
+        pending: PendingFile,
+    ) -> Path:
+        """Download the rest of the file, starting at the end of the partial file."""
+        if self.download_limiter:
+            await self.download_limiter.aacquire()
+
+        entry = await to_thread(self.store.entry, cms_id)
+        timeout = Timeout(
+            self.config.download_read_timeout,
+            connect=self.config.download_connect_timeout,
+        )
+        request = self.client.stream(
+            "GET",
+            file_url,
+            headers=resume_headers(entry, pending),
+            timeout=timeout,
+            extensions={"trace": self.trace},
+        )
+        async with request as response:
+            if response.status_code != HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+                return await self.store_response(cms_id, pending, response)
+
+        await to_thread(pending.reset)
+        return await self.download_range(cms_id, file_url, pending)
+
+    async def store_response(
+        self,
+        cms_id: CampusOnlineID,
+        pending: PendingFile,
+        response: "Response",
+    ) -> Path:
+        """Store the body of the download response."""
+        path, size = await to_thread(
+            self.prepare_store,
+            cms_id,
+            pending,
+            response.status_code,
+            response.reason_phrase,
+            response.headers,
+        )
+        if path is not None:
+            return path
+
+        # the chunks are buffered here and not by aiter_raw, so that the
+        # received part is written to the partial file if the transfer breaks
+        buffer = bytearray()
+        try:
+            async for chunk in response.aiter_raw():
+                buffer += chunk
+                self.metrics.increment("download.bytes", len(chunk))
+                if len(buffer) >= self.config.download_chunk_size:
+                    await to_thread(pending.write, bytes(buffer))
+                    buffer.clear()
+        finally:
+            await to_thread(pending.write, bytes(buffer))
+
+        etag = response.headers.get("ETag") or pending.etag
+        return await to_thread(self.store.commit, cms_id, pending, etag, size)
+
+    async def post_status(
+        self,
+        cms_id: CampusOnlineID,
+        status: CampusOnlineStatus,
+        date: Date,
+    ) -> Element:
+        """Post status."""
+        body, headers = self.status_request(cms_id, status, date)
+        return await self.post(body, headers, idempotent=False)
+
+
+class AsyncCampusOnlineAPI:
+    """Asyncio campus online record."""
+
+    connection_cls = AsyncCampusOnlineConnection
+
+    def __init__(self, config: CampusOnlineRESTConfig) -> None:
+        """Construct."""
+        self.connection = self.connection_cls(config)
+
+    async def fetch_ids(self, theses_filter: ThesesFilter) -> list[CampusOnlineID]:
+        """Fetch ids."""
+        return [cms_id async for cms_id in self.iter_ids(theses_filter)]
+
+    async def iter_ids(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> AsyncIterator[CampusOnlineID]:
+        """Iterate over the ids while the response is streamed."""
+        async for element in self.iter_elements(theses_filter, "ID"):
+            yield CampusOnlineID(element.text)
+
+    async def iter_theses(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> AsyncIterator[tuple[CampusOnlineID, Element]]:
+        """Iterate over the ids and the metadata of the bulk response."""
+        ns = ThesesStreamParser.ns
+        async for thesis in self.iter_elements(theses_filter, "thesis"):
+            yield CampusOnlineID(thesis.findtext(f"{{{ns}}}ID")), thesis
+
+    async def fetch_fingerprints(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> dict[CampusOnlineID, str]:
+        """Fetch the ids with the fingerprint of their metadata."""
+        return {
+            cms_id: fingerprint(thesis)
+            async for cms_id, thesis in self.iter_theses(theses_filter)
+        }
+
+    async def fetch_ids_partitioned(
+        self,
+        theses_filter: PartitionedThesesFilter,
+    ) -> list[CampusOnlineID]:
+        """Fetch the ids of the partitions concurrently, merged without duplicates."""
+        results = await self.gather_partitions(self.fetch_ids, theses_filter)
+        return list(dict.fromkeys(cms_id for ids in results for cms_id in ids))
+
+    async def fetch_fingerprints_partitioned(
+        self,
+        theses_filter: PartitionedThesesFilter,
+    ) -> dict[CampusOnlineID, str]:
+        """Fetch the fingerprints of the partitions concurrently."""
+        merged: dict[CampusOnlineID, str] = {}
+        results = await self.gather_partitions(self.fetch_fingerprints, theses_filter)
+        for fingerprints in results:
+            merged = fingerprints | merged
+        return merged
+
+    async def gather_partitions(
+        self,
+        func: Callable[[ThesesFilter], Coroutine[Any, Any, list | dict]],
+        theses_filter: PartitionedThesesFilter,
+    ) -> list:
+        """Await func for each partition, limited by partition_concurrency."""
+        semaphore = Semaphore(max(self.connection.config.partition_concurrency, 1))
+
+        async def limited(partition: ThesesFilter) -> list | dict:
+            async with semaphore:
+                return await func(partition)
+
+        return await gather(*(limited(partition) for partition in theses_filter))
+
+    async def iter_elements(
+        self,
+        theses_filter: ThesesFilter,
+        tag: str,
+    ) -> AsyncIterator[Element]:
+        """Iterate over the elements with tag while the response is streamed."""
+        parser = ThesesStreamParser(tag, self.connection.xml)
+        async with self.connection.post_ids_streamed(theses_filter) as chunks:
+            async for chunk in chunks:
+                for element in parser.feed(chunk):
+                    yield element
+            for element in parser.close():
+                yield element
+
+    async def get_file_url(self, campusonline_id: CampusOnlineID) -> str:
+        """Get file URL."""
+        root = await self.connection.post_file_url(campusonline_id)
+        return parse_file_url(root, campusonline_id)
+
+    async def head_file(self, file_url: URL) -> int | None:
+        """Get the size of the file by a HEAD request."""
+        return await self.connection.head_file(file_url)
+
+    async def get_metadata(self, campusonline_id: CampusOnlineID) -> Element:
+        """Get Metadata."""
+        root = await self.connection.post_metadata(campusonline_id)
+        return parse_metadata(root)
+
+    async def get_thesis(self, campusonline_id: CampusOnlineID) -> Thesis:
+        """Get the metadata as thesis."""
+        return parse_thesis(await self.get_metadata(campusonline_id))
+
+    async def download_file(self, campusonline_id: CampusOnlineID) -> FilePath:
+        """Download files from campus online by campusonline_id."""
+        file_url = await self.get_file_url(campusonline_id)
+        return str(await self.connection.download(campusonline_id, file_url))
+
+    async def set_status(
+        self,
+        cms_id: CampusOnlineID,
+        status: CampusOnlineStatus,
+        date: Date,
+    ) -> bool:
+        """Set status."""
+        root = await self.connection.post_status(cms_id, status, date)
+        return parse_status(root, cms_id)
+
+
+class SyncCampusOnlineAPI:
+    """Blocking facade over the AsyncCampusOnlineAPI.
+
+    The coroutines run on an event loop in a background thread, so the
+    facade can be used from synchronous code like the cli and from several
+    threads at the same time, while all requests share the async client.
+
+    The thread of the loop does not survive a fork, e.g. of a celery
+    prefork worker. Therefore the loop is started on the first request of
+    each process, and a forked process gets a new client as well.
+    """
+
+    def __init__(self, async_api: AsyncCampusOnlineAPI) -> None:
+        """Construct."""
+        self.async_api = async_api
+        self.loop: AbstractEventLoop | None = None
+        self.pid: int | None = None
+        self.lock = Lock()
+
+    @property
+    def connection(self) -> AsyncCampusOnlineConnection:
+        """Get the connection of the async api."""
+        return self.async_api.connection
+
+    @staticmethod
+    def start_loop() -> AbstractEventLoop:
+        """Start the event loop in a daemon thread."""
+        loop = new_event_loop()
+        Thread(target=loop.run_forever, name="campusonline-aio", daemon=True).start()
+        return loop
+
+    def event_loop(self) -> AbstractEventLoop:
+        """Get the event loop of the current process, start it if necessary."""
+        with self.lock:
+            if self.pid != getpid():
+                if self.pid is not None:
+                    self.connection.reset_client()
+                self.loop = self.start_loop()
+                self.pid = getpid()
+            return self.loop
+
+    def run(self, coroutine: Coroutine) -> Any:  # noqa: ANN401
+        """Run the coroutine on the event loop and wait for the result."""
+        return run_coroutine_threadsafe(coroutine, self.event_loop()).result()
+
+    def fetch_ids(self, theses_filter: ThesesFilter) -> list[CampusOnlineID]:
+        """Fetch ids."""
+        return self.run(self.async_api.fetch_ids(theses_filter))
+
+    def fetch_ids_partitioned(
+        self,
+        theses_filter: PartitionedThesesFilter,
+    ) -> list[CampusOnlineID]:
+        """Fetch the ids of the partitions concurrently."""
+        return self.run(self.async_api.fetch_ids_partitioned(theses_filter))
+
+    def fetch_fingerprints_partitioned(
+        self,
+        theses_filter: PartitionedThesesFilter,
+    ) -> dict[CampusOnlineID, str]:
+        """Fetch the fingerprints of the partitions concurrently."""
+        return self.run(self.async_api.fetch_fingerprints_partitioned(theses_filter))
+
+    def iterate(self, iterator: AsyncIterator) -> Iterator:
+        """Iterate over the async iterator on the event loop."""
+        try:
+            while True:
+                yield self.run(anext(iterator))
+        except StopAsyncIteration:
+            return
+        finally:
+            self.run(iterator.aclose())
+
+    def iter_ids(self, theses_filter: ThesesFilter) -> Iterator[CampusOnlineID]:
+        """Iterate over the ids while the response is streamed."""
+        return self.iterate(self.async_api.iter_ids(theses_filter))
+
+    def iter_theses(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> Iterator[tuple[CampusOnlineID, Element]]:
+        """Iterate over the ids and the metadata of the bulk response."""
+        return self.iterate(self.async_api.iter_theses(theses_filter))
+
+    def fetch_fingerprints(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> dict[CampusOnlineID, str]:
+        """Fetch the ids with the fingerprint of their metadata."""
+        return self.run(self.async_api.fetch_fingerprints(theses_filter))
+
+    def get_file_url(self, campusonline_id: CampusOnlineID) -> str:
+        """Get file URL."""
+        return self.run(self.async_api.get_file_url(campusonline_id))
+
+    def head_file(self, file_url: URL) -> int | None:
+        """Get the size of the file by a HEAD request."""
+        return self.run(self.async_api.head_file(file_url))
+
+    def get_metadata(self, campusonline_id: CampusOnlineID) -> Element:
+        """Get Metadata."""
+        return self.run(self.async_api.get_metadata(campusonline_id))
+
+    def get_thesis(self, campusonline_id: CampusOnlineID) -> Thesis:
+        """Get the metadata as thesis."""
+        return self.run(self.async_api.get_thesis(campusonline_id))
+
+    def download_file(self, campusonline_id: CampusOnlineID) -> FilePath:
+        """Download files from campus online by campusonline_id."""
+        return self.run(self.async_api.download_file(campusonline_id))
+
+    def set_status(
+        self,
+        cms_id: CampusOnlineID,
+        status: CampusOnlineStatus,
+        date: Date,
+    ) -> bool:
+        """Set status."""
+        return self.run(self.async_api.set_status(cms_id, status, date))
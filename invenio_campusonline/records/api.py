@@ -8,20 +8,243 @@
 
 """API."""
 
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date as Date
-from xml.etree.ElementTree import Element
+from hashlib import sha256
+from xml.etree.ElementTree import Element, canonicalize
 
-from ..types import CampusOnlineID, CampusOnlineStatus, FilePath, ThesesFilter
+from ..types import (
+    URL,
+    CampusOnlineID,
+    CampusOnlineStatus,
+    FilePath,
+    PartitionedThesesFilter,
+    ThesesFilter,
+    Thesis,
+)
 from .config import CampusOnlineRESTConfig
-from .models import CampusOnlineConnection
+from .models import CampusOnlineConnection, CampusOnlineRESTError
+from .parsing import (
+    DOC_URL,
+    DOCUMENT,
+    FAULTSTRING,
+    NS,
+    THESIS,
+    XMLBackend,
+    get_backend,
+    tostring,
+)
 
 
 def exists_fulltext(thesis: Element) -> bool:
     """Check against fulltext existens."""
-    ns = "http://www.campusonline.at/thesisservice/basetypes"
-    xpath = f".//{{{ns}}}document"
-    ele = thesis.find(xpath)
-    return ele is not None
+    return DOCUMENT.first(thesis) is not None
+
+
+def fingerprint(thesis: Element) -> str:
+    """Calculate the fingerprint over the canonical form of the thesis.
+
+    The namespace prefixes are rewritten, so that the fingerprint does not
+    depend on the xml backend which parsed the thesis.
+    """
+    canonical = canonicalize(
+        tostring(thesis),
+        strip_text=True,
+        rewrite_prefixes=True,
+    )
+    return sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ThesesStreamParser:
+    """Incremental parser of the getAllThesesMetadata response.
+
+    The response is fed in chunks. The parser yields the elements with the
+    given tag as soon as they are complete and removes every finished
+    thesis from the tree afterwards, so the memory does not grow with the
+    size of the response. The standard library reports all start and end
+    events and the parents are kept on a stack, lxml reports only the end
+    events of the wanted tags and knows the parents itself.
+    """
+
+    ns = NS
+
+    def __init__(self, tag: str, backend: XMLBackend | None = None) -> None:
+        """Construct."""
+        self.backend = backend or get_backend()
+        self.stack: list[Element] = []
+        self.tag = f"{{{self.ns}}}{tag}"
+        self.id_tag = f"{{{self.ns}}}ID"
+        self.thesis_tag = f"{{{self.ns}}}thesis"
+        self.parser = self.backend.pull_parser((self.tag, self.thesis_tag))
+
+    def parse(self, chunks: Iterable[bytes]) -> Iterator[Element]:
+        """Parse all chunks of the response."""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def feed(self, chunk: bytes) -> Iterator[Element]:
+        """Feed the next chunk of the response."""
+        try:
+            self.parser.feed(chunk)
+        except self.backend.errors as exc:
+            raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+        yield from self.read_events()
+
+    def close(self) -> Iterator[Element]:
+        """Finish parsing after the last chunk."""
+        try:
+            self.parser.close()
+        except self.backend.errors as exc:
+            raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+        yield from self.read_events()
+
+    def read_events(self) -> Iterator[Element]:
+        """Read the events parsed so far."""
+        try:
+            events = list(self.parser.read_events())
+        except self.backend.errors as exc:
+            raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+
+        for event, element in events:
+            if event == "start":
+                self.stack.append(element)
+                continue
+
+            if self.stack:
+                self.stack.pop()
+            if element.tag == self.tag:
+                yield element
+            if element.tag == self.thesis_tag:
+                self.detach(element)
+
+    def detach(self, element: Element) -> None:
+        """Remove the finished thesis from its parent."""
+        parent = self.stack[-1] if self.stack else self.backend.parent(element)
+        if parent is not None:
+            parent.remove(element)
+
+
+def iterparse_ids(
+    chunks: Iterable[bytes],
+    backend: XMLBackend | None = None,
+) -> Iterator[CampusOnlineID]:
+    """Parse the ids of the streamed getAllThesesMetadata response."""
+    for element in ThesesStreamParser("ID", backend).parse(chunks):
+        yield CampusOnlineID(element.text)
+
+
+def iterparse_theses(
+    chunks: Iterable[bytes],
+    backend: XMLBackend | None = None,
+) -> Iterator[tuple[CampusOnlineID, Element]]:
+    """Parse the theses of the streamed getAllThesesMetadata response."""
+    parser = ThesesStreamParser("thesis", backend)
+    for thesis in parser.parse(chunks):
+        yield CampusOnlineID(thesis.findtext(parser.id_tag)), thesis
+
+
+def iterparse_fingerprints(
+    chunks: Iterable[bytes],
+    backend: XMLBackend | None = None,
+) -> Iterator[tuple[CampusOnlineID, str]]:
+    """Parse the fingerprints of the streamed getAllThesesMetadata response."""
+    for cms_id, thesis in iterparse_theses(chunks, backend):
+        yield cms_id, fingerprint(thesis)
+
+
+def has_metaclasses(
+    thesis: Element,
+    names: Mapping[str, Iterable[str]] | Iterable[str],
+    attrs: Iterable[str] = (),
+) -> bool:
+    """Check that the thesis contains the metaclasses and the attributes.
+
+    names maps the names of the metaclasses to the attributes each of their
+    objects needs, a plain list of names requires no attributes. attrs are
+    the attributes of the thesis itself.
+    """
+    attr_tag, name_tag = f"{{{NS}}}attr", f"{{{NS}}}name"
+    if not {attr.get("key") for attr in thesis.iterfind(attr_tag)}.issuperset(attrs):
+        return False
+
+    required = names if isinstance(names, Mapping) else dict.fromkeys(names, ())
+    metaclasses = {
+        metaclass.findtext(name_tag): metaclass
+        for metaclass in thesis.iterfind(f"{{{NS}}}metaclass")
+    }
+    for name, keys in required.items():
+        if (metaclass := metaclasses.get(name)) is None:
+            return False
+        for obj in metaclass.iterfind(f"{{{NS}}}metaobj"):
+            if not {attr.get("key") for attr in obj}.issuperset(keys):
+                return False
+    return True
+
+
+def parse_file_url(root: Element, campusonline_id: CampusOnlineID) -> str:
+    """Parse the file url of the getDocumentByThesisID response."""
+    if not exists_fulltext(root):
+        msg = f"record ({campusonline_id}) has no associated file"
+        raise RuntimeError(msg)
+
+    file_url = DOC_URL.first(root)
+    if file_url is None:
+        msg = f"record ({campusonline_id}) has no file url"
+        raise RuntimeError(msg)
+
+    return file_url.text
+
+
+def parse_metadata(root: Element) -> Element:
+    """Parse the thesis of the getMetadataByThesisID response."""
+    thesis = THESIS.first(root)
+    if thesis is None:
+        msg = "metadata response contains no thesis"
+        raise RuntimeError(msg)
+    return thesis
+
+
+def parse_thesis(element: Element) -> Thesis:
+    """Collect the metadata of the thesis element with one pass over the tree.
+
+    The returned thesis keeps only strings, so the element can be dropped.
+    """
+    id_tag, attr_tag = f"{{{NS}}}ID", f"{{{NS}}}attr"
+    metaclass_tag, document_tag = f"{{{NS}}}metaclass", f"{{{NS}}}document"
+    name_tag, metaobj_tag = f"{{{NS}}}name", f"{{{NS}}}metaobj"
+
+    cms_id, doc_url = "", None
+    attrs: dict[str, str] = {}
+    metaclasses: dict[str, list[dict[str, str]]] = {}
+
+    for child in element:
+        if child.tag == attr_tag:
+            attrs[child.get("key")] = child.text or ""
+        elif child.tag == metaclass_tag:
+            objs = metaclasses.setdefault(child.findtext(name_tag), [])
+            objs.extend(
+                {attr.get("key"): attr.text or "" for attr in obj}
+                for obj in child.iterfind(metaobj_tag)
+            )
+        elif child.tag == id_tag:
+            cms_id = child.text or ""
+        elif child.tag == document_tag:
+            doc_url = child.findtext(f"{{{NS}}}docUrl")
+
+    return Thesis(CampusOnlineID(cms_id), attrs, metaclasses, doc_url)
+
+
+def parse_status(root: Element, cms_id: CampusOnlineID) -> bool:
+    """Parse the setThesisStatusByID response."""
+    ele = FAULTSTRING.first(root)
+
+    if ele is not None:
+        error_message = ele.text
+        msg = f"Set status on {cms_id} went wrong with {error_message}"
+        raise RuntimeError(msg)
+    return True
 
 
 class CampusOnlineAPI:
@@ -35,37 +258,86 @@ class CampusOnlineAPI:
 
     def fetch_ids(self, theses_filter: ThesesFilter) -> list[CampusOnlineID]:
         """Fetch ids."""
-        root = self.connection.post_ids(theses_filter)
-        xpath = "{http://www.campusonline.at/thesisservice/basetypes}ID"
-        return [CampusOnlineID(node.text) for node in root.iter(xpath)]
+        return list(self.iter_ids(theses_filter))
+
+    def iter_ids(self, theses_filter: ThesesFilter) -> Iterator[CampusOnlineID]:
+        """Iterate over the ids while the response is streamed."""
+        with self.connection.post_ids_streamed(theses_filter) as chunks:
+            yield from iterparse_ids(chunks, self.connection.xml)
+
+    def iter_theses(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> Iterator[tuple[CampusOnlineID, Element]]:
+        """Iterate over the ids and the metadata of the bulk response."""
+        with self.connection.post_ids_streamed(theses_filter) as chunks:
+            yield from iterparse_theses(chunks, self.connection.xml)
+
+    def fetch_fingerprints(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> dict[CampusOnlineID, str]:
+        """Fetch the ids with the fingerprint of their metadata."""
+        with self.connection.post_ids_streamed(theses_filter) as chunks:
+            return dict(iterparse_fingerprints(chunks, self.connection.xml))
+
+    def fetch_ids_partitioned(
+        self,
+        theses_filter: PartitionedThesesFilter,
+    ) -> list[CampusOnlineID]:
+        """Fetch the ids of the partitions concurrently.
+
+        The ids are merged in the order of the partitions, an id contained
+        in several partitions is kept once.
+        """
+        results = self.map_partitions(self.fetch_ids, theses_filter)
+        return list(dict.fromkeys(cms_id for ids in results for cms_id in ids))
+
+    def fetch_fingerprints_partitioned(
+        self,
+        theses_filter: PartitionedThesesFilter,
+    ) -> dict[CampusOnlineID, str]:
+        """Fetch the fingerprints of the partitions concurrently."""
+        merged: dict[CampusOnlineID, str] = {}
+        for fingerprints in self.map_partitions(self.fetch_fingerprints, theses_filter):
+            merged = fingerprints | merged
+        return merged
+
+    def map_partitions(
+        self,
+        func: Callable[[ThesesFilter], list | dict],
+        theses_filter: PartitionedThesesFilter,
+    ) -> list:
+        """Call func for each partition in a thread pool."""
+        concurrency = min(
+            self.connection.config.partition_concurrency,
+            len(theses_filter),
+        )
+        with ThreadPoolExecutor(max(concurrency, 1), "campusonline-ids") as executor:
+            return list(executor.map(func, theses_filter))
 
     def get_file_url(self, campusonline_id: CampusOnlineID) -> str:
         """Get file URL."""
         root = self.connection.post_file_url(campusonline_id)
+        return parse_file_url(root, campusonline_id)
 
-        if not exists_fulltext(root):
-            msg = f"record ({campusonline_id}) has no associated file"
-            raise RuntimeError(msg)
-
-        xpath = "{http://www.campusonline.at/thesisservice/basetypes}docUrl"
-        file_url = next(root.iter(xpath))
-
-        return file_url.text
+    def head_file(self, file_url: URL) -> int | None:
+        """Get the size of the file by a HEAD request."""
+        return self.connection.head_file(file_url)
 
     def get_metadata(self, campusonline_id: CampusOnlineID) -> Element:
         """Get Metadata."""
         root = self.connection.post_metadata(campusonline_id)
+        return parse_metadata(root)
 
-        xpath = "{http://www.campusonline.at/thesisservice/basetypes}thesis"
-        return next(root.iter(xpath))
+    def get_thesis(self, campusonline_id: CampusOnlineID) -> Thesis:
+        """Get the metadata as thesis."""
+        return parse_thesis(self.get_metadata(campusonline_id))
 
     def download_file(self, campusonline_id: CampusOnlineID) -> FilePath:
         """Download files from campus online by campusonline_id."""
         file_url = self.get_file_url(campusonline_id)
-
-        file_path = f"/tmp/{campusonline_id}.pdf"  # noqa: S108
-        self.connection.store_file_temporarily(file_url, file_path)
-        return file_path
+        return str(self.connection.download(campusonline_id, file_url))
 
     def set_status(
         self,
@@ -75,11 +347,4 @@ class CampusOnlineAPI:
     ) -> bool:
         """Set status."""
         root = self.connection.post_status(cms_id, status, date)
-        xpath = "faultstring"
-        ele = root.find(xpath)
-
-        if ele is not None:
-            error_message = ele.text
-            msg = f"Set status on {cms_id} went wrong with {error_message}"
-            raise RuntimeError(msg)
-        return True
+        return parse_status(root, cms_id)
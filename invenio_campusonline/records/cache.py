@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Response caches."""
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic, time
+from typing import Protocol
+
+from ..types import CacheStats, CampusOnlineID
+
+
+class ResponseCache(Protocol):
+    """Interface of the response caches."""
+
+    stats: CacheStats
+
+    def get(self, service: str, cms_id: CampusOnlineID) -> bytes | None:
+        """Get the cached response."""
+
+    def set(self, service: str, cms_id: CampusOnlineID, value: bytes) -> None:
+        """Cache the response."""
+
+
+class LRUCache:
+    """In process cache evicting the least recently used entries."""
+
+    def __init__(self, ttl: int = 300, max_entries: int = 1024) -> None:
+        """Construct."""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple, tuple[float, bytes]] = OrderedDict()
+        self.lock = Lock()
+        self.stats = CacheStats()
+
+    def get(self, service: str, cms_id: CampusOnlineID) -> bytes | None:
+        """Get the cached response."""
+        key = (service, cms_id)
+        with self.lock:
+            expires, value = self.entries.get(key, (0, None))
+            if value is None or expires < monotonic():
+                self.entries.pop(key, None)
+                self.stats.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, service: str, cms_id: CampusOnlineID, value: bytes) -> None:
+        """Cache the response."""
+        key = (service, cms_id)
+        with self.lock:
+            self.entries[key] = (monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class RedisCache:
+    """Cache shared by all processes through a redis compatible server.
+
+    Every entry expires after ttl seconds. Additionally a sorted set keeps
+    the last access time of the entries, so that the least recently used
+    entries are removed if there are more than max_entries.
+    """
+
+    def __init__(
+        self,
+        client: "Redis",  # noqa: F821
+        ttl: int = 300,
+        max_entries: int = 1024,
+        prefix: str = "campusonline",
+    ) -> None:
+        """Construct."""
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index = f"{prefix}:index"
+        self.stats = CacheStats()
+
+    def key(self, service: str, cms_id: CampusOnlineID) -> str:
+        """Build the redis key."""
+        return f"{self.prefix}:{service}:{cms_id}"
+
+    def get(self, service: str, cms_id: CampusOnlineID) -> bytes | None:
+        """Get the cached response."""
+        key = self.key(service, cms_id)
+        value = self.client.get(key)
+
+        if value is None:
+            self.stats.misses += 1
+            return None
+
+        self.client.zadd(self.index, {key: time()})
+        self.stats.hits += 1
+        return value
+
+    def set(self, service: str, cms_id: CampusOnlineID, value: bytes) -> None:
+        """Cache the response."""
+        key = self.key(service, cms_id)
+        now = time()
+        self.client.set(key, value, ex=self.ttl)
+        self.client.zadd(self.index, {key: now})
+        self.client.zremrangebyscore(self.index, 0, now - self.ttl)
+
+        if (overflow := self.client.zcard(self.index) - self.max_entries) > 0:
+            evicted = [key for key, _ in self.client.zpopmin(self.index, overflow)]
+            self.client.delete(*evicted)
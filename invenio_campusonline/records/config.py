@@ -8,7 +8,7 @@
 
 """API."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from ..types import URL, CampusOnlineToken
 
@@ -19,3 +19,111 @@ class CampusOnlineRESTConfig:
 
     endpoint: URL = ""
     token: CampusOnlineToken = ""
+
+    pool_connections: int = 10
+    """Number of per host connection pools to cache."""
+
+    pool_maxsize: int = 10
+    """Maximum number of connections kept open per host."""
+
+    pool_block: bool = False
+    """Block instead of opening extra connections if the pool is exhausted."""
+
+    keep_alive: bool = True
+    """Keep connections open between requests."""
+
+    cache: str | None = None
+    """Cache backend for metadata and file url responses, lru or redis."""
+
+    cache_ttl: int = 300
+    """Seconds a cached response is valid."""
+
+    cache_max_entries: int = 1024
+    """Maximum number of cached responses."""
+
+    cache_redis_url: URL | None = None
+    """Url of the redis server used by the redis cache backend."""
+
+    download_dir: str | None = None
+    """Directory of the download store, defaults to a temporary directory."""
+
+    download_quota: int | None = None
+    """Maximum number of bytes kept in the download store."""
+
+    download_chunk_size: int = 1024 * 1024
+    """Size of the chunks in which the downloaded files are written."""
+
+    download_connect_timeout: float = 10
+    """Seconds to wait for the connection to the file server."""
+
+    download_read_timeout: float = 60
+    """Seconds to wait for the next chunk of a downloaded file."""
+
+    download_retries: int = 3
+    """How often an interrupted download is resumed before giving up."""
+
+    retries: int = 3
+    """How often a failed idempotent request is retried."""
+
+    retry_backoff: float = 0.5
+    """Base of the exponential backoff between retries in seconds."""
+
+    retry_max_backoff: float = 30
+    """Upper bound of the backoff between retries in seconds."""
+
+    circuit_breaker_threshold: int = 5
+    """Consecutive failures after which the circuit breaker opens."""
+
+    circuit_breaker_reset_timeout: float = 60
+    """Seconds the circuit breaker stays open before a trial request."""
+
+    rate_limit: float | None = None
+    """Maximum number of soap requests per second, None to not limit."""
+
+    rate_limit_burst: int = 1
+    """Number of soap requests which may be sent at once."""
+
+    download_rate_limit: float | None = None
+    """Maximum number of file downloads per second, None to not limit."""
+
+    download_rate_limit_burst: int = 1
+    """Number of file downloads which may be started at once."""
+
+    rate_limit_backend: str = "local"
+    """Backend of the rate limiters, local or redis."""
+
+    rate_limit_redis_url: str | None = None
+    """Redis url of the shared rate limiters."""
+
+    xml_backend: str = "stdlib"
+    """Xml backend parsing the responses, auto, lxml or stdlib."""
+
+    metrics: str | None = "memory"
+    """Collector of the stage timings, None, memory or statsd."""
+
+    metrics_statsd_host: str = "localhost"
+    """Host of the statsd server."""
+
+    metrics_statsd_port: int = 8125
+    """Port of the statsd server."""
+
+    metrics_prefix: str = "campusonline"
+    """Prefix of the metric names sent to statsd."""
+
+    partition_concurrency: int = 4
+    """Partitions of a PartitionedThesesFilter which are fetched at the same time."""
+
+    reuse_bulk_metadata: bool = False
+    """Reuse the metadata of the getAllThesesMetadata response."""
+
+    required_metaclasses: dict[str, tuple[str, ...]] = field(
+        default_factory=lambda: {
+            "AUTHOR": ("FNLN",),
+            "SUPERVISOR": ("FNLN",),
+            "TEXT": ("ORIG", "TIT"),
+        },
+    )
+    """Metaclasses with their attributes a thesis of the bulk response needs."""
+
+    required_attrs: tuple[str, ...] = ("TYPKB", "OLANG", "SPVON", "SPBIS", "VOLLTEXT")
+    """Attributes a thesis of the bulk response needs to be reused."""
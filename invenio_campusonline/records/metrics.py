@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Metrics collectors for the timings of the import stages.
+
+The connection reports the time of each stage (fetch_ids, get_metadata,
+get_file_url, download, set_status) and the import reports the time of the
+import function. The bytes transferred, the retries, the cache hits and
+the errors are counted per stage.
+"""
+
+import socket
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from threading import Lock
+from time import perf_counter
+
+from ..types import Metrics
+from .config import CampusOnlineRESTConfig
+
+STAGES = {
+    "getAllThesesMetadataRequest": "fetch_ids",
+    "getMetadataByThesisID": "get_metadata",
+    "getDocumentByThesisID": "get_file_url",
+    "setThesisStatusByIDRequest": "set_status",
+}
+"""Stages of the SOAP services."""
+
+
+def stage_of(headers: dict[str, str]) -> str:
+    """Get the stage of the request by its SOAPAction header."""
+    service = headers.get("SOAPAction", "").rpartition("#")[2]
+    return STAGES.get(service, service)
+
+
+class MetricsCollector:
+    """Base class of the collectors, which discards all metrics.
+
+    Subclasses implement timing and increment, the interface follows the
+    timers and counters of statsd and prometheus.
+    """
+
+    def timing(self, stage: str, seconds: float) -> None:
+        """Record the duration of one call of the stage."""
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increment the counter."""
+
+    def snapshot(self) -> Metrics:
+        """Get the metrics collected since the last reset."""
+        return Metrics()
+
+    def reset(self) -> None:
+        """Forget the collected metrics."""
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the block as one call of the stage and count its errors."""
+        start = perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment(f"{stage}.errors")
+            raise
+        finally:
+            self.timing(stage, perf_counter() - start)
+
+
+class InMemoryCollector(MetricsCollector):
+    """Collect the metrics within the process."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.timings: dict[str, list[float]] = {}
+        self.counters: Counter[str] = Counter()
+        self.lock = Lock()
+
+    def timing(self, stage: str, seconds: float) -> None:
+        """Record the duration of one call of the stage."""
+        with self.lock:
+            timing = self.timings.setdefault(stage, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increment the counter."""
+        with self.lock:
+            self.counters[name] += value
+
+    def snapshot(self) -> Metrics:
+        """Get the metrics collected since the last reset."""
+        with self.lock:
+            timings = {stage: list(values) for stage, values in self.timings.items()}
+            return Metrics(timings, dict(self.counters))
+
+    def reset(self) -> None:
+        """Forget the collected metrics."""
+        with self.lock:
+            self.timings.clear()
+            self.counters.clear()
+
+
+class StatsdCollector(InMemoryCollector):
+    """Send the metrics to a statsd server and collect them in memory.
+
+    The metrics are sent as udp datagrams, which are dropped silently if
+    the server is not reachable, so the import never waits for it. The
+    in memory metrics are kept for the summary of the import.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8125,
+        prefix: str = "campusonline",
+    ) -> None:
+        """Construct."""
+        super().__init__()
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, metric: str) -> None:
+        """Send the metric, errors are ignored."""
+        with suppress(OSError):
+            self.socket.sendto(f"{self.prefix}.{metric}".encode(), self.address)
+
+    def timing(self, stage: str, seconds: float) -> None:
+        """Record the duration of one call of the stage."""
+        super().timing(stage, seconds)
+        self.send(f"{stage}:{seconds * 1000:.3f}|ms")
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increment the counter."""
+        super().increment(name, value)
+        self.send(f"{name}:{value}|c")
+
+
+def create_collector(config: CampusOnlineRESTConfig) -> MetricsCollector:
+    """Create the metrics collector configured by the config."""
+    if config.metrics == "memory":
+        return InMemoryCollector()
+
+    if config.metrics == "statsd":
+        return StatsdCollector(
+            config.metrics_statsd_host,
+            config.metrics_statsd_port,
+            config.metrics_prefix,
+        )
+
+    return MetricsCollector()
@@ -8,22 +8,50 @@
 
 """Models."""
 
+import re
+from collections.abc import Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager
 from datetime import date as Date
+from http import HTTPStatus
 from pathlib import Path
-from shutil import copyfileobj
+from tempfile import gettempdir
+from time import sleep
 from xml.etree.ElementTree import Element, ParseError, fromstring
+from xml.sax.saxutils import escape
 
-from requests import ReadTimeout, get, post
+from requests import ConnectionError as RequestsConnectionError
+from requests import RequestException, Response, Session, Timeout
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import HTTPError
 
 from ..types import (
     URL,
     CampusOnlineID,
     CampusOnlineStatus,
     CampusOnlineToken,
-    FilePath,
+    ConnectionStats,
     ThesesFilter,
 )
+from .cache import LRUCache, RedisCache, ResponseCache
 from .config import CampusOnlineRESTConfig
+from .metrics import create_collector, stage_of
+from .parsing import get_backend
+from .ratelimit import create_limiter
+from .resilience import RETRY_STATUS, CircuitBreaker, RetryPolicy
+from .storage import (
+    DownloadStore,
+    PendingFile,
+    content_length,
+    prepare_partial_file,
+    resume_headers,
+)
+
+try:
+    from redis import Redis
+except ImportError:
+    Redis = None
 
 
 class CampusOnlineRESTError(Exception):
@@ -32,6 +60,121 @@ class CampusOnlineRESTError(Exception):
     def __init__(self, code: int, msg: str) -> None:
         """Create CampusOnline rest error."""
         super().__init__(f"CampusOnline REST error code={code} msg='{msg}'")
+        self.code = code
+
+
+class ReuseCountingMixin:
+    """Count how often a pooled connection is checked out already connected."""
+
+    num_checkouts = 0
+    num_reused = 0
+
+    def _get_conn(self, timeout: float | None = None) -> HTTPConnection:
+        """Get connection and count whether it is still connected."""
+        conn = super()._get_conn(timeout)
+        self.num_checkouts += 1
+        if conn.sock is not None:
+            self.num_reused += 1
+        return conn
+
+
+class ReuseCountingHTTPConnectionPool(ReuseCountingMixin, HTTPConnectionPool):
+    """Http connection pool counting reused connections."""
+
+
+class ReuseCountingHTTPSConnectionPool(ReuseCountingMixin, HTTPSConnectionPool):
+    """Https connection pool counting reused connections."""
+
+
+class CampusOnlineHTTPAdapter(HTTPAdapter):
+    """Http adapter using the reuse counting connection pools."""
+
+    def init_poolmanager(self, *args: list, **kwargs: dict) -> None:
+        """Initialize the pool manager."""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": ReuseCountingHTTPConnectionPool,
+            "https": ReuseCountingHTTPSConnectionPool,
+        }
+
+    @property
+    def stats(self) -> ConnectionStats:
+        """Get the statistics of the currently pooled connections."""
+        pools = self.poolmanager.pools
+        checkouts = reused = 0
+        for key in pools.keys():  # noqa: SIM118
+            pool = pools[key]
+            checkouts += pool.num_checkouts
+            reused += pool.num_reused
+        return ConnectionStats(checkouts, reused)
+
+
+SOAP_NAMESPACES = (
+    'xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" '
+    'xmlns:bas="http://www.campusonline.at/thesisservice/basetypes"'
+)
+
+
+def validate_theses_filter(theses_filter: ThesesFilter | str | None) -> bytes:
+    """Check that the theses filter is a well-formed xml fragment.
+
+    The theses filter is inserted into the request as xml, also if it is
+    given as str, a filter which is not well-formed would change the
+    structure of the envelope.
+    """
+    fragment = str(theses_filter) if theses_filter is not None else ""
+    try:
+        fromstring(f"<bas:filter {SOAP_NAMESPACES}>{fragment}</bas:filter>")
+    except ParseError as exc:
+        msg = f"theses filter is not a well-formed xml fragment: {exc}"
+        raise ValueError(msg) from exc
+    return fragment.encode()
+
+
+class EnvelopeTemplate:
+    """Soap envelope which is pre-rendered up to the values of the request.
+
+    The fields are a compact xml string with {name} placeholders. The static
+    parts are rendered and encoded once, render only escapes and inserts
+    the values. The values of the markup placeholders are inserted as xml.
+    """
+
+    def __init__(
+        self,
+        request: str,
+        token: CampusOnlineToken,
+        fields: str,
+        markup: tuple[str, ...] = (),
+    ) -> None:
+        """Construct."""
+        head = (
+            f"<soapenv:Envelope {SOAP_NAMESPACES}><soapenv:Header/><soapenv:Body>"
+            f"<bas:{request}><bas:token>{escape(token)}</bas:token>"
+        )
+        tail = f"</bas:{request}></soapenv:Body></soapenv:Envelope>"
+
+        parts = re.split(r"{(\w+)}", fields)
+        self.static = [part.encode() for part in parts[0::2]]
+        self.static[0] = head.encode() + self.static[0]
+        self.static[-1] += tail.encode()
+        self.names = parts[1::2]
+        self.markup = markup
+
+    def render(self, **values: str | ThesesFilter | None) -> bytes:
+        """Render the envelope with the escaped values.
+
+        The value of a markup placeholder is inserted as xml after it has
+        been validated.
+        """
+        chunks = [self.static[0]]
+        for name, static in zip(self.names, self.static[1:], strict=True):
+            value = values[name]
+            if name in self.markup:
+                chunks.append(validate_theses_filter(value))
+            else:
+                chunks.append(escape(str(value)).encode())
+            chunks.append(static)
+        return b"".join(chunks)
 
 
 class CampusOnlineRESTPOSTXML:
@@ -40,97 +183,63 @@ class CampusOnlineRESTPOSTXML:
     def __init__(self, token: CampusOnlineToken) -> None:
         """Construct."""
         self.token = token
+        self.status_template = EnvelopeTemplate(
+            "setThesisStatusByIDRequest",
+            token,
+            "<bas:ID>{cms_id}</bas:ID>"
+            "<bas:status>{status}</bas:status>"
+            "<bas:statusDate>{date}</bas:statusDate>",
+        )
+        self.metadata_template = EnvelopeTemplate(
+            "getMetadataByThesisIDRequest",
+            token,
+            '<bas:ID>{cms_id}</bas:ID><bas:attr key="ALL"/>'
+            '<bas:classAttrKeySet><bas:name>text</bas:name><bas:attr key="ALL"/>'
+            "</bas:classAttrKeySet>"
+            '<bas:classAttrKeySet><bas:name>author</bas:name><bas:attr key="ALL"/>'
+            "</bas:classAttrKeySet>"
+            "<bas:classAttrKeySet><bas:name>supervisor</bas:name>"
+            '<bas:attr key="ALL"/></bas:classAttrKeySet>',
+        )
+        self.download_template = EnvelopeTemplate(
+            "getDocumentByThesisIDRequest",
+            token,
+            "<bas:ID>{cms_id}</bas:ID><bas:docType>VOLLTEXT</bas:docType>",
+        )
+        self.ids_template = EnvelopeTemplate(
+            "getAllThesesMetadataRequest",
+            token,
+            "{theses_filter}",
+            markup=("theses_filter",),
+        )
 
     def create_request_body_status(
         self,
         campusonline_id: CampusOnlineID,
         status: CampusOnlineStatus,
         date: str,
-    ) -> str:
+    ) -> bytes:
         """Create request body status."""
-        body = f"""
-        <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
-                          xmlns:bas="http://www.campusonline.at/thesisservice/basetypes">
-          <soapenv:Header/>
-          <soapenv:Body>
-            <bas:setThesisStatusByIDRequest>
-              <bas:token>{self.token}</bas:token>
-              <bas:ID>{campusonline_id}</bas:ID>
-              <bas:status>{status}</bas:status>
-              <bas:statusDate>{date}</bas:statusDate>
-            </bas:setThesisStatusByIDRequest>
-          </soapenv:Body>
-        </soapenv:Envelope>
-        """
-        return body
+        return self.status_template.render(
+            cms_id=campusonline_id,
+            status=status,
+            date=date,
+        )
 
-    def create_request_body_metadata(self, campusonline_id: CampusOnlineID) -> str:
+    def create_request_body_metadata(self, campusonline_id: CampusOnlineID) -> bytes:
         """Build Request."""
-        body = f"""
-        <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
-                          xmlns:bas="http://www.campusonline.at/thesisservice/basetypes">
-          <soapenv:Header/>
-          <soapenv:Body>
-            <bas:getMetadataByThesisIDRequest>
-              <bas:token>{self.token}</bas:token>
-              <bas:ID>{campusonline_id}</bas:ID>
-              <bas:attr key="ALL"/>
-              <bas:classAttrKeySet>
-                <bas:name>text</bas:name>
-                <bas:attr key="ALL"/>
-              </bas:classAttrKeySet>
-              <bas:classAttrKeySet>
-                <bas:name>author</bas:name>
-                <bas:attr key="ALL"/>
-              </bas:classAttrKeySet>
-              <bas:classAttrKeySet>
-                <bas:name>supervisor</bas:name>
-                <bas:attr key="ALL"/>
-              </bas:classAttrKeySet>
-            </bas:getMetadataByThesisIDRequest>
-          </soapenv:Body>
-        </soapenv:Envelope>
-        """
+        return self.metadata_template.render(cms_id=campusonline_id)
 
-        return body
-
-    def create_request_body_download(self, campusonline_id: CampusOnlineID) -> str:
+    def create_request_body_download(self, campusonline_id: CampusOnlineID) -> bytes:
         """Build Request."""
-        body = f"""
-        <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
-                      xmlns:bas="http://www.campusonline.at/thesisservice/basetypes">
-          <soapenv:Header/>
-          <soapenv:Body>
-            <bas:getDocumentByThesisIDRequest>
-              <bas:token>{self.token}</bas:token>
-              <bas:ID>{campusonline_id}</bas:ID>
-              <bas:docType>VOLLTEXT</bas:docType>
-            </bas:getDocumentByThesisIDRequest>
-          </soapenv:Body>
-        </soapenv:Envelope>
-        """
-
-        return body
+        return self.download_template.render(cms_id=campusonline_id)
 
     def create_request_body_ids(
         self,
-        theses_filter: ThesesFilter,
-    ) -> str:
+        theses_filter: ThesesFilter | str | None,
+    ) -> bytes:
         """Build request."""
-        body = f"""
-        <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
-                          xmlns:bas="http://www.campusonline.at/thesisservice/basetypes">
-          <soapenv:Header/>
-          <soapenv:Body>
-            <bas:getAllThesesMetadataRequest>
-              <bas:token>{self.token}</bas:token>
-              {theses_filter}
-            </bas:getAllThesesMetadataRequest>
-          </soapenv:Body>
-        </soapenv:Envelope>
-        """
-
-        return body
+        return self.ids_template.render(theses_filter=theses_filter)
 
     @staticmethod
     def create_request_header(service: str) -> dict:
@@ -141,55 +250,481 @@ class CampusOnlineRESTPOSTXML:
         }
 
 
-class CampusOnlineConnection:
-    """Campusonline connection."""
+class BaseCampusOnlineConnection:
+    """Parts of the connection shared by the sync and the async client.
+
+    The subclasses send the requests with their http client, the base class
+    builds the requests and handles everything which does not wait for the
+    network, like the circuit breaker, the retries, the cache and the
+    download store.
+    """
 
     def __init__(self, config: CampusOnlineRESTConfig) -> None:
         """Construct."""
         self.config = config
         self.post_xml = CampusOnlineRESTPOSTXML(self.config.token)
+        self.xml = get_backend(self.config.xml_backend)
+        self.cache = self.create_cache()
+        self.store = self.create_store()
+        self.metrics = create_collector(self.config)
+        self.retry_policy = RetryPolicy(
+            self.config.retries,
+            self.config.retry_backoff,
+            self.config.retry_max_backoff,
+        )
+        self.download_retry_policy = RetryPolicy(
+            self.config.download_retries,
+            self.config.retry_backoff,
+            self.config.retry_max_backoff,
+        )
+        self.breaker = CircuitBreaker(
+            self.config.circuit_breaker_threshold,
+            self.config.circuit_breaker_reset_timeout,
+        )
+        self.soap_limiter = create_limiter(
+            self.config,
+            "soap",
+            self.config.rate_limit,
+            self.config.rate_limit_burst,
+        )
+        self.download_limiter = create_limiter(
+            self.config,
+            "download",
+            self.config.download_rate_limit,
+            self.config.download_rate_limit_burst,
+        )
 
-    def post(self, data: str, headers: dict[str, str]) -> Element:
-        """Post."""
-        try:
-            response = post(
-                self.config.endpoint,
-                data=data,
-                headers=headers,
-                timeout=10,
-            )
-        except ReadTimeout as exc:
+    def create_cache(self) -> ResponseCache | None:
+        """Create the response cache configured by the config."""
+        ttl = self.config.cache_ttl
+        max_entries = self.config.cache_max_entries
+
+        if self.config.cache == "lru":
+            return LRUCache(ttl, max_entries)
+
+        if self.config.cache == "redis":
+            if Redis is None:
+                msg = "the redis cache needs the redis package"
+                raise RuntimeError(msg)
+            client = Redis.from_url(self.config.cache_redis_url)
+            return RedisCache(client, ttl, max_entries)
+
+        return None
+
+    def create_store(self) -> DownloadStore:
+        """Create the download store configured by the config."""
+        default = Path(gettempdir(), "invenio-campusonline")
+        directory = self.config.download_dir or default
+        return DownloadStore(directory, self.config.download_quota)
+
+    def check_breaker(self) -> None:
+        """Fail immediately if the circuit breaker is open."""
+        if not self.breaker.allow():
+            msg = "circuit breaker is open, campusonline seems to be down"
+            raise CampusOnlineRESTError(code=503, msg=msg)
+
+    def retry_delay(
+        self,
+        delays: Iterator[float],
+        stage: str,
+        code: int,
+        msg: str,
+    ) -> float:
+        """Record the failed attempt and get the delay before the next one.
+
+        The error is raised if there are no retries left.
+        """
+        self.breaker.record_failure()
+        if (delay := next(delays, None)) is None:
+            raise CampusOnlineRESTError(code=code, msg=msg)
+        self.metrics.increment(f"{stage}.retries")
+        return delay
+
+    def download_delay(
+        self,
+        delays: Iterator[float],
+        exc: Exception,
+    ) -> float:
+        """Get the delay before the download is resumed after the error.
+
+        Transfer errors and server errors are retried, the error is raised
+        as CampusOnlineRESTError if there are no retries left.
+        """
+        if isinstance(exc, CampusOnlineRESTError):
+            if exc.code < HTTPStatus.INTERNAL_SERVER_ERROR:
+                raise exc
+            if (delay := next(delays, None)) is None:
+                raise exc
+        elif (delay := next(delays, None)) is None:
             raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
 
+        self.metrics.increment("download.retries")
+        return delay
+
+    def parse(self, response: Response, stage: str) -> Element:
+        """Parse the response and count its bytes."""
+        self.metrics.increment(f"{stage}.bytes", len(response.content))
+
         try:
-            return fromstring(response.text)
-        except ParseError as exc:
+            return self.xml.fromstring(response.content)
+        except self.xml.errors as exc:
             raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
 
-    def post_ids(self, theses_filter: ThesesFilter) -> Element:
-        """Post ids."""
+    def cached(
+        self,
+        service: str,
+        campusonline_id: CampusOnlineID,
+        stage: str,
+    ) -> Element | None:
+        """Get the cached response, None if it is not cached."""
+        if (cached := self.cache.get(service, campusonline_id)) is None:
+            return None
+        self.metrics.increment(f"{stage}.cache_hits")
+        return self.xml.fromstring(cached)
+
+    def cache_response(
+        self,
+        service: str,
+        campusonline_id: CampusOnlineID,
+        root: Element,
+    ) -> None:
+        """Cache the response."""
+        self.cache.set(service, campusonline_id, self.xml.tostring(root))
+
+    def ids_request(self, theses_filter: ThesesFilter) -> tuple[bytes, dict]:
+        """Build the body and the headers of the ids request."""
         body = self.post_xml.create_request_body_ids(theses_filter)
         headers = self.post_xml.create_request_header("getAllThesesMetadataRequest")
-        return self.post(body, headers)
+        return body, headers
 
-    def post_file_url(self, campusonline_id: CampusOnlineID) -> Element:
-        """Post file url."""
+    def file_url_request(self, campusonline_id: CampusOnlineID) -> tuple[bytes, dict]:
+        """Build the body and the headers of the file url request."""
         body = self.post_xml.create_request_body_download(campusonline_id)
         headers = self.post_xml.create_request_header("getDocumentByThesisID")
-        return self.post(body, headers)
+        return body, headers
 
-    def post_metadata(self, campusonline_id: CampusOnlineID) -> Element:
-        """Post metadata."""
+    def metadata_request(self, campusonline_id: CampusOnlineID) -> tuple[bytes, dict]:
+        """Build the body and the headers of the metadata request."""
         body = self.post_xml.create_request_body_metadata(campusonline_id)
         headers = self.post_xml.create_request_header("getMetadataByThesisID")
-        return self.post(body, headers)
+        return body, headers
 
-    def store_file_temporarily(self, file_url: URL, file_path: FilePath) -> None:
-        """Store the file referenced by url to the local file path."""
+    def status_request(
+        self,
+        cms_id: CampusOnlineID,
+        status: CampusOnlineStatus,
+        date: Date,
+    ) -> tuple[bytes, dict]:
+        """Build the body and the headers of the status request."""
+        body = self.post_xml.create_request_body_status(cms_id, status, date)
+        headers = self.post_xml.create_request_header("setThesisStatusByIDRequest")
+        return body, headers
+
+    def prepare_store(
+        self,
+        cms_id: CampusOnlineID,
+        pending: PendingFile,
+        status: int,
+        reason: str,
+        headers: Mapping[str, str],
+    ) -> tuple[Path | None, int | None]:
+        """Handle the download response before its body is stored.
+
+        Returns the stored file if it can be reused and the size of the
+        file. The partial file is prepared for the body otherwise.
+        """
+        etag = headers.get("ETag")
+
+        if status == HTTPStatus.NOT_MODIFIED:
+            pending.discard()
+            if path := self.store.lookup(cms_id, etag):
+                return path, None
+            msg = f"file of {cms_id} is not modified, but not stored anymore"
+            raise CampusOnlineRESTError(code=status, msg=msg)
+
+        if status >= HTTPStatus.BAD_REQUEST:
+            raise CampusOnlineRESTError(status, reason)
+
+        size = prepare_partial_file(pending, status, headers)
+
+        reusable = status == HTTPStatus.OK and etag
+        if reusable and (path := self.store.lookup(cms_id, etag, size)):
+            pending.discard()
+            return path, size
+
+        return None, size
+
+
+class CampusOnlineConnection(BaseCampusOnlineConnection):
+    """Campusonline connection."""
+
+    def __init__(self, config: CampusOnlineRESTConfig) -> None:
+        """Construct."""
+        super().__init__(config)
+        self.session = self.create_session()
+
+    def create_session(self) -> Session:
+        """Create the pooled http session shared by all requests."""
+        adapter = CampusOnlineHTTPAdapter(
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+            pool_block=self.config.pool_block,
+        )
+        session = Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        if not self.config.keep_alive:
+            session.headers["Connection"] = "close"
+
+        return session
+
+    @property
+    def stats(self) -> ConnectionStats:
+        """Get the connection reuse statistics of the session."""
+        stats = ConnectionStats()
+        for adapter in set(self.session.adapters.values()):
+            stats += adapter.stats
+        return stats
+
+    def close(self) -> None:
+        """Close the session and all pooled connections."""
+        self.session.close()
+
+    def send(
+        self,
+        data: bytes,
+        headers: dict[str, str],
+        *,
+        idempotent: bool = True,
+        stream: bool = False,
+    ) -> Response:
+        """Send the request through the circuit breaker.
+
+        Connection errors, timeouts and the status codes of RETRY_STATUS
+        are retried with backoff, but only for idempotent requests. Any
+        other error of requests counts as failure and is raised as
+        CampusOnlineRESTError, a local error ends the attempt without an
+        outcome.
+        """
+        delays = self.retry_policy.delays() if idempotent else iter(())
+        stage = stage_of(headers)
+
+        while True:
+            self.check_breaker()
+
+            try:
+                if self.soap_limiter:
+                    self.soap_limiter.acquire()
+
+                response = self.session.post(
+                    self.config.endpoint,
+                    data=data,
+                    headers=headers,
+                    timeout=10,
+                    stream=stream,
+                )
+            except (RequestsConnectionError, Timeout) as exc:
+                code, msg = 550, str(exc)
+            except RequestException as exc:
+                self.breaker.record_failure()
+                raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+            except BaseException:
+                self.breaker.abort()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    return response
+                response.close()
+                code, msg = response.status_code, response.reason
+
+            sleep(self.retry_delay(delays, stage, code, msg))
+
+    def post(
+        self,
+        data: bytes,
+        headers: dict[str, str],
+        *,
+        idempotent: bool = True,
+    ) -> Element:
+        """Post."""
+        stage = stage_of(headers)
+        with self.metrics.timer(stage):
+            response = self.send(data, headers, idempotent=idempotent)
+            return self.parse(response, stage)
+
+    def post_cached(
+        self,
+        service: str,
+        campusonline_id: CampusOnlineID,
+        data: bytes,
+        headers: dict[str, str],
+    ) -> Element:
+        """Post and cache the response per service and campusonline id."""
+        if self.cache is None:
+            return self.post(data, headers)
+
+        stage = stage_of(headers)
+        with self.metrics.timer(stage):
+            if (root := self.cached(service, campusonline_id, stage)) is not None:
+                return root
+
+            root = self.parse(self.send(data, headers), stage)
+            self.cache_response(service, campusonline_id, root)
+            return root
+
+    @contextmanager
+    def post_streamed(
+        self,
+        data: bytes,
+        headers: dict[str, str],
+    ) -> Iterator[Iterator[bytes]]:
+        """Post and provide the response body as a stream of chunks.
+
+        The stage is timed until the stream is closed, which includes the
+        parsing of the chunks. An error of requests while the body is
+        received is raised as CampusOnlineRESTError.
+        """
+        stage = stage_of(headers)
+        with self.metrics.timer(stage):
+            response = self.send(data, headers, stream=True)
+
+            with response:
+                chunks = response.iter_content(chunk_size=64 * 1024)
+                try:
+                    yield self.count_bytes(chunks, stage)
+                except RequestException as exc:
+                    raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+
+    def count_bytes(self, chunks: Iterator[bytes], stage: str) -> Iterator[bytes]:
+        """Count the bytes of the chunks while they are received."""
+        for chunk in chunks:
+            self.metrics.increment(f"{stage}.bytes", len(chunk))
+            yield chunk
+
+    def post_ids(self, theses_filter: ThesesFilter) -> Element:
+        """Post ids."""
+        return self.post(*self.ids_request(theses_filter))
+
+    def post_ids_streamed(
+        self,
+        theses_filter: ThesesFilter,
+    ) -> AbstractContextManager[Iterator[bytes]]:
+        """Post ids and provide the response as a stream of chunks."""
+        return self.post_streamed(*self.ids_request(theses_filter))
+
+    def post_file_url(self, campusonline_id: CampusOnlineID) -> Element:
+        """Post file url."""
+        request = self.file_url_request(campusonline_id)
+        return self.post_cached("getDocumentByThesisID", campusonline_id, *request)
+
+    def post_metadata(self, campusonline_id: CampusOnlineID) -> Element:
+        """Post metadata."""
+        request = self.metadata_request(campusonline_id)
+        return self.post_cached("getMetadataByThesisID", campusonline_id, *request)
+
+    def download(self, cms_id: CampusOnlineID, file_url: URL) -> Path:
+        """Download the file into the download store.
+
+        A stored file is reused if campusonline answers the conditional
+        request with not modified or the etag and the size of the response
+        match the stored file. An interrupted download is resumed with a
+        range request from the end of the partial file, up to
+        download_retries times with the backoff of the soap requests. A
+        server error is retried the same way. If all attempts fail, the
+        partial file is kept, so that the next import resumes it.
+        """
         file_url = f"{file_url}{self.config.token}"
-        with get(file_url, stream=True, timeout=10) as response:
-            with Path(file_path).open("wb") as fp:
-                copyfileobj(response.raw, fp)
+        pending = self.store.open(cms_id)
+        delays = self.download_retry_policy.delays()
+
+        try:
+            with self.metrics.timer("download"):
+                while True:
+                    try:
+                        return self.download_range(cms_id, file_url, pending)
+                    except (RequestException, HTTPError, CampusOnlineRESTError) as exc:
+                        sleep(self.download_delay(delays, exc))
+        finally:
+            pending.close()
+
+    def head_file(self, file_url: URL) -> int | None:
+        """Get the size of the file by a HEAD request, None if it is unknown."""
+        if self.download_limiter:
+            self.download_limiter.acquire()
+
+        file_url = f"{file_url}{self.config.token}"
+        timeout = (
+            self.config.download_connect_timeout,
+            self.config.download_read_timeout,
+        )
+        with self.metrics.timer("head"):
+            try:
+                response = self.session.head(
+                    file_url,
+                    timeout=timeout,
+                    allow_redirects=True,
+                )
+            except RequestException as exc:
+                raise CampusOnlineRESTError(code=550, msg=str(exc)) from exc
+
+        if response.status_code >= HTTPStatus.BAD_REQUEST:
+            raise CampusOnlineRESTError(response.status_code, response.reason)
+        return content_length(response.headers)
+
+    def download_range(
+        self,
+        cms_id: CampusOnlineID,
+        file_url: URL,
+        pending: PendingFile,
+    ) -> Path:
+        """Download the rest of the file, starting at the end of the partial file."""
+        if self.download_limiter:
+            self.download_limiter.acquire()
+
+        headers = resume_headers(self.store.entry(cms_id), pending)
+        timeout = (
+            self.config.download_connect_timeout,
+            self.config.download_read_timeout,
+        )
+
+        with self.session.get(
+            file_url,
+            headers=headers,
+            stream=True,
+            timeout=timeout,
+        ) as response:
+            if response.status_code != HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+                return self.store_response(cms_id, pending, response)
+
+        pending.reset()
+        return self.download_range(cms_id, file_url, pending)
+
+    def store_response(
+        self,
+        cms_id: CampusOnlineID,
+        pending: PendingFile,
+        response: Response,
+    ) -> Path:
+        """Store the body of the download response."""
+        path, size = self.prepare_store(
+            cms_id,
+            pending,
+            response.status_code,
+            response.reason,
+            response.headers,
+        )
+        if path is not None:
+            return path
+
+        chunk_size = self.config.download_chunk_size
+        for chunk in response.raw.stream(chunk_size, decode_content=False):
+            pending.write(chunk)
+            self.metrics.increment("download.bytes", len(chunk))
+
+        etag = response.headers.get("ETag") or pending.etag
+        return self.store.commit(cms_id, pending, etag, size)
 
     def post_status(
         self,
@@ -198,6 +733,5 @@ class CampusOnlineConnection:
         date: Date,
     ) -> Element:
         """Post status."""
-        body = self.post_xml.create_request_body_status(cms_id, status, date)
-        headers = self.post_xml.create_request_header("setThesisStatusByIDRequest")
-        return self.post(body, headers)
+        body, headers = self.status_request(cms_id, status, date)
+        return self.post(body, headers, idempotent=False)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Xml backends and precompiled queries.
+
+The responses are parsed with xml.etree.ElementTree of the standard
+library by default. lxml is used with the backend lxml, or with auto if it
+is installed, install it with ``pip install invenio-campusonline[lxml]``.
+"""
+
+from collections.abc import Iterable
+from xml.etree import ElementTree as ET
+from xml.etree.ElementTree import Element, XMLPullParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+NS = "http://www.campusonline.at/thesisservice/basetypes"
+
+
+class StdlibBackend:
+    """Xml backend of the standard library."""
+
+    name = "stdlib"
+    errors: tuple[type[Exception], ...] = (ET.ParseError,)
+
+    @staticmethod
+    def fromstring(data: str | bytes) -> Element:
+        """Parse the document."""
+        return ET.fromstring(data)
+
+    @staticmethod
+    def tostring(element: Element) -> bytes:
+        """Serialize the element."""
+        return ET.tostring(element)
+
+    @staticmethod
+    def pull_parser(_: Iterable[str]) -> XMLPullParser:
+        """Create an incremental parser reporting all start and end events."""
+        return XMLPullParser(events=("start", "end"))
+
+    @staticmethod
+    def parent(_: Element) -> None:
+        """Elements of the standard library don't know their parent."""
+
+
+class LXMLBackend:
+    """Xml backend of lxml."""
+
+    name = "lxml"
+    errors: tuple[type[Exception], ...] = (
+        ET.ParseError,
+        etree.XMLSyntaxError if etree else ET.ParseError,
+    )
+
+    @staticmethod
+    def fromstring(data: str | bytes) -> Element:
+        """Parse the document."""
+        if isinstance(data, str):
+            data = data.encode()
+        return etree.fromstring(data)
+
+    @staticmethod
+    def tostring(element: Element) -> bytes:
+        """Serialize the element."""
+        return etree.tostring(element)
+
+    @staticmethod
+    def pull_parser(tags: Iterable[str]) -> XMLPullParser:
+        """Create an incremental parser reporting the end events of the tags."""
+        return etree.XMLPullParser(events=("end",), tag=tags)
+
+    @staticmethod
+    def parent(element: Element) -> Element | None:
+        """Get the parent of the element."""
+        return element.getparent()
+
+
+XMLBackend = StdlibBackend | LXMLBackend
+
+
+def get_backend(name: str = "stdlib") -> XMLBackend:
+    """Get the xml backend by name.
+
+    auto uses lxml if it is installed and falls back to the standard
+    library otherwise.
+    """
+    if name == "stdlib" or (name == "auto" and etree is None):
+        return StdlibBackend()
+
+    if name in ("lxml", "auto"):
+        if etree is None:
+            msg = "the lxml xml backend needs lxml, install invenio-campusonline[lxml]"
+            raise RuntimeError(msg)
+        return LXMLBackend()
+
+    msg = f"unknown xml backend {name}, use auto, lxml or stdlib"
+    raise RuntimeError(msg)
+
+
+def tostring(element: Element) -> str:
+    """Serialize the element of either backend."""
+    if etree is not None and etree.iselement(element):
+        return etree.tostring(element, encoding="unicode")
+    return ET.tostring(element, encoding="unicode")
+
+
+class Query:
+    """Precompiled query of the first descendant with tag and attribute key.
+
+    ElementTree elements of the standard library are searched with the
+    ElementPath expression built once in the constructor. lxml elements are
+    searched with iterdescendants, which walks the tree in C and is faster
+    than an ETXPath expression on the small trees of a thesis.
+    """
+
+    def __init__(self, tag: str, key: str | None = None) -> None:
+        """Construct."""
+        self.tag = tag
+        self.key = key
+        self.path = f".//{tag}" if key is None else f".//{tag}[@key='{key}']"
+
+    def first(self, element: Element) -> Element | None:
+        """Find the first descendant matching the query."""
+        if etree is None or not etree.iselement(element):
+            return element.find(self.path)
+
+        for found in element.iterdescendants(self.tag):
+            if self.key is None or found.get("key") == self.key:
+                return found
+        return None
+
+
+DOC_URL = Query(f"{{{NS}}}docUrl")
+DOCUMENT = Query(f"{{{NS}}}document")
+THESIS = Query(f"{{{NS}}}thesis")
+FAULTSTRING = Query("faultstring")
+EMBARGO_START = Query(f"{{{NS}}}attr", key="SPVON")
+EMBARGO_END = Query(f"{{{NS}}}attr", key="SPBIS")
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Client side rate limiters."""
+
+import asyncio
+from abc import ABC, abstractmethod
+from threading import Lock
+from time import monotonic, sleep
+
+from .config import CampusOnlineRESTConfig
+
+try:
+    from redis import Redis
+except ImportError:
+    Redis = None
+
+
+class RateLimiter(ABC):
+    """Base class of the rate limiters.
+
+    reserve takes a token if one is available and returns 0, otherwise it
+    returns the seconds to wait before trying again.
+    """
+
+    @abstractmethod
+    def reserve(self) -> float:
+        """Take a token or get the seconds to wait for the next one."""
+
+    def acquire(self) -> None:
+        """Block until a token is taken."""
+        while (wait := self.reserve()) > 0:
+            sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Wait until a token is taken without blocking the event loop."""
+        while True:
+            wait = await asyncio.to_thread(self.reserve)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class TokenBucket(RateLimiter):
+    """Token bucket shared by all threads of the process.
+
+    The bucket holds up to burst tokens and is refilled with rate tokens per
+    second, so short bursts are allowed while the average stays at rate.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """Construct."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    def reserve(self) -> float:
+        """Take a token or get the seconds to wait for the next one."""
+        with self.lock:
+            now = monotonic()
+            elapsed = now - self.updated
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+
+            return (1 - self.tokens) / self.rate
+
+
+BUCKET_SCRIPT = """
+local now = redis.call("TIME")
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+"""Token bucket in redis, refilled and taken from atomically."""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Rate limiter shared by all celery workers through a redis server.
+
+    The token bucket is a redis hash of the tokens and the time of the last
+    refill. A lua script refills it and takes a token in one atomic step
+    with the clock of the redis server, so the limit holds across the
+    workers like the TokenBucket within a process. The hash expires once
+    the bucket would be full again.
+    """
+
+    def __init__(
+        self,
+        client: "Redis",
+        name: str,
+        rate: float,
+        burst: int = 1,
+        prefix: str = "campusonline:ratelimit",
+    ) -> None:
+        """Construct."""
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.key = f"{prefix}:{name}"
+        self.script = client.register_script(BUCKET_SCRIPT)
+
+    def reserve(self) -> float:
+        """Take a token or get the seconds to wait for the next one."""
+        wait = self.script(keys=[self.key], args=[self.rate, self.burst])
+        return float(wait)
+
+
+def create_limiter(
+    config: CampusOnlineRESTConfig,
+    name: str,
+    rate: float | None,
+    burst: int,
+) -> RateLimiter | None:
+    """Create the rate limiter of the budget name configured by the config."""
+    if not rate:
+        return None
+
+    if config.rate_limit_backend == "redis":
+        if Redis is None:
+            msg = "the shared rate limiter needs the redis package"
+            raise RuntimeError(msg)
+        client = Redis.from_url(config.rate_limit_redis_url)
+        return RedisRateLimiter(client, name, rate, burst)
+
+    return TokenBucket(rate, burst)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Retry and circuit breaker for the requests to campusonline."""
+
+from collections.abc import Iterator
+from http import HTTPStatus
+from random import uniform
+from threading import Lock
+from time import monotonic
+
+RETRY_STATUS = frozenset(
+    {
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    },
+)
+"""Status codes of transient failures.
+
+A 500 is not retried, because campusonline answers soap faults with it.
+"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+    ) -> None:
+        """Construct."""
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delays(self) -> Iterator[float]:
+        """Yield the delay before each retry.
+
+        The delay is drawn uniformly up to the exponentially growing
+        backoff, so that many workers failing at the same time do not retry
+        at the same time.
+        """
+        for attempt in range(self.retries):
+            backoff = min(self.max_backoff, self.backoff * 2**attempt)
+            yield uniform(0, backoff)  # noqa: S311
+
+
+class CircuitBreaker:
+    """Stop calling campusonline after too many consecutive failures.
+
+    After threshold consecutive failures the circuit opens and all requests
+    fail immediately. After reset_timeout seconds one trial request is let
+    through, its success closes the circuit again, its failure opens it for
+    another reset_timeout seconds. The sender has to end each request with
+    record_success, record_failure or abort, otherwise the trial never ends.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 60) -> None:
+        """Construct."""
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial = False
+        self.lock = Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Check whether the circuit is open."""
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+
+            if self.trial or monotonic() - self.opened_at < self.reset_timeout:
+                return False
+
+            self.trial = True
+            return True
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def abort(self) -> None:
+        """End the trial without an outcome, e.g. after a local error.
+
+        The next request after the abort is the trial instead.
+        """
+        with self.lock:
+            self.trial = False
+
+    def record_failure(self) -> None:
+        """Count the failure and open the circuit if the threshold is reached."""
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                self.opened_at = monotonic()
+            self.trial = False
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Download store."""
+
+import json
+from collections.abc import Iterable, Mapping
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from fcntl import LOCK_EX, LOCK_NB, flock
+from functools import partial
+from hashlib import sha256
+from http import HTTPStatus
+from os import fstat, fsync, utime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import BinaryIO
+
+from ..types import CampusOnlineID
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """Index entry of a stored file."""
+
+    checksum: str
+    size: int
+    etag: str | None = None
+
+
+class PendingFile:
+    """File which is written to the temporary directory of the store.
+
+    The file is opened in append mode, the content of an already existing
+    partial file is kept and taken into account for checksum and size, so
+    that an interrupted download can be resumed. The etag of the download
+    is kept next to the file to verify that the resumed download is still
+    the same file.
+    """
+
+    def __init__(self, fp: BinaryIO) -> None:
+        """Construct."""
+        self.fp = fp
+        self.path = Path(fp.name)
+        self.etag_path = self.path.with_suffix(".etag")
+        self.checksum = sha256()
+        self.size = 0
+
+        fp.seek(0)
+        for block in iter(partial(fp.read, 1024 * 1024), b""):
+            self.checksum.update(block)
+            self.size += len(block)
+
+    @property
+    def etag(self) -> str | None:
+        """Get the etag of the partially downloaded file."""
+        try:
+            return self.etag_path.read_text() or None
+        except FileNotFoundError:
+            return None
+
+    @etag.setter
+    def etag(self, etag: str | None) -> None:
+        """Set the etag of the partially downloaded file."""
+        self.etag_path.write_text(etag or "")
+
+    def write(self, chunk: bytes) -> None:
+        """Write the chunk and update checksum and size."""
+        self.fp.write(chunk)
+        self.checksum.update(chunk)
+        self.size += len(chunk)
+
+    def reset(self) -> None:
+        """Remove the content to start the download from the beginning."""
+        self.fp.truncate(0)
+        self.checksum = sha256()
+        self.size = 0
+        self.etag_path.unlink(missing_ok=True)
+
+    def sync(self) -> None:
+        """Flush the file to the disk."""
+        self.fp.flush()
+        fsync(self.fp.fileno())
+
+    def close(self) -> None:
+        """Close the file and release the lock."""
+        self.fp.close()
+
+    def discard(self) -> None:
+        """Remove and close the file."""
+        self.path.unlink(missing_ok=True)
+        self.etag_path.unlink(missing_ok=True)
+        self.fp.close()
+
+
+class DownloadStore:
+    """Content addressed store of the downloaded files.
+
+    The files are written to a partial file first and moved into
+    objects/<sha256>/<cms_id>.pdf after the size was validated, so that
+    concurrent downloads never see partially written files. A partial file
+    left behind by an interrupted download is resumed by the next one. The index maps
+    the campusonline id to the checksum, the size and the etag of the last
+    download, which allows to reuse the file if it did not change. If the
+    store grows above the quota, the least recently used files are evicted.
+    The quota includes the partial files. A file used within the last grace
+    seconds is kept, because it may still be read by the import.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        quota: int | None = None,
+        grace: float = 600,
+    ) -> None:
+        """Construct."""
+        self.directory = Path(directory)
+        self.quota = quota
+        self.grace = grace
+        self.objects = self.directory / "objects"
+        self.index = self.directory / "index"
+        self.tmp = self.directory / "tmp"
+
+        for path in (self.objects, self.index, self.tmp):
+            path.mkdir(parents=True, exist_ok=True)
+
+    def path(self, cms_id: CampusOnlineID, entry: StoredFile) -> Path:
+        """Get the path of the stored file."""
+        return self.objects / entry.checksum / f"{cms_id}.pdf"
+
+    def entry(self, cms_id: CampusOnlineID) -> StoredFile | None:
+        """Get the index entry of the campusonline id."""
+        try:
+            data = json.loads((self.index / f"{cms_id}.json").read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        return StoredFile(**data)
+
+    def lookup(
+        self,
+        cms_id: CampusOnlineID,
+        etag: str | None = None,
+        size: int | None = None,
+    ) -> Path | None:
+        """Get the path of the stored file if it is still valid.
+
+        The file is valid if it has the indexed size and, if given, the etag
+        and the size of the current response match the indexed values. An
+        etag only matches the same etag, a file stored without etag is not
+        reused for a response with etag.
+        """
+        entry = self.entry(cms_id)
+        if entry is None:
+            return None
+
+        if etag is not None and etag != entry.etag:
+            return None
+        if size is not None and size != entry.size:
+            return None
+
+        path = self.path(cms_id, entry)
+        try:
+            if path.stat().st_size != entry.size:
+                return None
+        except FileNotFoundError:
+            return None
+
+        utime(path)
+        return path
+
+    def open(self, cms_id: CampusOnlineID) -> PendingFile:
+        """Open and lock the partial file of the campusonline id.
+
+        If a concurrent download of the same file holds the lock, open waits
+        until it is finished. The partial file may have been moved into the
+        store or removed by then, in that case a new partial file is opened.
+        """
+        path = self.tmp / f"{cms_id}.part"
+        while True:
+            fp = path.open("a+b")
+            flock(fp, LOCK_EX)
+            try:
+                if fstat(fp.fileno()).st_ino == path.stat().st_ino:
+                    return PendingFile(fp)
+            except FileNotFoundError:
+                pass
+            fp.close()
+
+    def store(
+        self,
+        cms_id: CampusOnlineID,
+        chunks: Iterable[bytes],
+        etag: str | None = None,
+        size: int | None = None,
+    ) -> Path:
+        """Store the chunks as the file of the campusonline id."""
+        pending = self.open(cms_id)
+        pending.reset()
+        try:
+            for chunk in chunks:
+                pending.write(chunk)
+        except BaseException:
+            pending.discard()
+            raise
+        return self.commit(cms_id, pending, etag, size)
+
+    def commit(
+        self,
+        cms_id: CampusOnlineID,
+        pending: PendingFile,
+        etag: str | None = None,
+        size: int | None = None,
+    ) -> Path:
+        """Validate the size and move the written file into the store.
+
+        The file is moved before it is closed, so that the lock is held
+        until nobody can resume the partial file anymore.
+        """
+        pending.sync()
+
+        if size is not None and pending.size != size:
+            pending.discard()
+            msg = f"file of {cms_id} has {pending.size} bytes instead of {size}"
+            raise RuntimeError(msg)
+
+        entry = StoredFile(pending.checksum.hexdigest(), pending.size, etag)
+        path = self.path(cms_id, entry)
+        path.parent.mkdir(exist_ok=True)
+        pending.path.replace(path)
+        pending.etag_path.unlink(missing_ok=True)
+        pending.close()
+        self.write_entry(cms_id, entry)
+        self.evict(keep=path)
+        return path
+
+    def write_entry(self, cms_id: CampusOnlineID, entry: StoredFile) -> None:
+        """Write the index entry atomically."""
+        with NamedTemporaryFile("w", dir=self.tmp, delete=False) as fp:
+            json.dump(asdict(entry), fp)
+        Path(fp.name).replace(self.index / f"{cms_id}.json")
+
+    def evict(self, keep: Path | None = None) -> None:
+        """Remove the least recently used files until the quota is kept.
+
+        The stored files and the partial files are evicted alike, except
+        for keep, the files used within the grace period and the partial
+        files of running downloads.
+        """
+        if self.quota is None:
+            return
+
+        files = []
+        for path in [*self.objects.glob("*/*"), *self.tmp.glob("*.part")]:
+            try:
+                files.append((path.stat(), path))
+            except FileNotFoundError:
+                continue
+        total = sum(stat.st_size for stat, _ in files)
+        recent = time() - self.grace
+
+        for stat, path in sorted(files, key=lambda file: file[0].st_mtime):
+            if total <= self.quota:
+                break
+            if path == keep or stat.st_mtime > recent:
+                continue
+            if path.suffix == ".part":
+                if not self.remove_partial(path):
+                    continue
+            else:
+                path.unlink(missing_ok=True)
+                with suppress(OSError):
+                    path.parent.rmdir()
+            total -= stat.st_size
+
+    def remove_partial(self, path: Path) -> bool:
+        """Remove the partial file unless it is locked by a running download."""
+        try:
+            fp = path.open("rb")
+        except FileNotFoundError:
+            return False
+        with fp:
+            try:
+                flock(fp, LOCK_EX | LOCK_NB)
+            except BlockingIOError:
+                return False
+            path.unlink(missing_ok=True)
+            path.with_suffix(".etag").unlink(missing_ok=True)
+        return True
+
+
+def resume_headers(entry: StoredFile | None, pending: PendingFile) -> dict[str, str]:
+    """Build the headers to resume the partial file or revalidate the stored file.
+
+    If-Range makes sure that the rest of the file is only sent if the file
+    did not change since the partial file was started.
+    """
+    if pending.size:
+        headers = {"Range": f"bytes={pending.size}-"}
+        if pending.etag:
+            headers["If-Range"] = pending.etag
+        return headers
+
+    if entry is not None and entry.etag:
+        return {"If-None-Match": entry.etag}
+
+    return {}
+
+
+def content_length(headers: Mapping[str, str]) -> int | None:
+    """Get the content length of the response, None if it is not sent."""
+    length = headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+
+def prepare_partial_file(
+    pending: PendingFile,
+    status: int,
+    headers: Mapping[str, str],
+) -> int | None:
+    """Prepare the partial file for the response and get the size of the file.
+
+    A partial content response has to continue exactly at the end of the
+    partial file. Any other response contains the whole file, therefore the
+    partial file is started from the beginning.
+    """
+    if status != HTTPStatus.PARTIAL_CONTENT:
+        pending.reset()
+        pending.etag = headers.get("ETag")
+        return content_length(headers)
+
+    unit, _, content_range = headers.get("Content-Range", "").partition(" ")
+    start, _, total = content_range.partition("/")
+    start = start.partition("-")[0]
+
+    if unit != "bytes" or not start.isdigit() or int(start) != pending.size:
+        pending.reset()
+        msg = f"content range {content_range} does not continue {pending.path}"
+        raise RuntimeError(msg)
+
+    return int(total) if total.isdigit() else None
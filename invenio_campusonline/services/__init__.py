@@ -10,10 +10,12 @@
 
 from .config import CampusOnlineRESTServiceConfig
 from .decorators import build_services
+from .pipeline import ImportPipeline
 from .services import CampusOnlineRESTService
 
 __all__ = (
     "CampusOnlineRESTService",
     "CampusOnlineRESTServiceConfig",
+    "ImportPipeline",
     "build_services",
 )
@@ -8,10 +8,12 @@
 
 """Services configs."""
 
+from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import ClassVar
+from typing import Any, ClassVar, Self
 
 from ..records import CampusOnlineAPI, CampusOnlineRESTConfig
+from ..types import URL, CampusOnlineToken
 
 
 @dataclass
@@ -19,3 +21,79 @@ class CampusOnlineRESTServiceConfig(CampusOnlineRESTConfig):
     """Campusonline REST service config."""
 
     api_cls: ClassVar = CampusOnlineAPI
+    """The api class of the sync client."""
+
+    client: str = "sync"
+    """Http client of the requests, sync or async."""
+
+    priority_import_queue: str | None = None
+    """Celery queue of the priority import."""
+
+    priority_import_priority: int = 9
+    """Celery priority of the priority import."""
+
+    priority_import_ttl: int = 3600
+    """Seconds after which the claim of a priority import is outdated."""
+
+    @classmethod
+    def build(
+        cls,
+        app_config: Mapping[str, Any],
+        endpoint: URL = "",
+        token: CampusOnlineToken = "",
+    ) -> Self:
+        """Build the service config from the application config."""
+        return cls(
+            endpoint=endpoint or app_config["CAMPUSONLINE_ENDPOINT"],
+            token=token or app_config["CAMPUSONLINE_TOKEN"],
+            client=app_config["CAMPUSONLINE_CLIENT"],
+            pool_connections=app_config["CAMPUSONLINE_POOL_CONNECTIONS"],
+            pool_maxsize=app_config["CAMPUSONLINE_POOL_MAXSIZE"],
+            pool_block=app_config["CAMPUSONLINE_POOL_BLOCK"],
+            keep_alive=app_config["CAMPUSONLINE_KEEP_ALIVE"],
+            cache=app_config["CAMPUSONLINE_CACHE"],
+            cache_ttl=app_config["CAMPUSONLINE_CACHE_TTL"],
+            cache_max_entries=app_config["CAMPUSONLINE_CACHE_MAX_ENTRIES"],
+            cache_redis_url=app_config["CAMPUSONLINE_CACHE_REDIS_URL"]
+            or app_config.get("CACHE_REDIS_URL"),
+            download_dir=app_config["CAMPUSONLINE_DOWNLOAD_DIR"],
+            download_quota=app_config["CAMPUSONLINE_DOWNLOAD_QUOTA"],
+            download_chunk_size=app_config["CAMPUSONLINE_DOWNLOAD_CHUNK_SIZE"],
+            download_connect_timeout=app_config[
+                "CAMPUSONLINE_DOWNLOAD_CONNECT_TIMEOUT"
+            ],
+            download_read_timeout=app_config["CAMPUSONLINE_DOWNLOAD_READ_TIMEOUT"],
+            download_retries=app_config["CAMPUSONLINE_DOWNLOAD_RETRIES"],
+            retries=app_config["CAMPUSONLINE_RETRIES"],
+            retry_backoff=app_config["CAMPUSONLINE_RETRY_BACKOFF"],
+            retry_max_backoff=app_config["CAMPUSONLINE_RETRY_MAX_BACKOFF"],
+            circuit_breaker_threshold=app_config[
+                "CAMPUSONLINE_CIRCUIT_BREAKER_THRESHOLD"
+            ],
+            circuit_breaker_reset_timeout=app_config[
+                "CAMPUSONLINE_CIRCUIT_BREAKER_RESET_TIMEOUT"
+            ],
+            rate_limit=app_config["CAMPUSONLINE_RATE_LIMIT"],
+            rate_limit_burst=app_config["CAMPUSONLINE_RATE_LIMIT_BURST"],
+            download_rate_limit=app_config["CAMPUSONLINE_DOWNLOAD_RATE_LIMIT"],
+            download_rate_limit_burst=app_config[
+                "CAMPUSONLINE_DOWNLOAD_RATE_LIMIT_BURST"
+            ],
+            rate_limit_backend=app_config["CAMPUSONLINE_RATE_LIMIT_BACKEND"],
+            rate_limit_redis_url=app_config["CAMPUSONLINE_RATE_LIMIT_REDIS_URL"]
+            or app_config.get("CACHE_REDIS_URL"),
+            xml_backend=app_config["CAMPUSONLINE_XML_BACKEND"],
+            metrics=app_config["CAMPUSONLINE_METRICS"],
+            metrics_statsd_host=app_config["CAMPUSONLINE_METRICS_STATSD_HOST"],
+            metrics_statsd_port=app_config["CAMPUSONLINE_METRICS_STATSD_PORT"],
+            metrics_prefix=app_config["CAMPUSONLINE_METRICS_PREFIX"],
+            partition_concurrency=app_config["CAMPUSONLINE_PARTITION_CONCURRENCY"],
+            reuse_bulk_metadata=app_config["CAMPUSONLINE_REUSE_BULK_METADATA"],
+            required_metaclasses=app_config["CAMPUSONLINE_REQUIRED_METACLASSES"],
+            required_attrs=app_config["CAMPUSONLINE_REQUIRED_ATTRS"],
+            priority_import_queue=app_config["CAMPUSONLINE_PRIORITY_IMPORT_QUEUE"],
+            priority_import_priority=app_config[
+                "CAMPUSONLINE_PRIORITY_IMPORT_PRIORITY"
+            ],
+            priority_import_ttl=app_config["CAMPUSONLINE_PRIORITY_IMPORT_TTL"],
+        )
@@ -8,11 +8,12 @@
 
 """Services decorators."""
 
-
 from collections.abc import Callable
 from functools import wraps
 from typing import Any
 
+from flask import current_app
+
 from .config import CampusOnlineRESTServiceConfig
 from .services import CampusOnlineRESTService
 
@@ -25,7 +26,11 @@ def build_services(f: Callable) -> Callable:
         endpoint = kwargs.pop("endpoint")
         token = kwargs.pop("token")
 
-        config = CampusOnlineRESTServiceConfig(endpoint, token)
+        config = CampusOnlineRESTServiceConfig.build(
+            current_app.config,
+            endpoint,
+            token,
+        )
         kwargs["cms_service"] = CampusOnlineRESTService(config)
 
         return f(**kwargs)
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Staged import pipeline.
+
+The theses flow through the stages discover, check, metadata, download,
+import and write_back as soon as their ids are discovered. Each stage has its own
+worker threads and hands the theses on through a bounded queue, so a slow
+stage holds back the stages before it instead of piling up theses in
+memory.
+"""
+
+from collections.abc import Callable, Iterable
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from queue import Queue
+from threading import Lock, Thread
+from typing import ClassVar
+from xml.etree.ElementTree import Element
+
+from flask import current_app, has_app_context
+from flask_principal import Identity
+
+from ..records.api import parse_thesis
+from ..records.metrics import MetricsCollector
+from ..types import CampusOnlineID, FilePath, ImportOutcome, ImportResult, Thesis
+from .services import CampusOnlineRESTService
+
+DONE = object()
+"""Marker which tells a worker that its stage is finished."""
+
+
+@dataclass
+class PipelineItem:
+    """Thesis on its way through the pipeline."""
+
+    cms_id: CampusOnlineID
+    prefetched: dict[str, object] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    outcome: ImportOutcome = ImportOutcome.FAILED
+
+
+class PrefetchedService:
+    """Proxy of the service which returns the prefetched metadata and file.
+
+    The import function gets the proxy instead of the service. An error of
+    the prefetch is raised when the import function asks for the value, so
+    the import function sees the same errors as without the pipeline.
+    """
+
+    def __init__(self, service: CampusOnlineRESTService, item: PipelineItem) -> None:
+        """Construct."""
+        self.service = service
+        self.item = item
+
+    def __getattr__(self, name: str) -> object:
+        """Get the attribute of the service."""
+        return getattr(self.service, name)
+
+    def prefetched(
+        self,
+        name: str,
+        identity: Identity,
+        cms_id: CampusOnlineID,
+    ) -> object:
+        """Get the prefetched value, or call the service for another id."""
+        if cms_id != self.item.cms_id or name not in self.item.prefetched:
+            return getattr(self.service, name)(identity, cms_id)
+
+        value = self.item.prefetched[name]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def get_metadata(self, identity: Identity, cms_id: CampusOnlineID) -> Element:
+        """Get the metadata."""
+        return self.prefetched("get_metadata", identity, cms_id)
+
+    def get_thesis(self, identity: Identity, cms_id: CampusOnlineID) -> Thesis:
+        """Get the metadata as thesis."""
+        return parse_thesis(self.get_metadata(identity, cms_id))
+
+    def download_file(self, identity: Identity, cms_id: CampusOnlineID) -> FilePath:
+        """Download the file."""
+        return self.prefetched("download_file", identity, cms_id)
+
+
+class ImportPipeline:
+    """Import the theses in stages which run at the same time.
+
+    import_step imports one thesis with the given service and returns its
+    outcome, write_back is called for each imported thesis. The check
+    stage skips a thesis discovered twice and a thesis for which skip
+    returns True, before its metadata and file are fetched. workers maps
+    the stages check, metadata, download, import and write_back to their
+    number of threads, queue_size bounds the theses waiting between
+    two stages. The errors of the stages are counted in metrics.
+    """
+
+    default_workers: ClassVar[dict[str, int]] = {
+        "check": 1,
+        "metadata": 4,
+        "download": 4,
+        "import": 2,
+        "write_back": 2,
+    }
+
+    def __init__(
+        self,
+        cms_service: CampusOnlineRESTService,
+        identity: Identity,
+        import_step: Callable[[CampusOnlineID, object], ImportOutcome],
+        *,
+        write_back: Callable[[CampusOnlineID], object] | None = None,
+        skip: Callable[[CampusOnlineID], bool] | None = None,
+        workers: dict[str, int] | None = None,
+        queue_size: int = 64,
+        metrics: MetricsCollector | None = None,
+    ) -> None:
+        """Construct."""
+        self.cms_service = cms_service
+        self.identity = identity
+        self.import_step = import_step
+        self.write_back = write_back
+        self.skip = skip
+        self.seen: set[CampusOnlineID] = set()
+        self.seen_lock = Lock()
+        self.workers = {**self.default_workers, **(workers or {})}
+        self.queue_size = queue_size
+        self.metrics = metrics or MetricsCollector()
+
+    @property
+    def stages(self) -> list[tuple[str, Callable[[PipelineItem], None]]]:
+        """Get the stages after the discovery of the ids."""
+        stages = [
+            ("check", self.check_item),
+            ("metadata", self.fetch_metadata),
+            ("download", self.fetch_file),
+            ("import", self.import_item),
+        ]
+        if self.write_back is not None:
+            stages.append(("write_back", self.write_back_item))
+        return stages
+
+    def check_item(self, item: PipelineItem) -> None:
+        """Skip the thesis if it was discovered before or if skip says so."""
+        with self.seen_lock:
+            duplicate = item.cms_id in self.seen
+            self.seen.add(item.cms_id)
+        if duplicate or (self.skip is not None and self.skip(item.cms_id)):
+            item.outcome = ImportOutcome.SKIPPED
+
+    def prefetch(self, item: PipelineItem, name: str) -> None:
+        """Call the service method and keep its result or its error."""
+        try:
+            value = getattr(self.cms_service, name)(self.identity, item.cms_id)
+        except Exception as e:  # noqa: BLE001
+            value = e
+        item.prefetched[name] = value
+
+    def fetch_metadata(self, item: PipelineItem) -> None:
+        """Prefetch the metadata."""
+        self.prefetch(item, "get_metadata")
+
+    def fetch_file(self, item: PipelineItem) -> None:
+        """Prefetch the file."""
+        self.prefetch(item, "download_file")
+
+    def import_item(self, item: PipelineItem) -> None:
+        """Import the thesis with the prefetched metadata and file."""
+        service = PrefetchedService(self.cms_service, item)
+        item.outcome = self.import_step(item.cms_id, service)
+        item.prefetched.clear()
+
+    def write_back_item(self, item: PipelineItem) -> None:
+        """Write back the status of the imported thesis."""
+        if item.outcome is ImportOutcome.IMPORTED:
+            self.write_back(item.cms_id)
+
+    def run(self, ids: Iterable[CampusOnlineID]) -> ImportResult:
+        """Run the ids through the stages.
+
+        ids may be a generator, e.g. the ids streamed from campusonline,
+        the first theses are imported while the ids are still received.
+        An error while discovering the ids is raised after the theses
+        discovered so far went through the pipeline.
+        """
+        stages = self.stages
+        queues = [Queue(self.queue_size) for _ in range(len(stages) + 1)]
+        discovery_errors: list[Exception] = []
+
+        def discover() -> None:
+            try:
+                for cms_id in ids:
+                    queues[0].put(PipelineItem(cms_id))
+            except Exception as e:  # noqa: BLE001
+                discovery_errors.append(e)
+            finally:
+                for _ in range(self.workers_of(stages[0][0])):
+                    queues[0].put(DONE)
+
+        threads = [Thread(target=discover, name="campusonline-discover")]
+        threads += self.create_workers(stages, queues)
+        for thread in threads:
+            thread.start()
+
+        result = ImportResult()
+        while (item := queues[-1].get()) is not DONE:
+            getattr(result, item.outcome.value).append(item.cms_id)
+
+        for thread in threads:
+            thread.join()
+
+        if discovery_errors:
+            raise discovery_errors[0]
+        return result
+
+    def workers_of(self, stage: str) -> int:
+        """Get the number of threads of the stage."""
+        return max(self.workers.get(stage, 1), 1)
+
+    def create_workers(
+        self,
+        stages: list[tuple[str, Callable[[PipelineItem], None]]],
+        queues: list[Queue],
+    ) -> list[Thread]:
+        """Create the threads of the stages, stage i reads from queue i.
+
+        The last worker of a stage tells the workers of the following stage
+        to finish.
+        """
+        app = None
+        if has_app_context():
+            app = current_app._get_current_object()  # noqa: SLF001
+        threads = []
+
+        for i, (name, func) in enumerate(stages):
+            following = self.workers_of(stages[i + 1][0]) if i + 1 < len(stages) else 1
+            remaining = [self.workers_of(name)]
+            lock = Lock()
+
+            def finished(
+                outbox: Queue = queues[i + 1],
+                remaining: list[int] = remaining,
+                lock: Lock = lock,
+                following: int = following,
+            ) -> None:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(following):
+                        outbox.put(DONE)
+
+            threads += [
+                Thread(
+                    target=self.work,
+                    kwargs={
+                        "app": app,
+                        "name": name,
+                        "func": func,
+                        "inbox": queues[i],
+                        "outbox": queues[i + 1],
+                        "finished": finished,
+                    },
+                    name=f"campusonline-{name}",
+                )
+                for _ in range(self.workers_of(name))
+            ]
+
+        return threads
+
+    def work(
+        self,
+        *,
+        app: object,
+        name: str,
+        func: Callable[[PipelineItem], None],
+        inbox: Queue,
+        outbox: Queue,
+        finished: Callable[[], None],
+    ) -> None:
+        """Process the theses of the inbox until the stage is finished.
+
+        A thesis which failed in an earlier stage or which is skipped is
+        passed on unchanged.
+        """
+        try:
+            with app.app_context() if app is not None else nullcontext():
+                while (item := inbox.get()) is not DONE:
+                    if not item.errors and item.outcome is not ImportOutcome.SKIPPED:
+                        try:
+                            func(item)
+                        except Exception as e:  # noqa: BLE001
+                            item.errors[name] = str(e)
+                            self.metrics.increment(f"pipeline.{name}.errors")
+                    outbox.put(item)
+        finally:
+            finished()
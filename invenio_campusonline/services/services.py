@@ -8,17 +8,43 @@
 
 """Services."""
 
-
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date as Date
+from time import perf_counter
 from xml.etree.ElementTree import Element
 
+from celery import current_app as current_celery_app
 from flask_principal import Identity
 
-from ..records import CampusOnlineAPI
-from ..types import CampusOnlineID, CampusOnlineStatus, FilePath, ThesesFilter
+from ..priority import PRIORITY_TASK, claim_priority, release_priority
+from ..records import AsyncCampusOnlineAPI, CampusOnlineAPI, SyncCampusOnlineAPI
+from ..records.api import fingerprint, has_metaclasses, parse_thesis
+from ..records.metrics import MetricsCollector
+from ..records.models import CampusOnlineRESTError
+from ..types import (
+    CacheStats,
+    CampusOnlineID,
+    CampusOnlineStatus,
+    ConnectionStats,
+    FilePath,
+    ImportPlan,
+    PartitionedThesesFilter,
+    ThesesFilter,
+    Thesis,
+)
 from .config import CampusOnlineRESTServiceConfig
 
 
+def partitions_of(
+    theses_filter: ThesesFilter | PartitionedThesesFilter | None,
+) -> Iterable[ThesesFilter | None]:
+    """Get the partitions of the filter, a plain filter is one partition."""
+    if isinstance(theses_filter, PartitionedThesesFilter):
+        return theses_filter
+    return [theses_filter]
+
+
 class CampusOnlineRESTService:
     """Campusonline REST service."""
 
@@ -26,28 +52,207 @@ class CampusOnlineRESTService:
         """Construct."""
         self._config = config
         self.api = self.api_cls(config=config)
+        self.bulk_metadata: dict[CampusOnlineID, bytes] = {}
+
+        if isinstance(self.api, AsyncCampusOnlineAPI):
+            self.async_api = self.api
+            self.api = SyncCampusOnlineAPI(self.async_api)
 
     @property
-    def api_cls(self) -> CampusOnlineAPI:
-        """Get api cls."""
+    def api_cls(self) -> type[CampusOnlineAPI | AsyncCampusOnlineAPI]:
+        """Get api cls, AsyncCampusOnlineAPI if the async client is configured."""
+        if self._config.client == "async":
+            return AsyncCampusOnlineAPI
         return self._config.api_cls
 
+    @property
+    def connection_stats(self) -> ConnectionStats:
+        """Get the connection reuse statistics."""
+        return self.api.connection.stats
+
+    @property
+    def metrics(self) -> MetricsCollector:
+        """Get the collector of the stage timings."""
+        return self.api.connection.metrics
+
+    @property
+    def cache_stats(self) -> CacheStats | None:
+        """Get the hit and miss counters of the response cache."""
+        cache = getattr(self.api.connection, "cache", None)
+        return cache.stats if cache is not None else None
+
     def fetch_all_ids(
         self,
-        _: Identity,
-        theses_filter: ThesesFilter,
+        identity: Identity,
+        theses_filter: ThesesFilter | PartitionedThesesFilter,
     ) -> list[CampusOnlineID]:
-        """Fetch all ids."""
+        """Fetch all ids.
+
+        The partitions of a PartitionedThesesFilter are fetched concurrently.
+        """
+        if self._config.reuse_bulk_metadata:
+            theses = self.iter_all_theses(identity, theses_filter)
+            return [cms_id for cms_id, _ in theses]
+        if isinstance(theses_filter, PartitionedThesesFilter):
+            return self.api.fetch_ids_partitioned(theses_filter)
         return self.api.fetch_ids(theses_filter)
 
+    def iter_all_theses(
+        self,
+        _: Identity,
+        theses_filter: ThesesFilter | PartitionedThesesFilter,
+    ) -> Iterator[tuple[CampusOnlineID, Element]]:
+        """Iterate over all ids with the metadata of the bulk response.
+
+        With reuse_bulk_metadata the complete theses are kept serialized,
+        so that get_metadata does not have to request them again, until
+        they are imported or released. The partitions are streamed one
+        after the other, a thesis of several partitions is yielded once.
+        """
+        self.release_bulk_metadata()
+        seen: set[CampusOnlineID] = set()
+
+        for partition in partitions_of(theses_filter):
+            for cms_id, thesis in self.api.iter_theses(partition):
+                if cms_id in seen:
+                    continue
+                seen.add(cms_id)
+                if self._config.reuse_bulk_metadata and has_metaclasses(
+                    thesis,
+                    self._config.required_metaclasses,
+                    self._config.required_attrs,
+                ):
+                    xml = self.api.connection.xml
+                    self.bulk_metadata[cms_id] = xml.tostring(thesis)
+                yield cms_id, thesis
+
+    def release_bulk_metadata(
+        self,
+        cms_ids: Iterable[CampusOnlineID] | None = None,
+    ) -> None:
+        """Release the kept theses of the bulk response, all without ids."""
+        if cms_ids is None:
+            self.bulk_metadata = {}
+            return
+        for cms_id in cms_ids:
+            self.bulk_metadata.pop(cms_id, None)
+
+    def iter_all_ids(
+        self,
+        _: Identity,
+        theses_filter: ThesesFilter | PartitionedThesesFilter,
+    ) -> Iterator[CampusOnlineID]:
+        """Iterate over all ids while they are received."""
+        seen: set[CampusOnlineID] = set()
+        for partition in partitions_of(theses_filter):
+            for cms_id in self.api.iter_ids(partition):
+                if cms_id not in seen:
+                    seen.add(cms_id)
+                    yield cms_id
+
+    def fetch_fingerprints(
+        self,
+        identity: Identity,
+        theses_filter: ThesesFilter | PartitionedThesesFilter,
+    ) -> dict[CampusOnlineID, str]:
+        """Fetch all ids with the fingerprint of their metadata."""
+        if self._config.reuse_bulk_metadata:
+            theses = self.iter_all_theses(identity, theses_filter)
+            return {cms_id: fingerprint(thesis) for cms_id, thesis in theses}
+        if isinstance(theses_filter, PartitionedThesesFilter):
+            return self.api.fetch_fingerprints_partitioned(theses_filter)
+        return self.api.fetch_fingerprints(theses_filter)
+
+    def plan_import(
+        self,
+        identity: Identity,
+        theses_filter: ThesesFilter | PartitionedThesesFilter,
+        *,
+        concurrency: int = 8,
+    ) -> ImportPlan:
+        """Estimate the import of the theses without importing them.
+
+        The file url of each thesis is requested and the size of the file is
+        read from a HEAD request, up to concurrency theses at the same time.
+        The latencies of both requests are measured for the estimate.
+        """
+        start = perf_counter()
+        plan = ImportPlan(self.fetch_all_ids(identity, theses_filter))
+        plan.fetch_seconds = perf_counter() - start
+        plan.partitions = len(list(partitions_of(theses_filter)))
+
+        def measure(cms_id: CampusOnlineID) -> tuple:
+            start = perf_counter()
+            try:
+                file_url = self.api.get_file_url(cms_id)
+                soap = perf_counter() - start
+                size = self.api.head_file(file_url)
+            except (RuntimeError, CampusOnlineRESTError) as e:
+                return perf_counter() - start, None, None, str(e)
+            return soap, perf_counter() - start - soap, size, None
+
+        with ThreadPoolExecutor(max(concurrency, 1), "campusonline-plan") as executor:
+            measured = list(executor.map(measure, plan.ids))
+
+        for cms_id, (soap, head, size, error) in zip(plan.ids, measured, strict=True):
+            plan.soap_latencies.append(soap)
+            if error is not None:
+                plan.errors[cms_id] = error
+                continue
+            plan.head_latencies.append(head)
+            plan.sizes[cms_id] = size
+
+        return plan
+
     def download_file(self, _: Identity, cms_id: CampusOnlineID) -> FilePath:
         """Download file."""
         return self.api.download_file(cms_id)
 
     def get_metadata(self, _: Identity, cms_id: CampusOnlineID) -> Element:
-        """Get metadata."""
+        """Get metadata.
+
+        The kept thesis of the bulk response is used once, a later call
+        requests the metadata again.
+        """
+        if (thesis := self.bulk_metadata.pop(cms_id, None)) is not None:
+            return self.api.connection.xml.fromstring(thesis)
         return self.api.get_metadata(cms_id)
 
+    def get_thesis(self, identity: Identity, cms_id: CampusOnlineID) -> Thesis:
+        """Get the metadata as thesis.
+
+        The thesis holds only the decoded values, so the xml tree of the
+        response can be freed right away.
+        """
+        return parse_thesis(self.get_metadata(identity, cms_id))
+
+    def import_with_priority(
+        self,
+        _: Identity,
+        cms_ids: Iterable[CampusOnlineID],
+    ) -> list[CampusOnlineID]:
+        """Queue the import of the theses ahead of a running bulk import.
+
+        The theses are claimed and imported by one task, which is sent with
+        the priority and to the queue of the priority import. Theses which
+        are already in flight are coalesced, the queued ids are returned. If
+        the task can't be sent, the claims are released again.
+        """
+        claimed = claim_priority(cms_ids, self._config.priority_import_ttl)
+        if not claimed:
+            return claimed
+
+        options = {"priority": self._config.priority_import_priority}
+        if self._config.priority_import_queue:
+            options["queue"] = self._config.priority_import_queue
+        task = current_celery_app.signature(PRIORITY_TASK, args=(claimed,))
+        try:
+            task.apply_async(**options)
+        except Exception:
+            release_priority(claimed)
+            raise
+        return claimed
+
     def set_status(
         self,
         _: Identity,
@@ -56,4 +261,4 @@ class CampusOnlineRESTService:
         date: Date,
     ) -> bool:
         """Set Status."""
-        self.api.set_status(cms_id, status, date)
+        return self.api.set_status(cms_id, status, date)
@@ -9,33 +9,276 @@
 
 """Celery tasks for `invenio-campusonline`."""
 
+from dataclasses import asdict
 
-from celery import shared_task
+from celery import chain, chord, shared_task
 from flask import current_app
 from invenio_access.permissions import system_identity
 
+from .api import (
+    chunked,
+    distribute,
+    failed_status_updates,
+    import_theses,
+    import_theses_pipelined,
+    prepare_import,
+    write_back_status,
+)
+from .priority import release_priority
 from .proxies import current_campusonline
+from .types import CampusOnlineID, ImportResult
+
+
+def select(
+    fingerprints: dict[CampusOnlineID, str] | None,
+    cms_ids: list[CampusOnlineID],
+) -> dict[CampusOnlineID, str] | None:
+    """Select the fingerprints of the chunk.
+
+    A resumed run may have fingerprints for some of the theses only.
+    """
+    if fingerprints is None:
+        return None
+    return {
+        cms_id: fingerprints[cms_id] for cms_id in cms_ids if cms_id in fingerprints
+    }
 
 
 @shared_task(ignore_result=True)
-def import_theses_from_campusonline() -> None:
-    """Import theses from campusonline."""
+def import_theses_from_campusonline(
+    chunk_size: int | None = None,
+    parallelism: int | None = None,
+    *,
+    incremental: bool | None = None,
+    resume: bool = False,
+    **_: dict,
+) -> None:
+    """Import theses from campusonline.
+
+    Without a chunk_size all theses are imported by this task. With a
+    chunk_size the ids are split into chunks which are imported by
+    import_theses_chunk subtasks on the whole celery cluster. At most
+    parallelism chunks are running at the same time, the chunks of one
+    lane are chained one after the other. summarize_import logs the outcome
+    and the stage timings after all chunks are done.
+
+    In the incremental mode only new or changed theses are imported. With
+    resume the unfinished theses of the import ledger are imported again
+    instead of fetching the ids, see CAMPUSONLINE_IMPORT_LEDGER.
+    """
     current_app.logger.info("start importing theses from campusonline")
 
     import_func = current_app.config["CAMPUSONLINE_IMPORT_FUNC"]
     theses_filter = current_app.config["CAMPUSONLINE_THESES_FILTER"]
+    concurrency = current_app.config["CAMPUSONLINE_IMPORT_CONCURRENCY"]
+    chunk_size = chunk_size or current_app.config["CAMPUSONLINE_IMPORT_CHUNK_SIZE"]
+    parallelism = parallelism or current_app.config["CAMPUSONLINE_IMPORT_PARALLELISM"]
+    ledger = current_app.config["CAMPUSONLINE_IMPORT_LEDGER"]
+    write_back = current_app.config["CAMPUSONLINE_WRITE_BACK_STATUS"]
+    if incremental is None:
+        incremental = current_app.config["CAMPUSONLINE_INCREMENTAL_SYNC"]
 
     cms_service = current_campusonline.campusonline_rest_service
-    ids = cms_service.fetch_all_ids(system_identity, theses_filter)
+    cms_service.metrics.reset()
+
+    if current_app.config["CAMPUSONLINE_IMPORT_PIPELINE"] and not chunk_size:
+        streamed = not incremental and not resume
+        if streamed:
+            ids = cms_service.iter_all_ids(system_identity, theses_filter)
+            fingerprints = None
+        else:
+            ids, fingerprints = prepare_import(
+                cms_service,
+                system_identity,
+                theses_filter,
+                incremental=incremental,
+                ledger=ledger,
+                resume=resume and ledger,
+            )
+        result = import_theses_pipelined(
+            import_func,
+            system_identity,
+            ids,
+            cms_service,
+            workers=current_app.config["CAMPUSONLINE_PIPELINE_WORKERS"],
+            queue_size=current_app.config["CAMPUSONLINE_PIPELINE_QUEUE_SIZE"],
+            fingerprints=fingerprints,
+            metrics=cms_service.metrics,
+            ledger=ledger,
+            write_back=write_back,
+        )
+        result.metrics = cms_service.metrics.snapshot()
+        summarize_import([asdict(result)])
+        return
+
+    ids, fingerprints = prepare_import(
+        cms_service,
+        system_identity,
+        theses_filter,
+        incremental=incremental,
+        ledger=ledger,
+        resume=resume and ledger,
+    )
 
     current_app.logger.info("%s records will be imported", len(ids))
 
-    for cms_id in ids:
-        try:
-            draft = import_func(system_identity, cms_id, cms_service)
+    if chunk_size and ids:
+        # the metrics of fetching the ids are passed on with the first lane
+        fetched = asdict(ImportResult(metrics=cms_service.metrics.snapshot()))
+        lanes = distribute(chunked(ids, chunk_size), parallelism)
+        header = [
+            chain(
+                import_theses_chunk.s(
+                    fetched if i == 0 else None,
+                    lane[0],
+                    select(fingerprints, lane[0]),
+                ),
+                *[
+                    import_theses_chunk.s(chunk, select(fingerprints, chunk))
+                    for chunk in lane[1:]
+                ],
+            )
+            for i, lane in enumerate(lanes)
+        ]
+        chord(header)(summarize_import.s())
+        # the chunks run on other workers, which request the metadata again
+        cms_service.release_bulk_metadata()
+
+        msg = "campusonline import split into %s chunks on %s lanes"
+        current_app.logger.info(msg, sum(len(lane) for lane in lanes), len(lanes))
+        return
+
+    result = import_theses(
+        import_func,
+        system_identity,
+        ids,
+        cms_service,
+        concurrency=concurrency,
+        fingerprints=fingerprints,
+        metrics=cms_service.metrics,
+        ledger=ledger,
+        write_back=write_back,
+    )
+    result.metrics = cms_service.metrics.snapshot()
+    summarize_import([asdict(result)])
+
+    stats = cms_service.connection_stats
+    msg = "campusonline connection reuse: %s of %s requests (%s connections)"
+    current_app.logger.info(msg, stats.reused, stats.requests, stats.connections)
+
+
+@shared_task(ignore_result=False)
+def import_theses_chunk(
+    previous: dict | None,
+    cms_ids: list[CampusOnlineID],
+    fingerprints: dict[CampusOnlineID, str] | None = None,
+) -> dict:
+    """Import a chunk of theses.
+
+    The result of the previous chunk of the same lane is passed on, so the
+    last chunk of a lane returns the result of the whole lane. The metrics
+    of the worker are reset at the start of the chunk, so the result
+    contains the metrics of this chunk only.
+    """
+    import_func = current_app.config["CAMPUSONLINE_IMPORT_FUNC"]
+    concurrency = current_app.config["CAMPUSONLINE_IMPORT_CONCURRENCY"]
+    ledger = current_app.config["CAMPUSONLINE_IMPORT_LEDGER"]
+    write_back = current_app.config["CAMPUSONLINE_WRITE_BACK_STATUS"]
+    cms_service = current_campusonline.campusonline_rest_service
+    cms_service.metrics.reset()
+
+    result = import_theses(
+        import_func,
+        system_identity,
+        cms_ids,
+        cms_service,
+        concurrency=concurrency,
+        fingerprints=fingerprints,
+        metrics=cms_service.metrics,
+        ledger=ledger,
+        write_back=write_back,
+    )
+    result.metrics = cms_service.metrics.snapshot()
+
+    if previous:
+        result = ImportResult(**previous) + result
+
+    return asdict(result)
+
+
+@shared_task(ignore_result=True)
+def import_theses_priority(cms_ids: list[CampusOnlineID]) -> None:
+    """Import the theses requested with priority.
+
+    The task is sent by CampusOnlineRESTService.import_with_priority, which
+    claimed the theses before. The claims are released after the import,
+    so the theses can be requested again.
+    """
+    import_func = current_app.config["CAMPUSONLINE_IMPORT_FUNC"]
+    ledger = current_app.config["CAMPUSONLINE_IMPORT_LEDGER"]
+    write_back = current_app.config["CAMPUSONLINE_WRITE_BACK_STATUS"]
+    cms_service = current_campusonline.campusonline_rest_service
+
+    try:
+        result = import_theses(
+            import_func,
+            system_identity,
+            cms_ids,
+            cms_service,
+            ledger=ledger,
+            write_back=write_back,
+            priority=True,
+        )
+    finally:
+        release_priority(cms_ids)
+
+    msg = "campusonline priority import: %s imported, %s failed"
+    current_app.logger.info(msg, len(result.imported), len(result.failed))
+
+    if write_back and result.imported:
+        write_back_status_to_campusonline.delay()
+
+
+@shared_task(ignore_result=True)
+def summarize_import(results: list[dict]) -> None:
+    """Log the summary of an import and start the status write-back."""
+    result = sum((ImportResult(**r) for r in results), ImportResult())
+
+    msg = "campusonline import finished: %s imported, %s failed, %s skipped"
+    current_app.logger.info(
+        msg,
+        len(result.imported),
+        len(result.failed),
+        len(result.skipped),
+    )
+
+    if result.metrics:
+        msg = "campusonline import stages: %s"
+        current_app.logger.info(msg, result.metrics.summary())
+
+    if result.failed:
+        msg = "campusonline import failed for cms_ids: %s"
+        current_app.logger.warning(msg, ", ".join(result.failed))
+
+    if current_app.config["CAMPUSONLINE_WRITE_BACK_STATUS"]:
+        write_back_status_to_campusonline.delay()
+
+
+@shared_task(ignore_result=True)
+def write_back_status_to_campusonline() -> None:
+    """Send the queued status updates to campusonline and report failures."""
+    cms_service = current_campusonline.campusonline_rest_service
+    result = write_back_status(
+        cms_service,
+        system_identity,
+        concurrency=current_app.config["CAMPUSONLINE_WRITE_BACK_CONCURRENCY"],
+        retries=current_app.config["CAMPUSONLINE_WRITE_BACK_RETRIES"],
+        max_attempts=current_app.config["CAMPUSONLINE_WRITE_BACK_MAX_ATTEMPTS"],
+    )
+
+    msg = "campusonline status write-back: %s updated, %s failed"
+    current_app.logger.info(msg, len(result.updated), len(result.failed))
 
-            msg = "campusonline draft.id: %s as been imported successfully"
-            current_app.logger.info(msg, draft.id)
-        except RuntimeError as e:
-            msg = "ERROR campusonline cms_id: %s couldn't be imported because of %s"
-            current_app.logger.error(msg, cms_id, str(e))
+    for cms_id, error in failed_status_updates().items():
+        msg = "campusonline status write-back failed for cms_id: %s because of %s"
+        current_app.logger.warning(msg, cms_id, error)
@@ -9,8 +9,12 @@
 
 """Types."""
 
-from dataclasses import dataclass
-from datetime import datetime
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from enum import Enum
+from statistics import fmean
+from xml.sax.saxutils import escape
 
 URL = str
 """Type to indicate that an URL is necessary."""
@@ -59,6 +63,65 @@ class Embargo:
         """Check if values are set, otherwise return is false."""
         return bool(self.start and self.end)
 
+    @classmethod
+    def from_strings(cls, start: str | None, end: str | None) -> "Embargo":
+        """Parse the values of the SPVON and SPBIS attrs."""
+        if not start or not end:
+            return cls()
+
+        in_format = "%Y-%m-%d %H:%M:%S"
+        return cls(
+            datetime.strptime(start, in_format),
+            datetime.strptime(end, in_format),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Thesis:
+    """Metadata of a thesis.
+
+    The attrs and metaclasses are collected with one pass over the xml tree
+    by parse_thesis, the properties decode them on access.
+    """
+
+    cms_id: CampusOnlineID
+    attrs: dict[str, str] = field(default_factory=dict)
+    metaclasses: dict[str, list[dict[str, str]]] = field(default_factory=dict)
+    doc_url: URL | None = None
+
+    @property
+    def title(self) -> str | None:
+        """Get the title in the original language."""
+        texts = self.metaclasses.get("TEXT") or [{}]
+        original = next((text for text in texts if text.get("ORIG") == "J"), texts[0])
+        return original.get("TIT") or None
+
+    @property
+    def authors(self) -> list[str]:
+        """Get the authors as "last name, first name"."""
+        return [obj.get("FNLN", "") for obj in self.metaclasses.get("AUTHOR", [])]
+
+    @property
+    def supervisors(self) -> list[str]:
+        """Get the supervisors as "last name, first name"."""
+        supervisors = self.metaclasses.get("SUPERVISOR", [])
+        return [obj.get("FNLN", "") for obj in supervisors]
+
+    @property
+    def language(self) -> str | None:
+        """Get the original language."""
+        return self.attrs.get("OLANG") or None
+
+    @property
+    def embargo(self) -> Embargo:
+        """Get the embargo range."""
+        return Embargo.from_strings(self.attrs.get("SPVON"), self.attrs.get("SPBIS"))
+
+    @property
+    def has_fulltext(self) -> bool:
+        """Check whether the thesis has a fulltext."""
+        return self.attrs.get("VOLLTEXT") == "J" or self.doc_url is not None
+
 
 @dataclass(frozen=True)
 class Color:
@@ -83,6 +146,298 @@ class ThesesFilter:
         return self.filter_
 
 
+@dataclass
+class PartitionedThesesFilter:
+    """Filter split into partitions, which are requested one by one.
+
+    The template is the xml of the filter with str.format placeholders,
+    which are filled with the values of each partition, e.g. the bounds of
+    a date window or an organisational unit.
+    """
+
+    template: str
+    partitions: list[dict[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        """Count the partitions."""
+        return len(self.partitions)
+
+    def __iter__(self) -> Iterator[ThesesFilter]:
+        """Iterate over the filters of the partitions."""
+        for values in self.partitions:
+            escaped = {name: escape(str(value)) for name, value in values.items()}
+            yield ThesesFilter(self.template.format(**escaped))
+
+    @classmethod
+    def by_values(
+        cls,
+        template: str,
+        name: str,
+        values: Iterable[str],
+    ) -> "PartitionedThesesFilter":
+        """Create one partition per value, e.g. per organisational unit."""
+        return cls(template, [{name: value} for value in values])
+
+    @classmethod
+    def by_date_windows(
+        cls,
+        template: str,
+        start: date,
+        end: date,
+        days: int = 365,
+    ) -> "PartitionedThesesFilter":
+        """Create consecutive windows of days from start to end.
+
+        The placeholders {start} and {end} are filled with the iso dates of
+        the first and the last day of the window.
+        """
+        partitions = []
+        while start <= end:
+            last = min(start + timedelta(days=days - 1), end)
+            partitions.append({"start": start.isoformat(), "end": last.isoformat()})
+            start = last + timedelta(days=1)
+        return cls(template, partitions)
+
+
+@dataclass(frozen=True)
+class ConnectionStats:
+    """Statistics about the connection reuse of the http session."""
+
+    requests: int = 0
+    reused: int = 0
+
+    @property
+    def connections(self) -> int:
+        """Calculate the number of newly opened connections."""
+        return self.requests - self.reused
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Calculate the ratio of requests which reused an open connection."""
+        if self.requests == 0:
+            return 0.0
+        return self.reused / self.requests
+
+    def __add__(self, other: "ConnectionStats") -> "ConnectionStats":
+        """Sum up the statistics of two sessions or adapters."""
+        return ConnectionStats(
+            self.requests + other.requests,
+            self.reused + other.reused,
+        )
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Calculate the ratio of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
+
+
+class ImportState(Enum):
+    """State of a thesis in the import ledger.
+
+    The states are passed in this order, failed can follow each of them.
+    """
+
+    FETCHED = "fetched"
+    METADATA = "metadata"
+    DOWNLOADED = "downloaded"
+    IMPORTED = "imported"
+    STATUS_SET = "status_set"
+    FAILED = "failed"
+
+    @property
+    def finished(self) -> bool:
+        """Check whether the thesis does not have to be imported again."""
+        return self in (ImportState.IMPORTED, ImportState.STATUS_SET)
+
+
+class ImportOutcome(Enum):
+    """Outcome of importing one thesis.
+
+    A thesis is skipped if it is claimed by the priority import, it counts
+    neither as imported nor as failed.
+    """
+
+    IMPORTED = "imported"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class Metrics:
+    """Timings and counters collected during an import.
+
+    timings maps each stage to [calls, total seconds, max seconds], the
+    counters are named stage.bytes, stage.retries, stage.errors and
+    stage.cache_hits. Both are plain dicts, so that the metrics can be
+    passed between celery tasks.
+    """
+
+    timings: dict[str, list[float]] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        """Check if anything was collected."""
+        return bool(self.timings or self.counters)
+
+    def __add__(self, other: "Metrics") -> "Metrics":
+        """Merge the metrics of two batches."""
+        timings = {stage: list(values) for stage, values in self.timings.items()}
+        for stage, (calls, total, longest) in other.timings.items():
+            merged = timings.setdefault(stage, [0, 0.0, 0.0])
+            merged[0] += calls
+            merged[1] += total
+            merged[2] = max(merged[2], longest)
+
+        counters = dict(self.counters)
+        for name, value in other.counters.items():
+            counters[name] = counters.get(name, 0) + value
+
+        return Metrics(timings, counters)
+
+    def summary(self) -> str:
+        """Summarize the stages by total time and the counters in one line."""
+        stages = sorted(self.timings.items(), key=lambda item: -item[1][1])
+        parts = [
+            f"{stage} {calls:.0f}x {total:.2f}s (max {longest:.2f}s)"
+            for stage, (calls, total, longest) in stages
+        ]
+        parts += [f"{name}={value}" for name, value in sorted(self.counters.items())]
+        return ", ".join(parts)
+
+
+@dataclass
+class ImportResult:
+    """Outcome of importing a batch of theses."""
+
+    imported: list[CampusOnlineID] = field(default_factory=list)
+    failed: list[CampusOnlineID] = field(default_factory=list)
+    metrics: Metrics = field(default_factory=Metrics)
+    skipped: list[CampusOnlineID] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        """Convert the metrics passed as dict between celery tasks."""
+        if isinstance(self.metrics, dict):
+            self.metrics = Metrics(**self.metrics)
+
+    def __len__(self) -> int:
+        """Count all processed theses."""
+        return len(self.imported) + len(self.failed) + len(self.skipped)
+
+    def __add__(self, other: "ImportResult") -> "ImportResult":
+        """Merge the results of two batches."""
+        return ImportResult(
+            self.imported + other.imported,
+            self.failed + other.failed,
+            self.metrics + other.metrics,
+            self.skipped + other.skipped,
+        )
+
+
+@dataclass
+class WriteBackResult:
+    """Outcome of writing the queued status updates back to campusonline."""
+
+    updated: list[CampusOnlineID] = field(default_factory=list)
+    failed: dict[CampusOnlineID, str] = field(default_factory=dict)
+
+
+@dataclass
+class ImportPlan:
+    """Estimate of an import, measured without importing the theses.
+
+    sizes maps the theses with a file to the content length of the file,
+    None if campusonline did not send it. errors holds the theses without a
+    file url. partitions is the number of requests for the ids. The
+    latencies are the measured seconds of the getDocumentByThesisID
+    requests and of the HEAD requests of the files.
+    """
+
+    ids: list[CampusOnlineID] = field(default_factory=list)
+    sizes: dict[CampusOnlineID, int | None] = field(default_factory=dict)
+    errors: dict[CampusOnlineID, str] = field(default_factory=dict)
+    imported: set[CampusOnlineID] = field(default_factory=set)
+    soap_latencies: list[float] = field(default_factory=list)
+    head_latencies: list[float] = field(default_factory=list)
+    fetch_seconds: float = 0.0
+    write_back: bool = False
+    partitions: int = 1
+
+    @property
+    def new(self) -> list[CampusOnlineID]:
+        """Get the theses which are not imported yet."""
+        return [cms_id for cms_id in self.ids if cms_id not in self.imported]
+
+    @property
+    def total_bytes(self) -> int:
+        """Get the transfer volume of the files with a known size."""
+        return sum(size for size in self.sizes.values() if size)
+
+    @property
+    def soap_latency(self) -> float:
+        """Get the mean seconds of a soap request."""
+        return fmean(self.soap_latencies) if self.soap_latencies else 0.0
+
+    @property
+    def head_latency(self) -> float:
+        """Get the mean seconds of a HEAD request."""
+        return fmean(self.head_latencies) if self.head_latencies else 0.0
+
+    @property
+    def requests(self) -> dict[str, int]:
+        """Count the requests of the import per stage."""
+        requests = {
+            "fetch_ids": self.partitions,
+            "get_metadata": len(self.ids),
+            "get_file_url": len(self.ids),
+            "download": len(self.sizes),
+        }
+        if self.write_back:
+            requests["set_status"] = len(self.ids)
+        return requests
+
+    def estimate(self, concurrency: int = 1, bandwidth: float | None = None) -> float:
+        """Estimate the seconds of the import.
+
+        The requests for the ids of all partitions took fetch_seconds. The
+        soap requests of a thesis take the mean soap latency, each download
+        the mean latency of the HEAD requests. The transfer of the files is
+        added if the bandwidth in bytes per second is given.
+        """
+        soap_requests = sum(self.requests.values()) - self.partitions
+        soap_requests -= len(self.sizes)
+        latency = soap_requests * self.soap_latency
+        latency += len(self.sizes) * self.head_latency
+
+        seconds = latency / max(concurrency, 1)
+        if bandwidth:
+            seconds += self.total_bytes / bandwidth
+        return self.fetch_seconds + seconds
+
+
+@dataclass(frozen=True)
+class Duplicate:
+    """Thesis which is already in the repository.
+
+    reason is cms_id, title_author or duplicate_func, reference names the
+    record or the thesis it duplicates.
+    """
+
+    cms_id: CampusOnlineID
+    reason: str
+    reference: str
+
+
 @dataclass
 class CampusOnlineConfigs:
     """Configs for campus online."""
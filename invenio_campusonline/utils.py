@@ -12,6 +12,7 @@ from datetime import date as Date
 from datetime import datetime
 from xml.etree.ElementTree import Element
 
+from .records.parsing import EMBARGO_END, EMBARGO_START
 from .types import Embargo
 
 
@@ -26,20 +27,26 @@ def as_date(
 
 def extract_embargo_range(thesis: Element) -> Element:
     """Extract the embargo range."""
-    ns = "http://www.campusonline.at/thesisservice/basetypes"
-    xpath_start = f".//{{{ns}}}attr[@key='SPVON']"
-    xpath_end = f".//{{{ns}}}attr[@key='SPBIS']"
-    start = thesis.find(xpath_start)
-    end = thesis.find(xpath_end)
+    start = EMBARGO_START.first(thesis)
+    end = EMBARGO_END.first(thesis)
 
     if start is None or end is None:
         return Embargo()
 
-    if start.text is None or end.text is None:
-        return Embargo()
+    return Embargo.from_strings(start.text, end.text)
+
+
+def format_size(size: float) -> str:
+    """Format the number of bytes with a binary unit."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:  # noqa: PLR2004
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
 
-    in_format = "%Y-%m-%d %H:%M:%S"
-    start_embargo = datetime.strptime(start.text, in_format)
-    end_embargo = datetime.strptime(end.text, in_format)
 
-    return Embargo(start_embargo, end_embargo)
+def format_duration(seconds: float) -> str:
+    """Format the seconds as hours, minutes and seconds."""
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
@@ -12,14 +12,63 @@ See https://pytest-invenio.readthedocs.io/ for documentation on which test
 fixtures are available.
 """
 
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from threading import Thread
 from xml.etree.ElementTree import Element, parse
 
 import pytest
 from _pytest.fixtures import FixtureFunctionMarker
+from flask import Flask
 from invenio_app.factory import create_api as _create_api
 
+from invenio_campusonline import config
+
+
+class FakeCampusOnlineHandler(BaseHTTPRequestHandler):
+    """Answer requests with the responses queued on the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        """Handle post."""
+        self.respond()
+
+    def do_GET(self) -> None:
+        """Handle get."""
+        self.respond()
+
+    def do_HEAD(self) -> None:
+        """Handle head."""
+        self.respond()
+
+    def respond(self) -> None:
+        """Record the request and send the next queued response."""
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append((self.command, self.path, self.headers, body))
+
+        if self.server.responses:
+            status, headers, content = self.server.responses.pop(0)
+        else:
+            status, headers, content = 200, {}, self.server.body
+
+        # a larger Content-Length than the content simulates a broken transfer
+        headers = {"Content-Length": str(len(content)), **headers}
+        if int(headers["Content-Length"]) > len(content):
+            self.close_connection = True
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(content)
+
+    def log_message(self, *_: str) -> None:
+        """Keep the test output clean."""
+
 
 @pytest.fixture(scope="module")
 def create_app(instance_path: FixtureFunctionMarker) -> Callable:
@@ -27,7 +76,56 @@ def create_app(instance_path: FixtureFunctionMarker) -> Callable:
     return _create_api
 
 
+@pytest.fixture
+def campusonline_config(base_app: Flask, monkeypatch: pytest.MonkeyPatch) -> dict:
+    """Set the default config of the extension, which is not loaded in the tests."""
+    for name in dir(config):
+        if name.startswith("CAMPUSONLINE_"):
+            monkeypatch.setitem(base_app.config, name, getattr(config, name))
+    return base_app.config
+
+
 @pytest.fixture
 def minimal_record() -> Element:
     """Create minimal record."""
     return parse(Path(__file__).parent / "minimal_record.xml")
+
+
+@pytest.fixture
+def all_theses_response() -> Callable[[list[str]], bytes]:
+    """Build a getAllThesesMetadata response for the given ids."""
+
+    def build(ids: list[str]) -> bytes:
+        theses = "".join(
+            f"<thesis><ID>{cms_id}</ID>"
+            f'<attr key="STATUS">IFG</attr><attr key="TYPKB">DISS</attr>'
+            f"</thesis>"
+            for cms_id in ids
+        )
+        return (
+            '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+            "<soapenv:Body>"
+            '<getAllThesesMetadataResponse xmlns="http://www.campusonline.at/thesisservice/basetypes">'
+            f"{theses}"
+            "</getAllThesesMetadataResponse>"
+            "</soapenv:Body>"
+            "</soapenv:Envelope>"
+        ).encode()
+
+    return build
+
+
+@pytest.fixture
+def campusonline_server() -> Iterator[ThreadingHTTPServer]:
+    """Start a local stand-in for the campusonline endpoint."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCampusOnlineHandler)
+    server.requests = []
+    server.responses = []
+    server.body = (Path(__file__).parent / "minimal_record.xml").read_bytes()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
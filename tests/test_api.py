@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""API tests."""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, current_app
+from flask_principal import Identity
+from flask_sqlalchemy import SQLAlchemy
+
+from invenio_campusonline.api import (
+    advance,
+    chunked,
+    distribute,
+    enqueue_status,
+    failed_ids,
+    failed_status_updates,
+    filter_changed,
+    import_progress,
+    import_theses,
+    import_theses_pipelined,
+    mark_imported,
+    record_fetched,
+    unfinished_ids,
+    write_back_status,
+)
+from invenio_campusonline.models import (
+    CampusOnlineImportLedger,
+    CampusOnlineStatusUpdate,
+)
+from invenio_campusonline.priority import claim_priority, release_priority
+from invenio_campusonline.records.models import CampusOnlineRESTError
+from invenio_campusonline.types import ImportState
+
+
+def fake_import(
+    identity: Identity,
+    cms_id: str,
+    cms_service: object,
+) -> SimpleNamespace:
+    """Import func failing for every id starting with an x or a z."""
+    if cms_id.startswith("x"):
+        msg = "no file"
+        raise RuntimeError(msg)
+    if cms_id.startswith("z"):
+        raise CampusOnlineRESTError(code=503, msg="circuit breaker is open")
+    return SimpleNamespace(id=f"{current_app.name}-{cms_id}")
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_import_theses(concurrency: int) -> None:
+    """Test that failing theses do not stop the import of the others."""
+    app = Flask("testapp")
+    ids = ["1", "x2", "3", "z4", "5", "6"]
+
+    with app.app_context():
+        result = import_theses(
+            fake_import,
+            Identity(1),
+            ids,
+            None,
+            concurrency=concurrency,
+        )
+
+    assert result.imported == ["1", "3", "5", "6"]
+    assert result.failed == ["x2", "z4"]
+    assert len(result) == len(ids)
+
+
+def test_chunked_and_distribute() -> None:
+    """Test splitting the ids into chunks and lanes."""
+    chunks = chunked(["1", "2", "3", "4", "5"], 2)
+    assert chunks == [["1", "2"], ["3", "4"], ["5"]]
+
+    assert distribute(chunks, 2) == [[["1", "2"], ["5"]], [["3", "4"]]]
+    assert distribute(chunks, None) == [[c] for c in chunks]
+    assert distribute(chunks, 10) == [[c] for c in chunks]
+
+
+def test_incremental_sync(db: SQLAlchemy) -> None:
+    """Test that only new or changed theses are selected."""
+    mark_imported("1", "fingerprint-1")
+    mark_imported("2", "fingerprint-2")
+
+    fingerprints = {"1": "fingerprint-1", "2": "changed", "3": "fingerprint-3"}
+    assert filter_changed(fingerprints) == {"2": "changed", "3": "fingerprint-3"}
+
+    mark_imported("2", "changed")
+    assert filter_changed(fingerprints) == {"3": "fingerprint-3"}
+
+
+class FakeService:
+    """Service of which only the download fails for every id with a y."""
+
+    def get_metadata(self, _: Identity, cms_id: str) -> str:
+        """Get the metadata."""
+        return cms_id
+
+    def download_file(self, _: Identity, cms_id: str) -> str:
+        """Download the file."""
+        if cms_id.startswith("y"):
+            msg = "download failed"
+            raise RuntimeError(msg)
+        return f"{cms_id}.pdf"
+
+    def set_status(self, _: Identity, cms_id: str, status: str, date: str) -> bool:
+        """Set the status."""
+        if cms_id.startswith("y"):
+            msg = f"Set status on {cms_id} went wrong"
+            raise RuntimeError(msg)
+        return bool(status and date)
+
+
+def ledger_import(identity: Identity, cms_id: str, cms_service: object) -> object:
+    """Import func fetching the metadata and the file."""
+    cms_service.get_metadata(identity, cms_id)
+    cms_service.download_file(identity, cms_id)
+    return SimpleNamespace(id=cms_id)
+
+
+def test_import_ledger(db: SQLAlchemy) -> None:
+    """Test that the ledger records the states and resumes the unfinished."""
+    ids = ["1", "y2", "3"]
+    record_fetched(ids, {"1": "fp-1", "y2": "fp-2", "3": "fp-3"})
+    assert import_progress()[ImportState.FETCHED] == len(ids)
+
+    import_theses(ledger_import, Identity(1), ids[:2], FakeService(), ledger=True)
+
+    first = db.session.get(CampusOnlineImportLedger, "1")
+    assert first.state == ImportState.IMPORTED.value
+    assert first.attempts == 1
+    assert set(first.timings) == {"get_metadata", "download_file", "import_func"}
+
+    failed = db.session.get(CampusOnlineImportLedger, "y2")
+    assert failed.state == ImportState.FAILED.value
+    assert failed.error == "download failed"
+
+    assert unfinished_ids() == (["3", "y2"], {"3": "fp-3", "y2": "fp-2"})
+    assert failed_ids() == (["y2"], {"y2": "fp-2"})
+
+    progress = import_progress()
+    assert progress[ImportState.IMPORTED] == 1
+    assert progress[ImportState.FAILED] == 1
+    assert progress[ImportState.FETCHED] == 1
+
+    record_fetched(["y2"])
+    assert db.session.get(CampusOnlineImportLedger, "y2").attempts == 1
+
+
+def test_write_back_status(db: SQLAlchemy) -> None:
+    """Test that accepted updates leave the queue and failed ones stay."""
+    import_theses(
+        ledger_import,
+        Identity(1),
+        ["1", "3"],
+        FakeService(),
+        ledger=True,
+        write_back="ARCHIVED",
+    )
+    enqueue_status(["y2"], "PUBLISHED")
+
+    result = write_back_status(
+        FakeService(),
+        Identity(1),
+        concurrency=2,
+        retries=0,
+        max_attempts=1,
+    )
+
+    assert sorted(result.updated) == ["1", "3"]
+    assert result.failed == {"y2": "Set status on y2 went wrong"}
+    assert failed_status_updates() == result.failed
+    assert db.session.get(CampusOnlineStatusUpdate, "1") is None
+    assert db.session.get(CampusOnlineStatusUpdate, "y2").attempts == 1
+    assert import_progress()[ImportState.STATUS_SET] == 2  # noqa: PLR2004
+
+    result = write_back_status(FakeService(), Identity(1), max_attempts=1)
+    assert not result.updated
+    assert not result.failed
+
+
+def test_import_theses_pipelined() -> None:
+    """Test that the pipeline imports the streamed ids."""
+    app = Flask("testapp")
+
+    with app.app_context():
+        result = import_theses_pipelined(
+            ledger_import,
+            Identity(1),
+            iter(["1", "y2", "3"]),
+            FakeService(),
+            workers={"metadata": 2, "download": 2, "import": 2},
+            queue_size=1,
+        )
+
+    assert sorted(result.imported) == ["1", "3"]
+    assert result.failed == ["y2"]
+
+
+def test_priority_import(db: SQLAlchemy) -> None:
+    """Test that requests in flight are coalesced and skipped by the bulk."""
+    assert claim_priority(["p1", "p2", "p1"]) == ["p1", "p2"]
+    assert claim_priority(["p2", "p3"]) == ["p3"]
+
+    record_fetched(["p4"])
+    advance("p4", ImportState.METADATA)
+    assert claim_priority(["p4"]) == []
+
+    ids = ["p1", "p5"]
+    result = import_theses(ledger_import, Identity(1), ids, FakeService(), ledger=True)
+    assert result.imported == ["p5"]
+    assert result.skipped == ["p1"]
+    assert not result.failed
+    assert db.session.get(CampusOnlineImportLedger, "p1") is None
+    assert db.session.get(CampusOnlineImportLedger, "p5").state == "imported"
+
+    import_theses(
+        ledger_import,
+        Identity(1),
+        ["p1"],
+        FakeService(),
+        ledger=True,
+        priority=True,
+    )
+    assert db.session.get(CampusOnlineImportLedger, "p1").state == "imported"
+
+    release_priority(["p1", "p2"])
+    assert claim_priority(["p1", "p3"], ttl=0) == ["p1", "p3"]
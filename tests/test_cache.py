@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Cache tests."""
+
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from invenio_campusonline.records.cache import LRUCache, RedisCache
+from invenio_campusonline.services import (
+    CampusOnlineRESTService,
+    CampusOnlineRESTServiceConfig,
+)
+
+
+class FakeRedis:
+    """Local stand-in for the redis commands used by the cache."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.values = {}
+        self.sorted_sets = {}
+
+    def get(self, key: str) -> bytes | None:
+        """Get."""
+        return self.values.get(key)
+
+    def set(self, key: str, value: bytes, **_: int) -> None:
+        """Set, the expiry is ignored."""
+        self.values[key] = value
+
+    def delete(self, *keys: str) -> None:
+        """Delete."""
+        for key in keys:
+            self.values.pop(key, None)
+
+    def zadd(self, name: str, mapping: dict[str, float]) -> None:
+        """Add to sorted set."""
+        self.sorted_sets.setdefault(name, {}).update(mapping)
+
+    def zcard(self, name: str) -> int:
+        """Count sorted set."""
+        return len(self.sorted_sets.get(name, {}))
+
+    def zremrangebyscore(self, name: str, low: float, high: float) -> None:
+        """Remove from sorted set by score."""
+        members = self.sorted_sets.get(name, {})
+        for key in [k for k, score in members.items() if low <= score <= high]:
+            del members[key]
+
+    def zpopmin(self, name: str, count: int) -> list[tuple[str, float]]:
+        """Pop the lowest scores of the sorted set."""
+        members = self.sorted_sets.get(name, {})
+        popped = sorted(members.items(), key=lambda item: item[1])[:count]
+        for key, _ in popped:
+            del members[key]
+        return popped
+
+
+def test_lru_cache() -> None:
+    """Test the eviction and the expiry of the lru cache."""
+    cache = LRUCache(ttl=300, max_entries=2)
+    cache.set("metadata", "1", b"1")
+    cache.set("metadata", "2", b"2")
+    assert cache.get("metadata", "1") == b"1"
+
+    cache.set("metadata", "3", b"3")
+    assert cache.get("metadata", "2") is None
+    assert cache.get("metadata", "1") == b"1"
+    assert cache.get("file_url", "1") is None
+
+    expired = LRUCache(ttl=-1)
+    expired.set("metadata", "1", b"1")
+    assert expired.get("metadata", "1") is None
+
+    assert (cache.stats.hits, cache.stats.misses) == (2, 2)
+
+
+def test_redis_cache() -> None:
+    """Test the redis cache with a local stand-in."""
+    client = FakeRedis()
+    cache = RedisCache(client, ttl=300, max_entries=2)
+    cache.set("metadata", "1", b"1")
+    cache.set("metadata", "2", b"2")
+    cache.set("metadata", "3", b"3")
+
+    assert cache.get("metadata", "1") is None
+    assert cache.get("metadata", "3") == b"3"
+    assert set(client.values) == {"campusonline:metadata:2", "campusonline:metadata:3"}
+    assert cache.stats.hit_ratio == 1 / 2
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_connection_cache(
+    campusonline_server: ThreadingHTTPServer,
+    client: str,
+) -> None:
+    """Test that the cached metadata is not requested again."""
+    config = CampusOnlineRESTServiceConfig(
+        campusonline_server.url,
+        "token",
+        cache="lru",
+        client=client,
+    )
+    service = CampusOnlineRESTService(config)
+
+    first = service.get_metadata(None, "abcd")
+    second = service.get_metadata(None, "abcd")
+
+    assert first.tag == second.tag
+    assert len(campusonline_server.requests) == 1
+    assert service.cache_stats.hits == 1
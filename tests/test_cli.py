@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Command line interface tests."""
+
+import json
+import os
+import signal
+from collections.abc import Callable
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from flask_principal import Identity
+from flask_sqlalchemy import SQLAlchemy
+from invenio_accounts import current_accounts
+
+from invenio_campusonline.api import mark_imported
+from invenio_campusonline.cli import duplicate_check, full_sync, progress
+from invenio_campusonline.models import CampusOnlineImportLedger
+
+ENDPOINT = ["--endpoint", "https://campusonline.example.org/", "--token", "token"]
+
+
+def test_duplicate_check_falls_back_to_per_id(
+    base_app: Flask,
+    campusonline_config: dict,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that only a duplicate func selects the per-id check."""
+    name = "CAMPUSONLINE_DUPLICATE_FUNC"
+    monkeypatch.setitem(campusonline_config, name, lambda cms_id: cms_id == "2")
+    runner = base_app.test_cli_runner()
+
+    args = [*ENDPOINT, "--campusonline-id", "2"]
+    result = runner.invoke(duplicate_check, args)
+    assert result.exit_code == 0
+    assert result.output == "2\n"
+
+    result = runner.invoke(duplicate_check, [*args, "--with-reason"])
+    assert result.output == "2 duplicate_func\n"
+
+
+def test_duplicate_check_bulk(
+    base_app: Flask,
+    db: SQLAlchemy,
+    campusonline_config: dict,
+    campusonline_server: ThreadingHTTPServer,
+) -> None:
+    """Test that the bulk check finds the imported thesis."""
+    mark_imported("d1", "fingerprint-d1")
+    campusonline_server.body = campusonline_server.body.replace(
+        b"<ID></ID>",
+        b"<ID>d1</ID>",
+    )
+    args = [
+        "--endpoint",
+        campusonline_server.url,
+        "--token",
+        "token",
+        "--campusonline-id",
+        "d1",
+        "--with-reason",
+    ]
+
+    result = base_app.test_cli_runner().invoke(duplicate_check, args)
+    assert result.exit_code == 0, result.output
+    assert result.output == "d1 cms_id sync_state:d1\n"
+
+
+@pytest.fixture
+def sync_args(
+    db: SQLAlchemy,
+    campusonline_config: dict,
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+) -> Callable[[list[str]], list[str]]:
+    """Serve the ids and build the arguments of full-sync."""
+    email = "full-sync@example.org"
+    if current_accounts.datastore.get_user_by_email(email) is None:
+        current_accounts.datastore.create_user(email=email, active=True)
+        db.session.commit()
+
+    def build(ids: list[str]) -> list[str]:
+        campusonline_server.responses = [(200, {}, all_theses_response(ids))]
+        return [
+            "--endpoint",
+            campusonline_server.url,
+            "--token",
+            "token",
+            "--user-email",
+            email,
+        ]
+
+    return build
+
+
+def failing_import(identity: Identity, cms_id: str, cms_service: object) -> object:
+    """Import func failing for every id with an x."""
+    if cms_id.startswith("x"):
+        msg = "no file"
+        raise RuntimeError(msg)
+    return SimpleNamespace(id=cms_id)
+
+
+def test_full_sync(
+    base_app: Flask,
+    db: SQLAlchemy,
+    campusonline_config: dict,
+    sync_args: Callable,
+    tmp_path: Path,
+) -> None:
+    """Test the summary, --resume-from and --only-failed."""
+    campusonline_config["CAMPUSONLINE_IMPORT_FUNC"] = failing_import
+    campusonline_config["CAMPUSONLINE_IMPORT_LEDGER"] = True
+    summary = tmp_path / "summary.json"
+    runner = base_app.test_cli_runner()
+
+    args = [*sync_args(["f1", "xf2", "f3"]), "--chunk-size", "2"]
+    result = runner.invoke(full_sync, [*args, "--summary", str(summary)])
+    assert result.exit_code == 0, result.output
+    report = json.loads(summary.read_text())
+    assert report["total"] == 3  # noqa: PLR2004
+    assert report["imported"] == 2  # noqa: PLR2004
+    assert report["failed_ids"] == ["xf2"]
+    assert not report["interrupted"]
+    assert report["resume_from"] is None
+
+    campusonline_config["CAMPUSONLINE_IMPORT_FUNC"] = lambda *_: SimpleNamespace(id="1")
+    args = [*sync_args([]), "--only-failed", "--summary", str(summary)]
+    result = runner.invoke(full_sync, args)
+    assert result.exit_code == 0, result.output
+    assert db.session.get(CampusOnlineImportLedger, "xf2").state == "imported"
+
+    args = [*sync_args(["f1", "xf2", "f3"]), "--resume-from", "f3"]
+    result = runner.invoke(full_sync, [*args, "--summary", str(summary)])
+    report = json.loads(summary.read_text())
+    assert (report["total"], report["imported"]) == (1, 1)
+
+    args = [*sync_args(["f1"]), "--resume-from", "f3"]
+    result = runner.invoke(full_sync, args)
+    assert "--resume-from f3 is not in the ids" in result.output
+
+
+def test_full_sync_interrupted(
+    base_app: Flask,
+    campusonline_config: dict,
+    sync_args: Callable,
+    tmp_path: Path,
+) -> None:
+    """Test that Ctrl-C stops the serial import after the current thesis."""
+    imported = []
+
+    def interrupted_import(_: Identity, cms_id: str, __: object) -> object:
+        if not imported:
+            os.kill(os.getpid(), signal.SIGINT)
+        imported.append(cms_id)
+        return SimpleNamespace(id=cms_id)
+
+    campusonline_config["CAMPUSONLINE_IMPORT_FUNC"] = interrupted_import
+    summary = tmp_path / "summary.json"
+
+    args = [*sync_args(["i1", "i2", "i3"]), "--summary", str(summary)]
+    result = base_app.test_cli_runner().invoke(full_sync, args)
+    assert result.exit_code == 0, result.output
+    assert imported == ["i1"]
+    report = json.loads(summary.read_text())
+    assert report["imported"] == 1
+    assert report["interrupted"]
+    assert report["resume_from"] == "i2"
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
+
+
+def test_ledger_disabled_by_default(
+    base_app: Flask,
+    campusonline_config: dict,
+    sync_args: Callable,
+) -> None:
+    """Test that the commands of the ledger refuse to run without it."""
+    assert not campusonline_config["CAMPUSONLINE_IMPORT_LEDGER"]
+    runner = base_app.test_cli_runner()
+
+    result = runner.invoke(full_sync, [*sync_args([]), "--resume"])
+    assert "need CAMPUSONLINE_IMPORT_LEDGER" in result.output
+
+    result = runner.invoke(progress, [])
+    assert "needs CAMPUSONLINE_IMPORT_LEDGER" in result.output
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Duplicate check tests."""
+
+import json
+from io import StringIO
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from invenio_campusonline.api import mark_imported
+from invenio_campusonline.duplicates import (
+    build_duplicate_index,
+    export_duplicates,
+    find_duplicates,
+    find_duplicates_parallel,
+    normalize_text,
+)
+from invenio_campusonline.types import Duplicate, Thesis
+
+
+def thesis(cms_id: str, title: str, author: str) -> Thesis:
+    """Build a thesis with title and author."""
+    return Thesis(
+        cms_id,
+        metaclasses={"TEXT": [{"TIT": title}], "AUTHOR": [{"FNLN": author}]},
+    )
+
+
+def test_normalize_text() -> None:
+    """Test that case, accents and punctuation are ignored."""
+    assert normalize_text("Über die  Größe: Teil-1") == "uber die grosse teil 1"
+
+
+def test_find_duplicates(db: SQLAlchemy) -> None:
+    """Test that ids and title author keys are matched."""
+    mark_imported("1", "fingerprint-1")
+
+    def index_func() -> list:
+        return [("rec-a", None, "Über Duplikate", ["Doe, Jane"])]
+
+    index = build_duplicate_index(index_func)
+    theses = [
+        thesis("1", "Imported", "Roe, Richard"),
+        thesis("2", "uber duplikate", "DOE, Jane"),
+        thesis("3", "New thesis", "Roe, Richard"),
+        thesis("4", "New Thesis!", "Roe, Richard"),
+        thesis("5", "Other thesis", "Roe, Richard"),
+    ]
+
+    assert find_duplicates(theses, index) == [
+        Duplicate("1", "cms_id", "sync_state:1"),
+        Duplicate("2", "title_author", "rec-a"),
+        Duplicate("4", "title_author", "campusonline:3"),
+    ]
+
+
+def test_find_duplicates_parallel() -> None:
+    """Test that the duplicate function runs with an application context."""
+    app = Flask("testapp")
+
+    with app.app_context():
+        duplicates = find_duplicates_parallel(
+            ["1", "2", "3"],
+            lambda cms_id: cms_id != "2",
+            concurrency=2,
+        )
+
+    assert [duplicate.cms_id for duplicate in duplicates] == ["1", "3"]
+
+
+def test_export_duplicates() -> None:
+    """Test the csv and the json export."""
+    duplicates = [Duplicate("1", "cms_id", "rec-a")]
+
+    fp = StringIO()
+    export_duplicates(duplicates, fp, "csv")
+    assert fp.getvalue().splitlines() == ["cms_id,reason,reference", "1,cms_id,rec-a"]
+
+    fp = StringIO()
+    export_duplicates(duplicates, fp, "json")
+    assert json.loads(fp.getvalue()) == [
+        {"cms_id": "1", "reason": "cms_id", "reference": "rec-a"},
+    ]
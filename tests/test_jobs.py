@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Jobs tests."""
+
+import pytest
+from marshmallow import ValidationError
+
+from invenio_campusonline.jobs import (
+    ImportThesesArgsSchema,
+    ImportThesesFromCampusonlineJob,
+)
+from invenio_campusonline.tasks import import_theses_from_campusonline
+
+
+def test_import_theses_job() -> None:
+    """Test that the job passes its arguments on to the import task."""
+    assert ImportThesesFromCampusonlineJob.task is import_theses_from_campusonline
+
+    arguments = ImportThesesFromCampusonlineJob.build_task_arguments(
+        None,
+        chunk_size=50,
+        resume=True,
+        unknown="ignored",
+    )
+    assert arguments == {
+        "chunk_size": 50,
+        "parallelism": None,
+        "incremental": None,
+        "resume": True,
+    }
+
+
+def test_import_theses_args_schema() -> None:
+    """Test that the job arguments are validated."""
+    schema = ImportThesesArgsSchema()
+    assert schema.load({"chunk_size": 10})["resume"] is False
+
+    with pytest.raises(ValidationError):
+        schema.load({"chunk_size": 0})
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Metrics tests."""
+
+import socket
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from invenio_campusonline.records import CampusOnlineAPI, CampusOnlineRESTConfig
+from invenio_campusonline.records.metrics import InMemoryCollector, StatsdCollector
+from invenio_campusonline.types import ImportResult, Metrics
+
+
+def test_collector_timer() -> None:
+    """Test that the timer records the calls and counts the errors."""
+    collector = InMemoryCollector()
+
+    with collector.timer("get_metadata"):
+        pass
+    with pytest.raises(RuntimeError), collector.timer("get_metadata"):
+        raise RuntimeError
+    collector.increment("get_metadata.bytes", 100)
+
+    metrics = collector.snapshot()
+    assert metrics.timings["get_metadata"][0] == 2  # noqa: PLR2004
+    assert metrics.counters == {"get_metadata.errors": 1, "get_metadata.bytes": 100}
+
+    collector.reset()
+    assert not collector.snapshot()
+
+
+def test_metrics_merge_and_summary() -> None:
+    """Test that the metrics of two chunks are merged."""
+    first = Metrics({"download": [2, 3.0, 2.0]}, {"download.bytes": 10})
+    second = Metrics({"download": [1, 4.0, 4.0], "get_metadata": [1, 1.0, 1.0]})
+
+    merged = first + second
+    assert merged.timings == {"download": [3, 7.0, 4.0], "get_metadata": [1, 1.0, 1.0]}
+    assert merged.counters == {"download.bytes": 10}
+    assert merged.summary().startswith("download 3x 7.00s (max 4.00s)")
+
+    result = ImportResult(["1"], [], {"timings": {}, "counters": {"a": 1}})
+    assert (result + ImportResult(metrics=first)).metrics.counters["a"] == 1
+
+
+def test_connection_metrics(campusonline_server: ThreadingHTTPServer) -> None:
+    """Test that the connection times the stages and counts the bytes."""
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token", retries=1)
+    api = CampusOnlineAPI(config)
+    campusonline_server.responses = [(503, {}, b"")]
+
+    api.get_metadata("1")
+
+    metrics = api.connection.metrics.snapshot()
+    assert metrics.timings["get_metadata"][0] == 1
+    assert metrics.counters["get_metadata.retries"] == 1
+    assert metrics.counters["get_metadata.bytes"] == len(campusonline_server.body)
+
+
+def test_statsd_collector() -> None:
+    """Test that the metrics are sent to statsd."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(1)
+
+    collector = StatsdCollector("127.0.0.1", server.getsockname()[1], "co")
+    collector.increment("download.bytes", 42)
+
+    assert server.recv(1024) == b"co.download.bytes:42|c"
+    assert collector.snapshot().counters == {"download.bytes": 42}
+    server.close()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Xml backend tests."""
+
+from pathlib import Path
+
+import pytest
+
+from invenio_campusonline.records.api import (
+    exists_fulltext,
+    fingerprint,
+    parse_metadata,
+    parse_status,
+)
+from invenio_campusonline.records.parsing import get_backend
+from invenio_campusonline.utils import extract_embargo_range
+
+FAULT = b"""
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+  <soapenv:Body>
+    <soapenv:Fault><faultstring>unknown thesis</faultstring></soapenv:Fault>
+  </soapenv:Body>
+</soapenv:Envelope>
+"""
+
+
+def test_get_backend() -> None:
+    """Test the selection of the backend."""
+    assert get_backend().name == "stdlib"
+    assert get_backend("stdlib").name == "stdlib"
+    assert get_backend("lxml").name == "lxml"
+    assert get_backend("auto").name == "lxml"
+
+    with pytest.raises(RuntimeError, match="unknown xml backend"):
+        get_backend("sax")
+
+
+def test_backends_agree() -> None:
+    """Test that the queries and the fingerprint don't depend on the backend."""
+    data = (Path(__file__).parent / "minimal_record.xml").read_bytes()
+    results = []
+
+    for name in ("stdlib", "lxml"):
+        thesis = parse_metadata(get_backend(name).fromstring(data))
+        results.append(
+            (
+                fingerprint(thesis),
+                exists_fulltext(thesis),
+                extract_embargo_range(thesis),
+            ),
+        )
+
+    stdlib, lxml = results
+    assert stdlib == lxml
+    assert stdlib[2].start is not None
+
+
+@pytest.mark.parametrize("backend", ["stdlib", "lxml"])
+def test_parse_status_fault(backend: str) -> None:
+    """Test that a soap fault of the status request is reported."""
+    root = get_backend(backend).fromstring(FAULT)
+
+    with pytest.raises(RuntimeError, match="unknown thesis"):
+        parse_status(root, "abcd")
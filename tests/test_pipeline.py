@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Import pipeline tests."""
+
+from collections.abc import Iterator
+from threading import Lock
+
+import pytest
+from flask import Flask, current_app
+from flask_principal import Identity
+
+from invenio_campusonline.services import ImportPipeline
+from invenio_campusonline.types import ImportOutcome
+
+
+class FakeService:
+    """Service of which the download fails for every id with a y."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.calls: list[tuple[str, str]] = []
+        self.lock = Lock()
+
+    def get_metadata(self, _: Identity, cms_id: str) -> str:
+        """Get the metadata."""
+        with self.lock:
+            self.calls.append(("get_metadata", cms_id))
+        return f"metadata-{cms_id}"
+
+    def download_file(self, _: Identity, cms_id: str) -> str:
+        """Download the file."""
+        with self.lock:
+            self.calls.append(("download_file", cms_id))
+        if cms_id.startswith("y"):
+            msg = "download failed"
+            raise RuntimeError(msg)
+        return f"{cms_id}.pdf"
+
+
+def discovered(ids: list[str]) -> Iterator[str]:
+    """Yield the ids like the streamed response."""
+    yield from ids
+
+
+def test_pipeline() -> None:
+    """Test that the import gets the prefetched values and errors."""
+    app = Flask("testapp")
+    service = FakeService()
+    imported = []
+    written_back = []
+
+    def import_step(cms_id: str, cms_service: FakeService) -> ImportOutcome:
+        assert current_app.name == "testapp"
+        metadata = cms_service.get_metadata(None, cms_id)
+        try:
+            path = cms_service.download_file(None, cms_id)
+        except RuntimeError:
+            return ImportOutcome.FAILED
+        imported.append((metadata, path))
+        return ImportOutcome.IMPORTED
+
+    pipeline = ImportPipeline(
+        service,
+        None,
+        import_step,
+        write_back=written_back.append,
+        workers={"metadata": 2, "download": 3, "import": 2},
+        queue_size=2,
+    )
+    with app.app_context():
+        result = pipeline.run(discovered(["1", "y2", "3", "4"]))
+
+    assert sorted(result.imported) == ["1", "3", "4"]
+    assert result.failed == ["y2"]
+    assert min(imported) == ("metadata-1", "1.pdf")
+    assert sorted(written_back) == ["1", "3", "4"]
+    assert len(service.calls) == 8  # noqa: PLR2004
+
+
+def test_pipeline_discovery_error() -> None:
+    """Test that the discovered theses are imported before the error is raised."""
+    imported = []
+
+    def failing_ids() -> Iterator[str]:
+        yield "1"
+        msg = "connection lost"
+        raise RuntimeError(msg)
+
+    def import_step(cms_id: str, _: FakeService) -> ImportOutcome:
+        imported.append(cms_id)
+        return ImportOutcome.IMPORTED
+
+    pipeline = ImportPipeline(FakeService(), None, import_step)
+    with pytest.raises(RuntimeError, match="connection lost"):
+        pipeline.run(failing_ids())
+
+    assert imported == ["1"]
+
+
+def test_pipeline_skips_before_fetching() -> None:
+    """Test that skipped and repeated theses are not fetched or written back."""
+    service = FakeService()
+    written_back = []
+
+    def import_step(_: str, __: FakeService) -> ImportOutcome:
+        return ImportOutcome.IMPORTED
+
+    pipeline = ImportPipeline(
+        service,
+        None,
+        import_step,
+        write_back=written_back.append,
+        skip=lambda cms_id: cms_id.startswith("c"),
+    )
+    result = pipeline.run(discovered(["1", "c2", "1", "3"]))
+
+    assert sorted(result.imported) == ["1", "3"]
+    assert sorted(result.skipped) == ["1", "c2"]
+    assert sorted(written_back) == ["1", "3"]
+    assert sorted(cms_id for _, cms_id in service.calls) == ["1", "1", "3", "3"]
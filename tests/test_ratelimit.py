@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Rate limiter tests."""
+
+from collections.abc import Callable
+from http.server import ThreadingHTTPServer
+from time import monotonic
+
+import pytest
+
+from invenio_campusonline.records import CampusOnlineAPI, CampusOnlineRESTConfig
+from invenio_campusonline.records.ratelimit import (
+    RateLimiter,
+    RedisRateLimiter,
+    TokenBucket,
+)
+
+
+class FakeRedis:
+    """Local stand-in for the token bucket script of the rate limiter."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.buckets: dict[str, TokenBucket] = {}
+
+    def register_script(self, _: str) -> Callable[..., str]:
+        """Register the script, run by a token bucket per key."""
+
+        def script(keys: list[str], args: list[float]) -> str:
+            rate, burst = args
+            bucket = self.buckets.setdefault(keys[0], TokenBucket(rate, burst))
+            return str(bucket.reserve())
+
+        return script
+
+
+def test_token_bucket() -> None:
+    """Test that the bucket allows the burst and then asks to wait."""
+    bucket = TokenBucket(rate=1, burst=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 1
+
+    with pytest.raises(TypeError):
+        RateLimiter()
+
+
+def test_redis_rate_limiter_is_shared() -> None:
+    """Test that limiters on the same redis share one budget."""
+    client = FakeRedis()
+    first = RedisRateLimiter(client, "soap", rate=0.001, burst=2)
+    second = RedisRateLimiter(client, "soap", rate=0.001, burst=2)
+    download = RedisRateLimiter(client, "download", rate=0.001, burst=2)
+
+    assert first.reserve() == 0
+    assert second.reserve() == 0
+    assert first.reserve() > 0
+    assert download.reserve() == 0
+
+
+def test_connection_rate_limit(campusonline_server: ThreadingHTTPServer) -> None:
+    """Test that the soap requests are not sent faster than the rate limit."""
+    rate = 20
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token", rate_limit=rate)
+    api = CampusOnlineAPI(config)
+
+    requests = 3
+    start = monotonic()
+    for _ in range(requests):
+        api.get_metadata("abcd")
+
+    assert monotonic() - start >= (requests - 1) / rate * 0.9
+    assert api.connection.download_limiter is None
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Records tests."""
+
+import os
+import signal
+import time
+from collections.abc import Callable
+from datetime import date
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+from xml.etree.ElementTree import ElementTree, fromstring, tostring
+
+import pytest
+from flask import Flask
+
+from invenio_campusonline.api import import_theses
+from invenio_campusonline.records import (
+    AsyncCampusOnlineAPI,
+    CampusOnlineAPI,
+    CampusOnlineRESTConfig,
+    SyncCampusOnlineAPI,
+)
+from invenio_campusonline.records.api import (
+    ThesesStreamParser,
+    fingerprint,
+    parse_metadata,
+    parse_thesis,
+)
+from invenio_campusonline.records.models import CampusOnlineRESTError
+from invenio_campusonline.records.parsing import get_backend
+from invenio_campusonline.services import (
+    CampusOnlineRESTService,
+    CampusOnlineRESTServiceConfig,
+)
+from invenio_campusonline.types import (
+    ImportPlan,
+    PartitionedThesesFilter,
+    ThesesFilter,
+    Thesis,
+)
+from invenio_campusonline.utils import extract_embargo_range
+
+NS = "http://www.campusonline.at/thesisservice/basetypes"
+
+
+def test_connection_reuses_session(campusonline_server: ThreadingHTTPServer) -> None:
+    """Test that consecutive requests share one keep-alive connection."""
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token-abc")
+    api = CampusOnlineAPI(config)
+
+    requests = 3
+    for _ in range(requests):
+        thesis = api.get_metadata("abcd")
+        assert thesis.tag.endswith("thesis")
+
+    stats = api.connection.stats
+    assert stats.requests == requests
+    assert stats.connections == 1
+    assert stats.reused == requests - 1
+
+
+def test_connection_without_keep_alive(
+    campusonline_server: ThreadingHTTPServer,
+) -> None:
+    """Test that keep alive can be switched off."""
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token", keep_alive=False)
+    api = CampusOnlineAPI(config)
+
+    api.get_metadata("abcd")
+    api.get_metadata("abcd")
+
+    _, _, headers, _ = campusonline_server.requests[0]
+    assert headers["Connection"] == "close"
+    assert api.connection.stats.reused == 0
+
+
+def test_async_api_with_sync_facade(
+    campusonline_server: ThreadingHTTPServer,
+) -> None:
+    """Test that the service can run on the async client."""
+    config = CampusOnlineRESTServiceConfig(
+        campusonline_server.url,
+        "token-abc",
+        client="async",
+    )
+    service = CampusOnlineRESTService(config)
+
+    requests = 3
+    for _ in range(requests):
+        thesis = service.get_metadata(None, "abcd")
+        assert thesis.tag.endswith("thesis")
+
+    assert isinstance(service.async_api, AsyncCampusOnlineAPI)
+    assert service.connection_stats.requests == requests
+    assert service.connection_stats.connections == 1
+
+
+def test_sync_facade_across_fork(
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+) -> None:
+    """Test that a forked process starts its own event loop and client."""
+    campusonline_server.body = all_theses_response(["1"])
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token-abc")
+    api = SyncCampusOnlineAPI(AsyncCampusOnlineAPI(config))
+    assert api.fetch_ids(ThesesFilter("")) == ["1"]
+
+    pid = os.fork()
+    if pid == 0:
+        code = 0 if api.fetch_ids(ThesesFilter("")) == ["1"] else 1
+        os._exit(code)
+
+    for _ in range(100):
+        if (finished := os.waitpid(pid, os.WNOHANG))[0]:
+            break
+        time.sleep(0.1)
+    else:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        pytest.fail("the forked process hangs")
+
+    assert os.waitstatus_to_exitcode(finished[1]) == 0
+    assert api.fetch_ids(ThesesFilter("")) == ["1"]
+
+
+def test_fingerprint(minimal_record: ElementTree) -> None:
+    """Test that the fingerprint ignores formatting but not content."""
+    thesis = parse_metadata(minimal_record.getroot())
+    reformatted = fromstring(tostring(thesis).replace(b"\n        ", b"\n"))
+    assert fingerprint(thesis) == fingerprint(reformatted)
+
+    thesis.find(f"{{{NS}}}attr[@key='STATUS']").text = "ARCH"
+    assert fingerprint(thesis) != fingerprint(reformatted)
+
+
+@pytest.mark.parametrize("backend", ["stdlib", "lxml"])
+def test_theses_stream_parser(all_theses_response: Callable, backend: str) -> None:
+    """Test that the parser yields ids and drops the finished theses."""
+    ids = [str(i) for i in range(1000)]
+    body = all_theses_response(ids)
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    parser = ThesesStreamParser("ID", get_backend(backend))
+    parsed = []
+    for element in parser.parse(chunks):
+        parsed.append(element.text)
+        thesis = parser.stack[-1] if parser.stack else element.getparent()
+        response = parser.stack[-2] if parser.stack else thesis.getparent()
+        assert len(response) <= 1
+
+    assert parsed == ids
+
+
+def test_iter_ids(
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+) -> None:
+    """Test streaming the ids with the sync and the async api."""
+    ids = ["1", "2", "3"]
+    campusonline_server.body = all_theses_response(ids)
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token-abc")
+
+    api = CampusOnlineAPI(config)
+    assert list(api.iter_ids(ThesesFilter(""))) == ids
+    assert set(api.fetch_fingerprints(ThesesFilter(""))) == set(ids)
+
+    api = SyncCampusOnlineAPI(AsyncCampusOnlineAPI(config))
+    assert list(api.iter_ids(ThesesFilter(""))) == ids
+    assert set(api.fetch_fingerprints(ThesesFilter(""))) == set(ids)
+
+
+def test_iter_ids_broken_transfer(
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+) -> None:
+    """Test that a body which breaks off is raised as CampusOnlineRESTError."""
+    body = all_theses_response(["1", "2", "3"])
+    headers = {"Content-Length": str(len(body) + 100)}
+    campusonline_server.responses = [(200, headers, body), (200, headers, body)]
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token-abc")
+
+    with pytest.raises(CampusOnlineRESTError, match="code=550"):
+        list(CampusOnlineAPI(config).iter_ids(ThesesFilter("")))
+
+    api = SyncCampusOnlineAPI(AsyncCampusOnlineAPI(config))
+    with pytest.raises(CampusOnlineRESTError, match="code=550"):
+        list(api.iter_ids(ThesesFilter("")))
+
+
+def test_partitioned_filter() -> None:
+    """Test the date windows and the escaping of the partition values."""
+    windows = PartitionedThesesFilter.by_date_windows(
+        "<bas:from>{start}</bas:from><bas:to>{end}</bas:to>",
+        date(2020, 1, 1),
+        date(2020, 3, 1),
+        days=31,
+    )
+    assert [str(partition) for partition in windows] == [
+        "<bas:from>2020-01-01</bas:from><bas:to>2020-01-31</bas:to>",
+        "<bas:from>2020-02-01</bas:from><bas:to>2020-03-01</bas:to>",
+    ]
+
+    units = PartitionedThesesFilter.by_values(
+        "<bas:org>{org}</bas:org>",
+        "org",
+        ["A&B"],
+    )
+    assert [str(partition) for partition in units] == ["<bas:org>A&amp;B</bas:org>"]
+
+
+@pytest.mark.parametrize("api_cls", ["sync", "async"])
+def test_fetch_ids_partitioned(
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+    api_cls: str,
+) -> None:
+    """Test that the partitions are requested and the ids are merged."""
+    campusonline_server.responses = [
+        (200, {}, all_theses_response(["1", "2"])),
+        (200, {}, all_theses_response(["2", "3"])),
+    ]
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token-abc")
+    api = CampusOnlineAPI(config)
+    if api_cls == "async":
+        api = SyncCampusOnlineAPI(AsyncCampusOnlineAPI(config))
+
+    theses_filter = PartitionedThesesFilter.by_values(
+        "<bas:org>{org}</bas:org>",
+        "org",
+        ["A", "B"],
+    )
+    ids = api.fetch_ids_partitioned(theses_filter)
+
+    assert sorted(ids) == ["1", "2", "3"]
+    bodies = sorted(body for *_, body in campusonline_server.requests)
+    assert b"<bas:org>A</bas:org>" in bodies[0]
+    assert b"<bas:org>B</bas:org>" in bodies[1]
+
+
+def test_reuse_bulk_metadata(
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+) -> None:
+    """Test that complete theses of the bulk response are not requested again."""
+    metadata = campusonline_server.body
+    complete = metadata.replace(b"<ID></ID>", b"<ID>1</ID>")
+    complete = complete.replace(b"getMetadataByThesisID", b"getAllThesesMetadata")
+    incomplete = all_theses_response(["2"])
+    missing_attr = complete.replace(b'<attr key="FNLN">Doe, John</attr>', b"")
+    campusonline_server.responses = [
+        (200, {}, complete),
+        (200, {}, metadata),
+        (200, {}, incomplete),
+        (200, {}, metadata),
+        (200, {}, missing_attr),
+        (200, {}, complete),
+    ]
+
+    config = CampusOnlineRESTServiceConfig(
+        campusonline_server.url,
+        "token-abc",
+        reuse_bulk_metadata=True,
+    )
+    service = CampusOnlineRESTService(config)
+
+    assert service.fetch_all_ids(None, ThesesFilter("")) == ["1"]
+    assert service.get_metadata(None, "1").findtext(f"{{{NS}}}ID") == "1"
+    assert len(campusonline_server.requests) == 1
+    service.get_metadata(None, "1")
+    assert len(campusonline_server.requests) == 1 + 1
+
+    assert service.fetch_all_ids(None, ThesesFilter("")) == ["2"]
+    service.get_metadata(None, "2")
+    assert len(campusonline_server.requests) == 2 + 2
+
+    assert service.fetch_all_ids(None, ThesesFilter("")) == ["1"]
+    assert not service.bulk_metadata
+
+    assert service.fetch_all_ids(None, ThesesFilter("")) == ["1"]
+    with Flask("testapp").app_context():
+        import_theses(lambda *_: SimpleNamespace(id="1"), None, ["1"], service)
+    assert not service.bulk_metadata
+
+
+def document_response(document: str) -> bytes:
+    """Build a getDocumentByThesisID response."""
+    return (
+        '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">'
+        f'<soapenv:Body><getDocumentByThesisIDResponse xmlns="{NS}">{document}'
+        "</getDocumentByThesisIDResponse></soapenv:Body></soapenv:Envelope>"
+    ).encode()
+
+
+def test_plan_import(
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+) -> None:
+    """Test that the plan reads the file sizes without downloading the files."""
+    file_url = f"{campusonline_server.url}file?token="
+    campusonline_server.responses = [
+        (200, {}, all_theses_response(["1", "2"])),
+        (
+            200,
+            {},
+            document_response(f"<document><docUrl>{file_url}</docUrl></document>"),
+        ),
+        (200, {"Content-Length": "2048"}, b""),
+        (200, {}, document_response("")),
+    ]
+    config = CampusOnlineRESTServiceConfig(campusonline_server.url, "token-abc")
+    service = CampusOnlineRESTService(config)
+
+    plan = service.plan_import(None, ThesesFilter(""), concurrency=1)
+
+    assert plan.sizes == {"1": 2048}
+    assert list(plan.errors) == ["2"]
+    assert plan.requests == {
+        "fetch_ids": 1,
+        "get_metadata": 2,
+        "get_file_url": 2,
+        "download": 1,
+    }
+    assert [command for command, *_ in campusonline_server.requests] == [
+        "POST",
+        "POST",
+        "HEAD",
+        "POST",
+    ]
+    assert plan.estimate(bandwidth=1024) > 2  # noqa: PLR2004
+
+
+def test_plan_import_partitioned(
+    campusonline_server: ThreadingHTTPServer,
+    all_theses_response: Callable,
+) -> None:
+    """Test that the plan counts one request for the ids per partition."""
+    campusonline_server.responses = [
+        (200, {}, all_theses_response(["1"])),
+        (200, {}, all_theses_response(["1"])),
+        (200, {}, document_response("")),
+    ]
+    config = CampusOnlineRESTServiceConfig(campusonline_server.url, "token-abc")
+    service = CampusOnlineRESTService(config)
+    theses_filter = PartitionedThesesFilter.by_values("{unit}", "unit", ["a", "b"])
+
+    plan = service.plan_import(None, theses_filter, concurrency=1)
+
+    assert plan.ids == ["1"]
+    assert plan.requests == {
+        "fetch_ids": 2,
+        "get_metadata": 1,
+        "get_file_url": 1,
+        "download": 0,
+    }
+
+
+def test_plan_estimate_partitioned() -> None:
+    """Test that the requests for the ids are only counted by fetch_seconds."""
+    plan = ImportPlan(
+        ids=["1", "2"],
+        sizes={"1": 2048},
+        soap_latencies=[1.0],
+        head_latencies=[0.5],
+        fetch_seconds=3.0,
+        partitions=3,
+    )
+
+    assert plan.estimate() == 3.0 + 4 * 1.0 + 0.5
+    assert plan.estimate(concurrency=2, bandwidth=1024) == 3.0 + 2.25 + 2
+
+
+def test_parse_thesis(minimal_record: ElementTree) -> None:
+    """Test that the thesis decodes the values of the metadata."""
+    thesis = parse_thesis(parse_metadata(minimal_record.getroot()))
+
+    assert thesis.title == "Title Lorem Ipsum"
+    assert thesis.authors == ["Mustermann, Max"]
+    assert thesis.supervisors == ["Doe, John"]
+    assert thesis.language == "EN"
+    assert thesis.embargo == extract_embargo_range(minimal_record)
+    assert thesis.has_fulltext
+    assert thesis.doc_url is None
+    assert not hasattr(thesis, "__dict__")
+
+    assert Thesis("1", {}, {"TEXT": []}).title is None
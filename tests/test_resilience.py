@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Retry and circuit breaker tests."""
+
+from datetime import date
+from http.server import ThreadingHTTPServer
+from unittest.mock import Mock
+
+import httpx
+import pytest
+from requests.exceptions import ContentDecodingError
+
+from invenio_campusonline.records import (
+    AsyncCampusOnlineAPI,
+    CampusOnlineAPI,
+    CampusOnlineRESTConfig,
+    SyncCampusOnlineAPI,
+)
+from invenio_campusonline.records.models import CampusOnlineRESTError
+from invenio_campusonline.records.resilience import CircuitBreaker, RetryPolicy
+
+
+def create_api(
+    config: CampusOnlineRESTConfig,
+    client: str,
+) -> CampusOnlineAPI | SyncCampusOnlineAPI:
+    """Create the api of the sync or the async client."""
+    if client == "async":
+        return SyncCampusOnlineAPI(AsyncCampusOnlineAPI(config))
+    return CampusOnlineAPI(config)
+
+
+def test_retry_policy_delays() -> None:
+    """Test that the delays are jittered up to the capped backoff."""
+    delays = list(RetryPolicy(retries=4, backoff=1, max_backoff=3).delays())
+
+    bounds = [1, 2, 3, 3]
+    assert len(delays) == len(bounds)
+    assert all(0 <= d <= b for d, b in zip(delays, bounds, strict=True))
+
+
+def test_circuit_breaker() -> None:
+    """Test that the breaker opens, lets one trial pass and closes again."""
+    breaker = CircuitBreaker(threshold=2, reset_timeout=0)
+
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_retry_transient_errors(
+    campusonline_server: ThreadingHTTPServer,
+    client: str,
+) -> None:
+    """Test that idempotent requests are retried after a 503."""
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token", retry_backoff=0)
+    api = create_api(config, client)
+    campusonline_server.responses = [(503, {}, b""), (502, {}, b"")]
+
+    thesis = api.get_metadata("abcd")
+
+    assert thesis.tag.endswith("thesis")
+    assert len(campusonline_server.requests) == len(["503", "502", "200"])
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_set_status_is_not_retried(
+    campusonline_server: ThreadingHTTPServer,
+    client: str,
+) -> None:
+    """Test that set status fails without a retry."""
+    config = CampusOnlineRESTConfig(campusonline_server.url, "token", retry_backoff=0)
+    api = create_api(config, client)
+    campusonline_server.responses = [(503, {}, b"")]
+
+    with pytest.raises(CampusOnlineRESTError, match="code=503"):
+        api.set_status("abcd", "ARCHIVED", date(2025, 1, 1))
+
+    assert len(campusonline_server.requests) == 1
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_circuit_breaker_stops_requests(
+    campusonline_server: ThreadingHTTPServer,
+    client: str,
+) -> None:
+    """Test that an open circuit fails without sending the request."""
+    config = CampusOnlineRESTConfig(
+        campusonline_server.url,
+        "token",
+        retries=0,
+        circuit_breaker_threshold=2,
+    )
+    api = create_api(config, client)
+    campusonline_server.responses = [(503, {}, b""), (503, {}, b"")]
+
+    for _ in range(3):
+        with pytest.raises(CampusOnlineRESTError):
+            api.get_metadata("abcd")
+
+    assert len(campusonline_server.requests) == config.circuit_breaker_threshold
+
+
+class FailingLimiter:
+    """Rate limiter of which the backend is down."""
+
+    def acquire(self) -> None:
+        """Fail."""
+        msg = "redis is down"
+        raise RuntimeError(msg)
+
+    async def aacquire(self) -> None:
+        """Fail."""
+        self.acquire()
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_circuit_breaker_trial_with_other_errors(
+    campusonline_server: ThreadingHTTPServer,
+    monkeypatch: pytest.MonkeyPatch,
+    client: str,
+) -> None:
+    """Test that the trial ends with any error, so the circuit can close again."""
+    config = CampusOnlineRESTConfig(
+        campusonline_server.url,
+        "token",
+        retries=0,
+        circuit_breaker_threshold=1,
+        circuit_breaker_reset_timeout=0,
+    )
+    api = create_api(config, client)
+    connection = api.connection
+    campusonline_server.responses = [(503, {}, b"")]
+    with pytest.raises(CampusOnlineRESTError, match="code=503"):
+        api.get_metadata("abcd")
+    assert connection.breaker.is_open
+
+    if client == "async":
+        error = httpx.DecodingError("invalid gzip")
+        monkeypatch.setattr(connection.client, "send", Mock(side_effect=error))
+    else:
+        error = ContentDecodingError("invalid gzip")
+        monkeypatch.setattr(connection.session, "post", Mock(side_effect=error))
+    with pytest.raises(CampusOnlineRESTError, match="invalid gzip"):
+        api.get_metadata("abcd")
+    monkeypatch.undo()
+
+    connection.soap_limiter = FailingLimiter()
+    with pytest.raises(RuntimeError, match="redis is down"):
+        api.get_metadata("abcd")
+    connection.soap_limiter = None
+
+    assert api.get_metadata("abcd").tag.endswith("thesis")
+    assert not connection.breaker.is_open
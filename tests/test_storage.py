@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Download store tests."""
+
+import asyncio
+from http.server import ThreadingHTTPServer
+from os import utime
+from pathlib import Path
+from threading import Thread
+
+import pytest
+
+from invenio_campusonline.records import (
+    AsyncCampusOnlineConnection,
+    CampusOnlineRESTConfig,
+    models,
+)
+from invenio_campusonline.records.models import (
+    CampusOnlineConnection,
+    CampusOnlineRESTError,
+)
+from invenio_campusonline.records.storage import DownloadStore
+
+
+def download(
+    config: CampusOnlineRESTConfig,
+    client: str,
+    cms_id: str,
+    file_url: str,
+) -> Path:
+    """Download the file with a new sync or async connection."""
+    if client == "async":
+        connection = AsyncCampusOnlineConnection(config)
+        return asyncio.run(connection.download(cms_id, file_url))
+    return CampusOnlineConnection(config).download(cms_id, file_url)
+
+
+def test_store_and_lookup(tmp_path: Path) -> None:
+    """Test that a stored file is found as long as etag and size match."""
+    store = DownloadStore(tmp_path)
+
+    path = store.store("abcd", [b"%PDF", b"-1.7"], etag='"v1"', size=8)
+
+    assert path.read_bytes() == b"%PDF-1.7"
+    assert path.parent.parent == store.objects
+    assert store.lookup("abcd", '"v1"', 8) == path
+    assert store.lookup("abcd", '"v2"', 8) is None
+    assert store.lookup("abcd", '"v1"', 9) is None
+    assert store.store("ijkl", [b"%PDF"], size=4) == store.lookup("ijkl", size=4)
+    assert store.lookup("ijkl", '"v1"', 4) is None
+    assert store.lookup("efgh") is None
+    assert not list(store.tmp.iterdir())
+
+
+def test_store_rejects_truncated_file(tmp_path: Path) -> None:
+    """Test that a file with a wrong size is not moved into the store."""
+    store = DownloadStore(tmp_path)
+
+    with pytest.raises(RuntimeError, match="4 bytes instead of 8"):
+        store.store("abcd", [b"%PDF"], size=8)
+
+    assert store.lookup("abcd") is None
+    assert not list(store.tmp.iterdir())
+
+
+def test_store_evicts_partial_files(tmp_path: Path) -> None:
+    """Test that stale partial files count and recently used files are kept."""
+    store = DownloadStore(tmp_path, quota=4, grace=60)
+    stale = store.open("stale")
+    stale.write(b"w" * 4)
+    stale.close()
+    running = store.open("running")
+    running.write(b"x" * 4)
+    utime(stale.path, (0, 0))
+    utime(running.path, (0, 0))
+
+    recent = store.store("recent", [b"y" * 4])
+    latest = store.store("latest", [b"z" * 4])
+
+    assert not stale.path.exists()
+    assert running.path.exists()
+    assert recent.exists()
+    assert latest.exists()
+    running.discard()
+
+
+def test_open_waits_for_concurrent_download(tmp_path: Path) -> None:
+    """Test that the partial file is not shared by concurrent downloads."""
+    store = DownloadStore(tmp_path)
+    first = store.open("abcd")
+    first.write(b"%PDF")
+
+    opened = []
+    thread = Thread(target=lambda: opened.append(store.open("abcd")))
+    thread.start()
+    thread.join(0.2)
+    assert thread.is_alive()
+
+    path = store.commit("abcd", first, size=4)
+    thread.join()
+    second = opened[0]
+    assert second.size == 0
+    second.discard()
+
+    assert path.read_bytes() == b"%PDF"
+    assert not list(store.tmp.iterdir())
+
+
+def test_store_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Test that the oldest files are removed if the quota is exceeded."""
+    store = DownloadStore(tmp_path, quota=10)
+
+    old = store.store("old", [b"x" * 4])
+    utime(old, (0, 0))
+    new = store.store("new", [b"y" * 4])
+    latest = store.store("latest", [b"z" * 4])
+
+    assert not old.exists()
+    assert new.exists()
+    assert latest.exists()
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_connection_download(
+    campusonline_server: ThreadingHTTPServer,
+    tmp_path: Path,
+    client: str,
+) -> None:
+    """Test that an unchanged file is not downloaded again."""
+    config = CampusOnlineRESTConfig(
+        campusonline_server.url,
+        "token",
+        download_dir=str(tmp_path),
+    )
+    file_url = f"{campusonline_server.url}file?token="
+    content = b"%PDF-1.7 content"
+
+    campusonline_server.responses = [
+        (200, {"ETag": '"v1"'}, content),
+        (304, {"ETag": '"v1"'}, b""),
+    ]
+
+    path = download(config, client, "abcd", file_url)
+    assert path.read_bytes() == content
+    assert download(config, client, "abcd", file_url) == path
+
+    (_, _, first, _), (_, _, second, _) = campusonline_server.requests
+    assert "If-None-Match" not in first
+    assert second["If-None-Match"] == '"v1"'
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_connection_retries_server_errors(
+    campusonline_server: ThreadingHTTPServer,
+    tmp_path: Path,
+    client: str,
+) -> None:
+    """Test that a download failing with a server error is retried."""
+    config = CampusOnlineRESTConfig(
+        campusonline_server.url,
+        "token",
+        download_dir=str(tmp_path),
+        retry_backoff=0,
+    )
+    file_url = f"{campusonline_server.url}file?token="
+    campusonline_server.responses = [
+        (503, {}, b""),
+        (200, {"ETag": '"v1"'}, b"%PDF-1.7"),
+        (404, {}, b""),
+    ]
+
+    path = download(config, client, "abcd", file_url)
+    assert path.read_bytes() == b"%PDF-1.7"
+
+    with pytest.raises(CampusOnlineRESTError, match="code=404"):
+        download(config, client, "efgh", file_url)
+    assert len(campusonline_server.requests) == len(["503", "200", "404"])
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_connection_download_without_etag(
+    campusonline_server: ThreadingHTTPServer,
+    tmp_path: Path,
+    client: str,
+) -> None:
+    """Test that a file without etag is not reused because of its size."""
+    config = CampusOnlineRESTConfig(
+        campusonline_server.url,
+        "token",
+        download_dir=str(tmp_path),
+    )
+    file_url = f"{campusonline_server.url}file?token="
+    campusonline_server.responses = [
+        (200, {}, b"%PDF-1.7 first"),
+        (200, {}, b"%PDF-1.7 other"),
+    ]
+
+    first = download(config, client, "abcd", file_url)
+    second = download(config, client, "abcd", file_url)
+
+    assert first != second
+    assert second.read_bytes() == b"%PDF-1.7 other"
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_connection_resumes_download(
+    campusonline_server: ThreadingHTTPServer,
+    tmp_path: Path,
+    client: str,
+) -> None:
+    """Test that an interrupted download is resumed with a range request."""
+    config = CampusOnlineRESTConfig(
+        campusonline_server.url,
+        "token",
+        download_dir=str(tmp_path),
+        download_retries=0,
+    )
+    file_url = f"{campusonline_server.url}file?token="
+    content = b"%PDF-1.7 content"
+
+    campusonline_server.responses = [
+        (200, {"ETag": '"v1"', "Content-Length": str(len(content))}, content[:6]),
+        (206, {"ETag": '"v1"', "Content-Range": "bytes 6-15/16"}, content[6:]),
+    ]
+
+    with pytest.raises(CampusOnlineRESTError):
+        download(config, client, "abcd", file_url)
+
+    path = download(config, client, "abcd", file_url)
+    assert path.read_bytes() == content
+    assert not list(DownloadStore(tmp_path).tmp.iterdir())
+
+    _, _, headers, _ = campusonline_server.requests[1]
+    assert headers["Range"] == "bytes=6-"
+    assert headers["If-Range"] == '"v1"'
+
+
+def test_connection_resumes_download_with_backoff(
+    campusonline_server: ThreadingHTTPServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the resume waits with backoff before the range request."""
+    config = CampusOnlineRESTConfig(
+        campusonline_server.url,
+        "token",
+        download_dir=str(tmp_path),
+        download_retries=1,
+        retry_backoff=0.25,
+    )
+    file_url = f"{campusonline_server.url}file?token="
+    content = b"%PDF-1.7 content"
+    delays = []
+    monkeypatch.setattr(models, "sleep", delays.append)
+
+    campusonline_server.responses = [
+        (200, {"ETag": '"v1"', "Content-Length": str(len(content))}, content[:6]),
+        (206, {"ETag": '"v1"', "Content-Range": "bytes 6-15/16"}, content[6:]),
+    ]
+
+    path = CampusOnlineConnection(config).download("abcd", file_url)
+    assert path.read_bytes() == content
+    assert len(delays) == 1
+    assert 0 <= delays[0] <= 0.25  # noqa: PLR2004
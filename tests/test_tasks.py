@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 Graz University of Technology.
+#
+# invenio-campusonline is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Tasks tests."""
+
+from dataclasses import asdict
+from types import SimpleNamespace
+
+import pytest
+from flask_principal import Identity
+from flask_sqlalchemy import SQLAlchemy
+
+from invenio_campusonline import tasks
+from invenio_campusonline.api import record_fetched
+from invenio_campusonline.models import CampusOnlineImportLedger, CampusOnlineSyncState
+from invenio_campusonline.priority import claim_priority, is_claimed
+from invenio_campusonline.records.metrics import MetricsCollector
+from invenio_campusonline.records.models import CampusOnlineRESTError
+from invenio_campusonline.services import (
+    CampusOnlineRESTService,
+    CampusOnlineRESTServiceConfig,
+    services,
+)
+from invenio_campusonline.types import ImportResult, ImportState
+
+
+class FakeService:
+    """Service of which the metadata fails for every id with a z."""
+
+    def __init__(self) -> None:
+        """Construct."""
+        self.metrics = MetricsCollector()
+
+    def get_metadata(self, _: Identity, cms_id: str) -> str:
+        """Get the metadata."""
+        if cms_id.startswith("z"):
+            raise CampusOnlineRESTError(code=503, msg="circuit breaker is open")
+        return cms_id
+
+    def release_bulk_metadata(self, *_: object) -> None:
+        """Release the bulk metadata."""
+
+
+def fake_import(identity: Identity, cms_id: str, cms_service: object) -> object:
+    """Import func fetching the metadata."""
+    cms_service.get_metadata(identity, cms_id)
+    return SimpleNamespace(id=cms_id)
+
+
+@pytest.fixture
+def service(campusonline_config: dict, monkeypatch: pytest.MonkeyPatch) -> FakeService:
+    """Run the tasks with the fake service and import func."""
+    service = FakeService()
+    proxy = SimpleNamespace(campusonline_rest_service=service)
+    monkeypatch.setattr(tasks, "current_campusonline", proxy)
+    campusonline_config["CAMPUSONLINE_IMPORT_FUNC"] = fake_import
+    campusonline_config["CAMPUSONLINE_IMPORT_LEDGER"] = True
+    return service
+
+
+def test_select() -> None:
+    """Test that the fingerprints of a chunk may be incomplete."""
+    assert tasks.select(None, ["1"]) is None
+    assert tasks.select({"1": "fp-1", "3": "fp-3"}, ["1", "2"]) == {"1": "fp-1"}
+
+
+def test_import_task_resumes_in_chunks(db: SQLAlchemy, service: FakeService) -> None:
+    """Test resuming theses with and without fingerprints in chunks."""
+    record_fetched(["t1", "t2", "zt3"], {"t1": "fp-1"})
+
+    tasks.import_theses_from_campusonline(chunk_size=1, resume=True)
+
+    assert db.session.get(CampusOnlineImportLedger, "t1").state == "imported"
+    assert db.session.get(CampusOnlineImportLedger, "t2").state == "imported"
+    assert db.session.get(CampusOnlineSyncState, "t1").fingerprint == "fp-1"
+    assert db.session.get(CampusOnlineSyncState, "t2") is None
+
+    failed = db.session.get(CampusOnlineImportLedger, "zt3")
+    assert failed.state == ImportState.FAILED.value
+    assert "circuit breaker is open" in failed.error
+
+
+def test_priority_task_releases_claims(db: SQLAlchemy, service: FakeService) -> None:
+    """Test that the priority task imports the theses and releases the claims."""
+    assert claim_priority(["pr1"]) == ["pr1"]
+
+    tasks.import_theses_priority(["pr1"])
+
+    assert db.session.get(CampusOnlineImportLedger, "pr1").state == "imported"
+    assert not is_claimed("pr1")
+
+
+def test_priority_import_releases_claims_if_not_sent(
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the claims are released if the task can't be sent."""
+
+    def apply_async(**_: object) -> None:
+        msg = "broker is down"
+        raise ConnectionError(msg)
+
+    task = SimpleNamespace(apply_async=apply_async)
+    celery_app = SimpleNamespace(signature=lambda *_, **__: task)
+    monkeypatch.setattr(services, "current_celery_app", celery_app)
+    config = CampusOnlineRESTServiceConfig("https://campusonline.example.org/", "t")
+    service = CampusOnlineRESTService(config)
+
+    with pytest.raises(ConnectionError):
+        service.import_with_priority(None, ["pr2"])
+
+    assert not is_claimed("pr2")
+    assert claim_priority(["pr2"]) == ["pr2"]
+
+
+def test_summarize_import(
+    service: FakeService,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that the summary counts the skipped theses apart."""
+    results = [
+        asdict(ImportResult(imported=["1"], failed=["2"])),
+        asdict(ImportResult(imported=["3"], skipped=["4"])),
+    ]
+
+    tasks.summarize_import(results)
+
+    assert "2 imported, 1 failed, 1 skipped" in caplog.text
+    assert "failed for cms_ids: 2" in caplog.text
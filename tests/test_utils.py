@@ -8,16 +8,21 @@
 
 """Module utils."""
 
-from xml.etree.ElementTree import Element, fromstring, tostring
+from xml.etree.ElementTree import Element, canonicalize, fromstring
+
+import pytest
 
 from invenio_campusonline.records.models import CampusOnlineRESTPOSTXML
 from invenio_campusonline.types import Embargo, ThesesFilter
 from invenio_campusonline.utils import extract_embargo_range
 
 
-def compare_xml(body: str, expected: str) -> bool:
-    """Compare xml."""
-    return tostring(fromstring(body)) == tostring(fromstring(expected))
+def compare_xml(body: bytes, expected: str) -> bool:
+    """Compare xml, ignoring the indentation of the expected xml."""
+    return canonicalize(body.decode(), strip_text=True) == canonicalize(
+        expected,
+        strip_text=True,
+    )
 
 
 def test_create_request_body_metadata() -> None:
@@ -115,6 +120,30 @@ def test_create_request_body_ids() -> None:
     """
     assert compare_xml(body, expected)
 
+    assert post_xml.create_request_body_ids(str(theses_filter)) == body
+
+
+def test_create_request_body_escapes_values() -> None:
+    """Test that the values can't change the structure of the envelope."""
+    post_xml = CampusOnlineRESTPOSTXML("token<&>")
+
+    body = post_xml.create_request_body_download("</bas:ID><bas:ID>1")
+
+    assert b"\n" not in body
+    ns = "{http://www.campusonline.at/thesisservice/basetypes}"
+    root = fromstring(body)
+    assert root.findtext(f".//{ns}token") == "token<&>"
+    assert [e.text for e in root.iter(f"{ns}ID")] == ["</bas:ID><bas:ID>1"]
+
+
+def test_create_request_body_ids_rejects_broken_filter() -> None:
+    """Test that a theses filter which is not well-formed is rejected."""
+    post_xml = CampusOnlineRESTPOSTXML("token-abc")
+    theses_filter = ThesesFilter("</bas:getAllThesesMetadataRequest>")
+
+    with pytest.raises(ValueError, match="well-formed"):
+        post_xml.create_request_body_ids(theses_filter)
+
 
 def test_create_request_header() -> None:
     """Test the create_request_header function."""